@@ -2,6 +2,8 @@
 ASGI config for recipes project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests are handled by Django; WebSocket connections are routed to the
+live features (presenter sync of the slideshow player, see slides/live.py).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
@@ -13,6 +15,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'central.settings')
 
-application = get_asgi_application()
+# Sets Django up, so it must run before importing any model.
+django_application = get_asgi_application()
 
+from slides.live import live_slideshow_application  # noqa: E402
 
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        await live_slideshow_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -130,6 +130,12 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.SessionAuthentication'],
 }
 
+# Live features (presenter sync) fan-out hub, see core/broadcast.py.
+# The in-process backend needs no broker but requires a single ASGI process;
+# use 'core.broadcast.RedisBackend' with LIVE_BROADCAST_REDIS_URL to scale out.
+LIVE_BROADCAST_BACKEND = 'core.broadcast.InProcessBackend'
+LIVE_BROADCAST_REDIS_URL = os.environ.get('LIVE_BROADCAST_REDIS_URL', 'redis://localhost:6379/0')
+
 # Fixture directories for initial data
 FIXTURE_DIRS = [os.path.join(BASE_DIR, 'init')]
 
@@ -1,7 +1,7 @@
 # core/admin.py (UPDATED)
 
 from django.contrib import admin
-from .models import Curriculum, Language, Subject, Label, StudySkillCategory, StudySkill
+from .models import Curriculum, Language, Subject, Label, StudySkillCategory, StudySkill, ContentRevision
 
 @admin.register(Curriculum)
 class CurriculumAdmin(admin.ModelAdmin):
@@ -39,4 +39,10 @@ class StudySkillCategoryAdmin(admin.ModelAdmin):
 class StudySkillAdmin(admin.ModelAdmin):
     list_display = ('name', 'category', 'order')
     list_filter = ('category',)
-    search_fields = ('name', 'description')
\ No newline at end of file
+    search_fields = ('name', 'description')
+
+@admin.register(ContentRevision)
+class ContentRevisionAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'is_snapshot', 'author', 'created_at')
+    list_filter = ('content_type', 'is_snapshot')
+    readonly_fields = ('content_type', 'object_id', 'number', 'is_snapshot', 'fields', 'data', 'author', 'created_at')
@@ -0,0 +1,145 @@
+# core/broadcast.py
+"""
+Fan-out hub for live features (e.g. presenter sync in the slideshow player).
+
+Connections subscribe to a room and publishers push text messages to every
+subscriber of that room. Each subscriber only keeps the latest undelivered
+message: live state such as "the presenter is on slide 7" supersedes what
+came before, so a slow viewer skips stale positions instead of queueing
+them. The last message of each room is also kept and handed to new
+subscribers, so a late joiner starts on the current state.
+
+The backend is chosen with the LIVE_BROADCAST_BACKEND setting:
+- core.broadcast.InProcessBackend (default): no broker, all connections
+  must be served by the same ASGI process.
+- core.broadcast.RedisBackend: relays messages through Redis pub/sub so
+  several processes can serve the same room (requires the `redis` package
+  and LIVE_BROADCAST_REDIS_URL).
+"""
+import asyncio
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Only needed by RedisBackend.
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = 'core.broadcast.InProcessBackend'
+
+
+class Subscription:
+    """ One connection's mailbox in a room, holding at most one message. """
+
+    def __init__(self, room):
+        self.room = room
+        self._queue = asyncio.Queue(maxsize=1)
+
+    def deliver(self, message):
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(message)
+
+    async def get(self):
+        return await self._queue.get()
+
+
+class InProcessBackend:
+    """ Rooms live in this process's memory; publishing is a loop over subscribers. """
+
+    def __init__(self):
+        self._rooms = defaultdict(set)
+        self._last = {}
+
+    async def subscribe(self, room):
+        subscription = Subscription(room)
+        self._rooms[room].add(subscription)
+        if room in self._last:
+            subscription.deliver(self._last[room])
+        return subscription
+
+    async def unsubscribe(self, subscription):
+        subscribers = self._rooms.get(subscription.room)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._rooms[subscription.room]
+            self._last.pop(subscription.room, None)
+
+    async def publish(self, room, message):
+        self._fan_out(room, message)
+
+    def _fan_out(self, room, message):
+        subscribers = self._rooms.get(room)
+        if subscribers is None:
+            return
+        self._last[room] = message
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+    def subscriber_count(self, room):
+        return len(self._rooms.get(room, ()))
+
+
+class RedisBackend(InProcessBackend):
+    """
+    Publishes through Redis so that every process receives every message,
+    then fans out locally to the connections of this process. The last
+    message of a room is kept in a Redis key for late joiners.
+    """
+    CHANNEL_PREFIX = 'live:'
+    LAST_MESSAGE_TIMEOUT = 60 * 60 * 12
+
+    def __init__(self):
+        if aioredis is None:
+            raise RuntimeError("The redis package is required by RedisBackend.")
+        super().__init__()
+        self._redis = aioredis.from_url(settings.LIVE_BROADCAST_REDIS_URL, decode_responses=True)
+        self._listener = None
+
+    def _ensure_listener(self):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self):
+        pubsub = self._redis.pubsub()
+        await pubsub.psubscribe(f'{self.CHANNEL_PREFIX}*')
+        try:
+            async for item in pubsub.listen():
+                if item['type'] == 'pmessage':
+                    self._fan_out(item['channel'][len(self.CHANNEL_PREFIX):], item['data'])
+        except Exception:
+            logger.exception("Live broadcast listener stopped")
+        finally:
+            await pubsub.close()
+
+    async def subscribe(self, room):
+        self._ensure_listener()
+        subscription = await super().subscribe(room)
+        if room not in self._last:
+            last = await self._redis.get(f'{self.CHANNEL_PREFIX}last:{room}')
+            if last is not None:
+                subscription.deliver(last)
+        return subscription
+
+    async def publish(self, room, message):
+        await self._redis.set(f'{self.CHANNEL_PREFIX}last:{room}', message, ex=self.LAST_MESSAGE_TIMEOUT)
+        await self._redis.publish(f'{self.CHANNEL_PREFIX}{room}', message)
+
+
+_backend = None
+
+
+def get_backend():
+    """ Returns the process-wide broadcast backend, created on first use. """
+    global _backend
+    if _backend is None:
+        backend_path = getattr(settings, 'LIVE_BROADCAST_BACKEND', DEFAULT_BACKEND)
+        _backend = import_string(backend_path)()
+    return _backend
@@ -0,0 +1,86 @@
+# core/dedup.py
+"""
+Near-duplicate detection for flashcards and recipe blocks.
+
+Texts are normalized (HTML tags, entities and LaTeX markup removed, case and
+punctuation folded), cut into overlapping character shingles, and summarized
+by a one-permutation MinHash signature: each shingle is hashed once into one
+of SIGNATURE_SIZE bins, each bin keeps its smallest hash, and empty bins are
+filled from their neighbours (rotation densification). The fraction of bins
+two signatures agree on estimates the Jaccard similarity of their shingle
+sets, at the cost of one hash per shingle instead of one per permutation.
+
+Signatures are split into LSH bands. Each band is hashed into a key and
+stored in ContentSignatureBand, indexed by (content type, key), so the
+documents that may resemble a text are found with one index lookup per band
+instead of comparing the text against the whole corpus. With 16 bands of 4
+rows, pairs above ~50% similarity share a band with high probability.
+
+Hashing lives in core/minhash.py; this module maintains the index. The
+index is updated explicitly when documents are saved (index_documents) and
+can be rebuilt for the whole corpus with `manage.py find_near_duplicates`.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+
+from .minhash import DUPLICATE_THRESHOLD, band_keys, minhash, minhash_documents, similarity
+from .models import ContentSignature, ContentSignatureBand
+
+
+def store_signatures(model, signatures):
+    """
+    Replaces the indexed signatures of `model` instances. `signatures` maps
+    pk -> signature; a None signature just removes the document.
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    with transaction.atomic():
+        ContentSignature.objects.filter(content_type=content_type, object_id__in=list(signatures)).delete()
+        stored = ContentSignature.objects.bulk_create([
+            ContentSignature(content_type=content_type, object_id=pk, signature=signature)
+            for pk, signature in signatures.items() if signature is not None
+        ])
+        # BANDS rows per document: written with executemany, as building and
+        # compiling that many model instances costs more than the insert.
+        quote = connection.ops.quote_name
+        meta = ContentSignatureBand._meta
+        columns = ', '.join(quote(meta.get_field(name).column) for name in ('signature', 'content_type', 'key'))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {quote(meta.db_table)} ({columns}) VALUES (%s, %s, %s)",
+                [(row.pk, content_type.pk, key) for row in stored for key in band_keys(row.signature)],
+            )
+
+
+def index_documents(model, documents):
+    """ Indexes an iterable of (pk, text) for `model`. """
+    store_signatures(model, dict(minhash_documents(documents)))
+
+
+def remove_documents(model, pks):
+    store_signatures(model, dict.fromkeys(pks))
+
+
+def find_near_duplicates(model, text, threshold=DUPLICATE_THRESHOLD, exclude=(), limit=10):
+    """
+    [(pk, similarity)] of the indexed `model` instances resembling `text`,
+    most similar first.
+    """
+    signature = minhash(text)
+    if signature is None:
+        return []
+    content_type = ContentType.objects.get_for_model(model)
+    sharing_a_band = ContentSignatureBand.objects.filter(
+        content_type=content_type, key__in=band_keys(signature)
+    ).values('signature_id')
+    candidates = (
+        ContentSignature.objects.filter(pk__in=sharing_a_band)
+        .exclude(object_id__in=list(exclude))
+        .values_list('object_id', 'signature')
+    )
+    matches = {}
+    for pk, other in candidates:
+        score = similarity(signature, other)
+        if score >= threshold:
+            matches[pk] = score
+    return sorted(matches.items(), key=lambda match: (-match[1], match[0]))[:limit]
+
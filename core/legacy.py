@@ -0,0 +1,88 @@
+# core/legacy.py
+"""
+Natural-key resolution for the legacy import commands.
+
+Legacy archives reference users by username and taxonomy either by the pk
+it had in the legacy app or by its display text ("Maths AA - SL"). The
+taxonomy tables are small, so they are loaded once into dictionaries; users
+are looked up per batch and cached.
+"""
+import re
+
+from django.contrib.auth.models import User
+
+from .models import Curriculum, Label, Language, Subject
+
+# "Maths AA - SL", "Maths AA (HL)", "Physics SL"
+_SUBJECT_TEXT_RE = re.compile(r'^(?P<name>.*?)[\s\-(]*(?P<level>SL|HL)\)?\s*$', re.IGNORECASE)
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class NaturalKeyResolver:
+    """ Maps legacy references to ids of the current database (None if unknown). """
+
+    def __init__(self):
+        self._curriculums = dict(Curriculum.objects.values_list('id', 'name'))
+        self._curriculums_by_name = {name.lower(): pk for pk, name in self._curriculums.items()}
+        self._languages = {}
+        self._languages_by_key = {}
+        for pk, name, code in Language.objects.values_list('id', 'name', 'code'):
+            self._languages[pk] = name
+            self._languages_by_key[name.lower()] = pk
+            self._languages_by_key[code.lower()] = pk
+        self._subjects = {}
+        self._subjects_by_key = {}
+        for pk, name, curriculum_id, language_id, level in Subject.objects.values_list(
+            'id', 'name', 'curriculum_id', 'language_id', 'level'
+        ):
+            self._subjects[pk] = (curriculum_id, language_id)
+            self._subjects_by_key.setdefault((name.lower(), level, curriculum_id, language_id), pk)
+            self._subjects_by_key.setdefault((name.lower(), level, curriculum_id, None), pk)
+        self._labels = set(Label.objects.values_list('id', flat=True))
+        self._users = {}
+
+    def curriculum_id(self, value):
+        pk = _as_int(value)
+        if pk in self._curriculums:
+            return pk
+        return self._curriculums_by_name.get(str(value or '').strip().lower())
+
+    def language_id(self, value):
+        pk = _as_int(value)
+        if pk in self._languages:
+            return pk
+        return self._languages_by_key.get(str(value or '').strip().lower())
+
+    def subject_id(self, text=None, pk=None, curriculum_id=None, language_id=None):
+        """
+        Resolves a subject from its display text (name and level) within the
+        curriculum, falling back to the legacy pk.
+        """
+        match = _SUBJECT_TEXT_RE.match((text or '').strip())
+        if match:
+            level = Subject.Level.HL if match['level'].upper() == 'HL' else Subject.Level.SL
+            key = (match['name'].strip().lower(), level, curriculum_id)
+            subject_id = self._subjects_by_key.get((*key, language_id)) or self._subjects_by_key.get((*key, None))
+            if subject_id:
+                return subject_id
+        pk = _as_int(pk)
+        return pk if pk in self._subjects else None
+
+    def label_id(self, value):
+        pk = _as_int(value)
+        return pk if pk in self._labels else None
+
+    def user_ids(self, usernames):
+        """ Returns {username: id} for the given usernames, querying only unseen ones. """
+        missing = {name for name in usernames if name and name not in self._users}
+        if missing:
+            found = dict(User.objects.filter(username__in=missing).values_list('username', 'id'))
+            for name in missing:
+                self._users[name] = found.get(name)
+        return {name: self._users.get(name) for name in usernames if name}
@@ -0,0 +1,35 @@
+# core/management/commands/compact_revisions.py
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+
+from core.models import ContentRevision
+from core.revisions import KEEP_REVISIONS, compact_revisions, purge_orphan_blobs
+
+
+class Command(BaseCommand):
+    help = "Drops old recipe/slideshow revisions and deletes block blobs that are no longer referenced."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=KEEP_REVISIONS,
+                            help=f"Number of recent revisions kept per document (default: {KEEP_REVISIONS}).")
+
+    def handle(self, *args, **options):
+        keep = max(1, options['keep'])
+        documents = ContentRevision.objects.values_list('content_type_id', 'object_id').distinct()
+
+        deleted_revisions = 0
+        for content_type_id, object_id in documents:
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            instance = model.objects.filter(pk=object_id).first() if model else None
+            if instance is None:
+                # The document itself was deleted: its history goes with it.
+                deleted, _ = ContentRevision.objects.filter(content_type_id=content_type_id, object_id=object_id).delete()
+            else:
+                deleted = compact_revisions(instance, keep=keep)
+            deleted_revisions += deleted
+
+        deleted_blobs = purge_orphan_blobs()
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted_revisions} revision(s) and {deleted_blobs} orphaned blob(s)."
+        ))
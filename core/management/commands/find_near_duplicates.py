@@ -0,0 +1,112 @@
+# core/management/commands/find_near_duplicates.py
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import combinations
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from core.dedup import store_signatures
+from core.minhash import DUPLICATE_THRESHOLD, load_signatures, minhash_documents, score_pairs
+from core.models import ContentSignature, ContentSignatureBand
+from core.streaming import batched
+
+# Documents hashed, or candidate pairs scored, per task sent to a worker process.
+CHUNK_SIZE = 500
+PAIR_CHUNK_SIZE = 20000
+
+SOURCES = {
+    'flashcards': ('flashcards.Flashcard', ('question', 'answer')),
+    'recipe-blocks': ('recipes.RecipeBlock', ('content_html',)),
+}
+
+
+def _documents(model, fields):
+    """ (pk, text) of every instance, read without loading full model objects. """
+    rows = model.objects.order_by('pk').values_list('pk', *fields).iterator(chunk_size=CHUNK_SIZE)
+    for pk, *values in rows:
+        yield pk, '\n'.join(values)
+
+
+def _imap(executor, function, chunks, window):
+    """ executor.map() that reads `chunks` lazily, keeping at most `window` tasks in flight. """
+    pending = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(function, chunk))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the MinHash index of flashcards and recipe blocks and reports near-duplicate pairs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=sorted(SOURCES), action='append',
+                            help="Corpus to process (repeatable; default: all).")
+        parser.add_argument('--threshold', type=float, default=DUPLICATE_THRESHOLD,
+                            help=f"Minimum estimated similarity reported (default: {DUPLICATE_THRESHOLD}).")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Worker processes computing signatures (default: one per CPU).")
+        parser.add_argument('--no-reindex', action='store_true',
+                            help="Report from the stored index without recomputing signatures.")
+
+    def handle(self, *args, **options):
+        for source in options['source'] or sorted(SOURCES):
+            label, fields = SOURCES[source]
+            model = apps.get_model(label)
+            if not options['no_reindex']:
+                indexed = self._reindex(model, fields, max(1, options['workers']))
+                self.stdout.write(f"{source}: indexed {indexed} document(s).")
+            pairs = self._pairs(model, options['threshold'], max(1, options['workers']))
+            self.stdout.write(self.style.SUCCESS(f"{source}: {len(pairs)} near-duplicate pair(s)."))
+            for first, second, score in pairs:
+                self.stdout.write(f"  {first}\t{second}\t{score:.2f}")
+
+    def _reindex(self, model, fields, workers):
+        indexed = 0
+        # Hashing is CPU-bound and database-free: workers hash chunks while
+        # this process streams the corpus and writes the results.
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = batched(_documents(model, fields), CHUNK_SIZE)
+            for signatures in _imap(executor, minhash_documents, chunks, 2 * workers):
+                store_signatures(model, dict(signatures))
+                indexed += sum(1 for _, signature in signatures if signature is not None)
+
+        # Signatures of documents deleted without going through the API.
+        ContentSignature.objects.filter(content_type=ContentType.objects.get_for_model(model)).exclude(
+            object_id__in=model.objects.values('pk')
+        ).delete()
+        return indexed
+
+    def _pairs(self, model, threshold, workers):
+        """ Pairs sharing at least one LSH band whose estimated similarity reaches `threshold`. """
+        content_type = ContentType.objects.get_for_model(model)
+        bands = ContentSignatureBand.objects.filter(content_type=content_type)
+        shared_keys = bands.values('key').annotate(size=Count('id')).filter(size__gt=1).values('key')
+        buckets = {}
+        members = bands.filter(key__in=shared_keys).order_by('signature_id').values_list('key', 'signature_id')
+        for key, signature_id in members.iterator():
+            buckets.setdefault(key, []).append(signature_id)
+
+        # Buckets are in signature order, so each pair comes out as (lower, higher) once.
+        candidates = {pair for bucket in buckets.values() for pair in combinations(bucket, 2)}
+        needed = {signature_id for pair in candidates for signature_id in pair}
+        signatures = {}
+        for chunk in batched(needed, CHUNK_SIZE):
+            for pk, object_id, signature in ContentSignature.objects.filter(pk__in=chunk).values_list('pk', 'object_id', 'signature'):
+                signatures[pk] = (object_id, signature)
+
+        # Each worker receives the signatures once, then scores chunks of pairs.
+        pairs = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=load_signatures, initargs=(signatures,)) as executor:
+            chunks = batched(candidates, PAIR_CHUNK_SIZE)
+            for scored in _imap(executor, partial(score_pairs, threshold=threshold), chunks, 2 * workers):
+                pairs.extend(scored)
+        return sorted(pairs, key=lambda pair: (-pair[2], pair[0], pair[1]))
@@ -0,0 +1,20 @@
+# core/management/commands/render_thumbnails.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.thumbnails import THUMBNAIL_SOURCES, render_pending_thumbnails
+
+
+class Command(BaseCommand):
+    help = "Renders the missing or out-of-date thumbnails of slideshows and recipes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', choices=sorted(THUMBNAIL_SOURCES),
+                            help="Limit rendering to this model (can be repeated).")
+
+    def handle(self, *args, **options):
+        try:
+            rendered = render_pending_thumbnails(options['model'])
+        except RuntimeError as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} thumbnail(s)."))
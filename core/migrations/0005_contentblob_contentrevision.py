@@ -0,0 +1,43 @@
+# Generated by Django 4.2.17 on 2026-10-19 03:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0004_studyskillcategory_studyskill'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.CharField(max_length=64, unique=True)),
+                ('payload', models.JSONField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContentRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('number', models.PositiveIntegerField(help_text='Sequential revision number for the document.')),
+                ('is_snapshot', models.BooleanField(default=False)),
+                ('fields', models.JSONField(default=dict, help_text='Document metadata (title, status, taxonomy ids) at this revision.')),
+                ('data', models.JSONField(default=dict, help_text='Full block hash list (snapshot) or block changes (delta).')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='content_revisions', to=settings.AUTH_USER_MODEL)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'ordering': ['content_type', 'object_id', '-number'],
+                'unique_together': {('content_type', 'object_id', 'number')},
+            },
+        ),
+    ]
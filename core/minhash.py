@@ -0,0 +1,121 @@
+# core/minhash.py
+"""
+MinHash signatures and LSH band keys of text fragments (see core/dedup.py).
+
+Nothing here touches Django, so these functions can run in worker processes
+started by the near-duplicate report, whatever the multiprocessing start
+method.
+"""
+import hashlib
+import html
+import re
+import zlib
+from operator import eq
+
+SIGNATURE_SIZE = 64
+BANDS = 16
+ROWS_PER_BAND = SIGNATURE_SIZE // BANDS
+SHINGLE_SIZE = 5
+
+# Estimated similarity above which two documents are reported.
+DUPLICATE_THRESHOLD = 0.6
+
+_BIN_BITS = 6  # log2(SIGNATURE_SIZE)
+_VALUE_BITS = 64 - _BIN_BITS
+_VALUE_MASK = (1 << _VALUE_BITS) - 1
+# Spreads CRC-32 values over 64 bits (Fibonacci hashing): bins are taken
+# from the high bits, which CRC alone would leave poorly mixed.
+_MIX = 0x9E3779B97F4A7C15
+_MASK_64 = (1 << 64) - 1
+
+_SKIPPED_ELEMENTS_RE = re.compile(r'<(script|style)\b.*?</\1>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]*>')
+_LATEX_COMMAND_RE = re.compile(r'\\[a-zA-Z]+\*?|\\.')
+_NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def normalize_text(text):
+    """ Plain lower-case words of an HTML/LaTeX fragment, separated by single spaces. """
+    text = _SKIPPED_ELEMENTS_RE.sub(' ', text or '')
+    text = html.unescape(_TAG_RE.sub(' ', text))
+    # \frac{a}{b}, \( x^2 \), $\alpha$ ... keep the arguments, drop the markup.
+    text = _LATEX_COMMAND_RE.sub(' ', text)
+    return _NON_WORD_RE.sub(' ', text).strip().lower()
+
+
+def _shingle_hashes(normalized):
+    if len(normalized) <= SHINGLE_SIZE:
+        shingles = {normalized}
+    else:
+        shingles = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    return [(zlib.crc32(shingle.encode('utf-8')) * _MIX) & _MASK_64 for shingle in shingles]
+
+
+def minhash(text):
+    """ MinHash signature of `text`, or None if nothing is left after normalization. """
+    normalized = normalize_text(text)
+    if not normalized:
+        return None
+    bins = [None] * SIGNATURE_SIZE
+    for value in _shingle_hashes(normalized):
+        index = value >> _VALUE_BITS
+        value &= _VALUE_MASK
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+
+    # An empty bin borrows the value of the next filled bin, shifted by the
+    # distance so that it cannot collide with a genuinely filled bin.
+    signature = list(bins)
+    nearest, distance = None, 0
+    for position in reversed(range(2 * SIGNATURE_SIZE)):
+        index = position % SIGNATURE_SIZE
+        if bins[index] is not None:
+            nearest, distance = bins[index], 0
+        else:
+            distance += 1
+            if position < SIGNATURE_SIZE and nearest is not None:
+                signature[index] = nearest + (distance << _VALUE_BITS)
+    return signature
+
+
+def minhash_documents(documents):
+    """
+    [(pk, signature)] for an iterable of (pk, text). Does not touch the
+    database, so it can run in a worker process.
+    """
+    return [(pk, minhash(text)) for pk, text in documents]
+
+
+def band_keys(signature):
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(f"{band}:{rows}".encode('ascii'), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def similarity(signature, other):
+    """ Estimated Jaccard similarity of the two documents. """
+    return sum(map(eq, signature, other)) / SIGNATURE_SIZE
+
+
+# Signatures shared with a worker process by load_signatures().
+_signatures = {}
+
+
+def load_signatures(signatures):
+    """ Process pool initializer: {key: (object_id, signature)} used by score_pairs(). """
+    _signatures.clear()
+    _signatures.update(signatures)
+
+
+def score_pairs(pairs, threshold):
+    """ [(object_id, object_id, similarity)] of the (key, key) pairs reaching `threshold`. """
+    scored = []
+    for first, second in pairs:
+        (first_id, first_signature), (second_id, second_signature) = _signatures[first], _signatures[second]
+        score = similarity(first_signature, second_signature)
+        if score >= threshold:
+            scored.append((min(first_id, second_id), max(first_id, second_id), score))
+    return scored
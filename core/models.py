@@ -2,6 +2,8 @@
 
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
 
 # --- Vos modèles existants (inchangés) ---
 
@@ -65,6 +67,81 @@ class StudySkill(models.Model):
         return f"{self.category.name} - {self.name}"
 
 
+class ContentBlob(models.Model):
+    """
+    A block payload (template name, HTML, image path) stored once and
+    addressed by the SHA-256 of its content. Revisions only reference hashes,
+    so unchanged blocks are never stored twice.
+    """
+    hash = models.CharField(max_length=64, unique=True)
+    payload = models.JSONField()
+
+    def __str__(self):
+        return self.hash[:12]
+
+class ContentRevision(models.Model):
+    """
+    One saved state of a block-based document (a Recipe or a Slideshow).
+    Snapshot revisions hold the full ordered list of block hashes; delta
+    revisions only hold what changed since the previous revision.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+
+    number = models.PositiveIntegerField(help_text="Sequential revision number for the document.")
+    is_snapshot = models.BooleanField(default=False)
+    fields = models.JSONField(default=dict, help_text="Document metadata (title, status, taxonomy ids) at this revision.")
+    data = models.JSONField(default=dict, help_text="Full block hash list (snapshot) or block changes (delta).")
+    author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='content_revisions')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['content_type', 'object_id', '-number']
+        unique_together = ('content_type', 'object_id', 'number')
+
+    def __str__(self):
+        kind = "snapshot" if self.is_snapshot else "delta"
+        return f"Revision {self.number} ({kind}) of {self.content_type.model} #{self.object_id}"
+
+
+class ContentSignature(models.Model):
+    """
+    MinHash signature of the normalized text of a flashcard or a recipe block,
+    used to find near-duplicates (see core/dedup.py).
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+
+    signature = models.JSONField(help_text="Smallest shingle hash of each bin.")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('content_type', 'object_id')
+
+    def __str__(self):
+        return f"Signature of {self.content_type.model} #{self.object_id}"
+
+
+class ContentSignatureBand(models.Model):
+    """
+    One LSH band of a signature. Documents sharing any band key are
+    candidate near-duplicates.
+    """
+    signature = models.ForeignKey(ContentSignature, on_delete=models.CASCADE, related_name='bands')
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    key = models.BigIntegerField(help_text="Hash of the band index and of its rows of the signature.")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['content_type', 'key'], name='core_signature_band_idx'),
+        ]
+
+    def __str__(self):
+        return f"Band {self.key} of {self.signature}"
+
+
 def get_initial_data_for_filters():
     """
     Fetches and structures the initial data needed for filter dropdowns
@@ -82,4 +159,37 @@ def get_initial_data_for_filters():
             'name', 'skills__id', 'skills__name'
         ))
     }
-    return data
\ No newline at end of file
+    return data
+
+def get_label_subtree_ids(label_id):
+    """
+    Returns the id of `label_id` and of all the labels below it in the topic
+    tree, with one query per level of depth.
+    """
+    ids = []
+    frontier = [label_id]
+    while frontier:
+        ids.extend(frontier)
+        frontier = list(Label.objects.filter(parent_id__in=frontier).values_list('id', flat=True))
+    return ids
+
+def get_label_ancestor_ids(label_ids):
+    """
+    Maps each of `label_ids` to the list of its own id and the ids of all
+    the labels above it, nearest first, with one query per level of depth.
+    """
+    parents = {}
+    frontier = set(label_ids)
+    while frontier:
+        found = dict(Label.objects.filter(id__in=frontier).values_list('id', 'parent_id'))
+        parents.update(found)
+        frontier = {parent_id for parent_id in found.values() if parent_id is not None and parent_id not in parents}
+
+    chains = {}
+    for label_id in label_ids:
+        chain, current = [], label_id
+        while current is not None and current in parents and current not in chain:
+            chain.append(current)
+            current = parents[current]
+        chains[label_id] = chain
+    return chains
@@ -0,0 +1,115 @@
+# core/offline_html.py
+"""
+Helpers that turn stored block HTML into markup that renders without any
+network access: local images become data URIs, LaTeX becomes MathML and
+stylesheets are read from the static files so they can be inlined.
+Used by the slideshow offline export and by thumbnail rendering.
+"""
+import base64
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+
+try:
+    from latex2mathml.converter import convert as latex_to_mathml
+except ImportError:  # Formulas are then left as TeX source.
+    latex_to_mathml = None
+
+_IMG_SRC_RE = re.compile(r'(<img\b[^>]*?\bsrc=)(["\'])(.*?)\2', re.IGNORECASE)
+
+# Display math first, so that $$...$$ is not read as two inline formulas.
+_MATH_PATTERNS = [
+    (re.compile(r'\$\$(.+?)\$\$', re.DOTALL), 'block'),
+    (re.compile(r'\\\[(.+?)\\\]', re.DOTALL), 'block'),
+    (re.compile(r'\\\((.+?)\\\)', re.DOTALL), 'inline'),
+    (re.compile(r'(?<![\\$])\$(?!\$)(.+?)(?<!\\)\$', re.DOTALL), 'inline'),
+]
+
+
+def _media_path(relative):
+    """ The file under MEDIA_ROOT at `relative`, or None if it is missing or resolves outside it. """
+    root = os.path.realpath(settings.MEDIA_ROOT)
+    try:
+        path = os.path.realpath(safe_join(root, relative))
+    except (SuspiciousFileOperation, ValueError):
+        return None
+    # realpath also follows symlinks, so a link pointing out of MEDIA_ROOT is rejected too.
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        return None
+    return path
+
+
+def _local_path_for_url(url):
+    """
+    Maps a /static/ or /media/ URL to a file on disk, or returns None. URLs
+    that would resolve outside the static or media roots (../, absolute
+    paths) are never mapped, since the file would end up in the download.
+    """
+    static_url = '/' + settings.STATIC_URL.lstrip('/')
+    if url.startswith(static_url):
+        relative = url[len(static_url):]
+        if '..' in relative.replace('\\', '/').split('/'):
+            return None
+        try:
+            return finders.find(relative)
+        except (SuspiciousFileOperation, ValueError):
+            return None
+    if url.startswith(settings.MEDIA_URL):
+        return _media_path(url[len(settings.MEDIA_URL):])
+    return None
+
+
+def _data_uri(path):
+    mime_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    with open(path, 'rb') as image_file:
+        encoded = base64.b64encode(image_file.read()).decode('ascii')
+    return f"data:{mime_type};base64,{encoded}"
+
+
+def embed_images(html, _uris=None):
+    """ Replaces local image URLs with data URIs. Remote URLs are kept. """
+    uris = {} if _uris is None else _uris
+
+    def replace(match):
+        url = match.group(3)
+        if url not in uris:
+            path = _local_path_for_url(url)
+            uris[url] = _data_uri(path) if path else url
+        return f"{match.group(1)}{match.group(2)}{uris[url]}{match.group(2)}"
+
+    return _IMG_SRC_RE.sub(replace, html)
+
+
+def render_math(html):
+    """ Converts LaTeX delimited by $, $$, \\( \\) and \\[ \\] to MathML. """
+    if latex_to_mathml is None:
+        return html
+
+    def converter(display):
+        def replace(match):
+            try:
+                return latex_to_mathml(match.group(1).strip(), display=display)
+            except Exception:
+                # Leave formulas the converter does not understand untouched.
+                return match.group(0)
+        return replace
+
+    for pattern, display in _MATH_PATTERNS:
+        html = pattern.sub(converter(display), html)
+    return html
+
+
+def inline_stylesheets(names):
+    """ Returns the concatenated content of the given static stylesheets. """
+    stylesheets = []
+    for name in names:
+        path = finders.find(name)
+        if path:
+            with open(path, encoding='utf-8') as css_file:
+                stylesheets.append(css_file.read())
+    return '\n'.join(stylesheets)
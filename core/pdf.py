@@ -0,0 +1,84 @@
+# core/pdf.py
+"""
+HTML to PDF through a reused headless browser page.
+
+Launching Chromium costs far more than printing a page, so the renderer
+keeps one browser and one page open for the life of the process. pyppeteer
+is asyncio-based while requests are served from many threads: the browser
+lives on a dedicated event-loop thread and render_pdf() submits work to it,
+one document at a time.
+"""
+import asyncio
+import threading
+
+try:
+    from pyppeteer import launch
+except ImportError:  # PDF export is unavailable without pyppeteer.
+    launch = None
+
+# Seconds a single document may take before the request gives up.
+RENDER_TIMEOUT = 120
+
+
+class PdfUnavailable(Exception):
+    """ Raised when no headless browser can be used to print PDFs. """
+
+
+class PdfRenderer:
+    """ Owns one headless browser page on a background event loop. """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._browser = None
+        self._page = None
+
+    def _ensure_loop(self):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, name='pdf-renderer', daemon=True).start()
+        return self._loop
+
+    async def _ensure_page(self):
+        if self._page is None:
+            self._browser = await launch(headless=True, handleSIGINT=False, handleSIGTERM=False, handleSIGHUP=False)
+            self._page = await self._browser.newPage()
+        return self._page
+
+    async def _render(self, html, options):
+        page = await self._ensure_page()
+        await page.setContent(html)
+        # Give web fonts and embedded images a chance to finish loading.
+        await page.evaluate('() => document.fonts ? document.fonts.ready.then(() => true) : true')
+        return await page.pdf(options)
+
+    async def _close(self):
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+        self._browser = None
+        self._page = None
+
+    def render(self, html, **options):
+        """ Prints `html` to PDF bytes; `options` are passed to page.pdf(). """
+        if launch is None:
+            raise PdfUnavailable("pyppeteer is required to export PDFs.")
+        with self._lock:
+            loop = self._ensure_loop()
+            future = asyncio.run_coroutine_threadsafe(self._render(html, options), loop)
+            try:
+                return future.result(timeout=RENDER_TIMEOUT)
+            except Exception:
+                # A crashed or stuck browser is relaunched for the next document.
+                future.cancel()
+                asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout=RENDER_TIMEOUT)
+                raise
+
+
+_renderer = PdfRenderer()
+
+
+def render_pdf(html, **options):
+    return _renderer.render(html, **options)
@@ -0,0 +1,230 @@
+# core/revisions.py
+"""
+Revision history for block-based documents (recipes and slideshows).
+
+Every save records a ContentRevision. Block payloads are stored once in
+ContentBlob, addressed by their content hash, and a revision only lists
+hashes: a full ordered list every SNAPSHOT_INTERVAL revisions, and a small
+delta (changed / moved / removed blocks) in between. Storage therefore grows
+with the size of the edits rather than with the size of the document.
+"""
+import hashlib
+import json
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from .dedup import index_documents, remove_documents
+from .models import ContentBlob, ContentRevision
+
+# A full snapshot is written every N revisions so that rebuilding any
+# revision never has to replay more than N deltas.
+SNAPSHOT_INTERVAL = 20
+
+# Number of most recent revisions kept per document by compact_revisions().
+KEEP_REVISIONS = 100
+
+# Document fields captured with every revision (shared by Recipe and Slide).
+TRACKED_FIELDS = ('title', 'subject_id', 'topic_id', 'language_id', 'curriculum_id', 'status')
+
+
+def _block_payload(block):
+    payload = {
+        'template_name': block.template_name,
+        'content_html': block.content_html,
+    }
+    # Recipe blocks can carry an uploaded image; slide blocks cannot.
+    if hasattr(block, 'image'):
+        payload['image'] = block.image.name if block.image else None
+    return payload
+
+
+def _hash_payload(payload):
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _store_blobs(payloads_by_hash):
+    """ Inserts the payloads whose hash is not stored yet, in a single query. """
+    if not payloads_by_hash:
+        return
+    existing = set(
+        ContentBlob.objects.filter(hash__in=list(payloads_by_hash)).values_list('hash', flat=True)
+    )
+    missing = [
+        ContentBlob(hash=h, payload=p) for h, p in payloads_by_hash.items() if h not in existing
+    ]
+    ContentBlob.objects.bulk_create(missing, ignore_conflicts=True)
+
+
+def _compute_delta(previous, current):
+    """
+    Describes how to turn the `previous` hash list into `current`.
+    - changed: [index, hash] for blocks whose content is new
+    - moved:   [index, previous_index] for existing blocks at a new position
+    - removed: hashes that no longer appear in the document
+    Positions that did not change are omitted.
+    """
+    previous_positions = {}
+    for index, block_hash in enumerate(previous):
+        previous_positions.setdefault(block_hash, index)
+
+    changed, moved = [], []
+    for index, block_hash in enumerate(current):
+        if index < len(previous) and previous[index] == block_hash:
+            continue
+        if block_hash in previous_positions:
+            moved.append([index, previous_positions[block_hash]])
+        else:
+            changed.append([index, block_hash])
+
+    current_set = set(current)
+    removed = sorted({h for h in previous if h not in current_set})
+    return {'length': len(current), 'changed': changed, 'moved': moved, 'removed': removed}
+
+
+def _apply_delta(previous, delta):
+    hashes = [previous[i] if i < len(previous) else None for i in range(delta['length'])]
+    for index, previous_index in delta.get('moved', []):
+        hashes[index] = previous[previous_index]
+    for index, block_hash in delta.get('changed', []):
+        hashes[index] = block_hash
+    return hashes
+
+
+def _revisions_for(instance):
+    content_type = ContentType.objects.get_for_model(instance)
+    return ContentRevision.objects.filter(content_type=content_type, object_id=instance.pk)
+
+
+def _rebuild_hashes(instance, number):
+    """ Replays deltas from the nearest snapshot at or before `number`. """
+    revisions = _revisions_for(instance)
+    snapshot = revisions.filter(is_snapshot=True, number__lte=number).order_by('-number').first()
+    if snapshot is None:
+        raise ContentRevision.DoesNotExist(f"No snapshot found before revision {number}.")
+
+    hashes = list(snapshot.data['blocks'])
+    deltas = revisions.filter(number__gt=snapshot.number, number__lte=number).order_by('number')
+    for revision in deltas.only('data'):
+        hashes = _apply_delta(hashes, revision.data)
+    return hashes
+
+
+def list_revisions(instance):
+    """ Returns the revisions of a document, newest first. """
+    return _revisions_for(instance).select_related('author').order_by('-number')
+
+
+def record_revision(instance, author=None):
+    """
+    Records the current state of `instance` and its blocks as a new revision.
+    Returns None when nothing changed since the latest revision.
+    """
+    blocks = list(instance.blocks.order_by('order'))
+    payloads = {}
+    hashes = []
+    for block in blocks:
+        payload = _block_payload(block)
+        block_hash = _hash_payload(payload)
+        payloads[block_hash] = payload
+        hashes.append(block_hash)
+    fields = {name: getattr(instance, name) for name in TRACKED_FIELDS}
+
+    with transaction.atomic():
+        latest = _revisions_for(instance).order_by('-number').first()
+        if latest is None:
+            number, is_snapshot, data = 1, True, {'blocks': hashes}
+        else:
+            previous = latest.data['blocks'] if latest.is_snapshot else _rebuild_hashes(instance, latest.number)
+            if previous == hashes and latest.fields == fields:
+                return None
+            number = latest.number + 1
+            is_snapshot = (number - 1) % SNAPSHOT_INTERVAL == 0
+            data = {'blocks': hashes} if is_snapshot else _compute_delta(previous, hashes)
+
+        # Only blocks that are new to this revision need to be stored.
+        if is_snapshot:
+            _store_blobs(payloads)
+        else:
+            _store_blobs({h: payloads[h] for _, h in data['changed']})
+
+        return ContentRevision.objects.create(
+            content_type=ContentType.objects.get_for_model(instance),
+            object_id=instance.pk,
+            number=number,
+            is_snapshot=is_snapshot,
+            fields=fields,
+            data=data,
+            author=author,
+        )
+
+
+def restore_revision(instance, number, author=None):
+    """
+    Rewrites `instance` and its blocks to the state of revision `number`.
+    The restore itself is recorded as a new revision, so it can be undone.
+    """
+    revision = _revisions_for(instance).get(number=number)
+    hashes = _rebuild_hashes(instance, number)
+    payloads = dict(ContentBlob.objects.filter(hash__in=set(hashes)).values_list('hash', 'payload'))
+
+    block_model = instance.blocks.model
+    parent_field = instance.blocks.field.name
+
+    with transaction.atomic():
+        for name, value in revision.fields.items():
+            setattr(instance, name, value)
+        instance.save()
+
+        # Blocks with a dedup_text (recipe blocks) are in the near-duplicate
+        # index, which has to follow the replacement.
+        indexed = hasattr(block_model, 'dedup_text')
+        if indexed:
+            remove_documents(block_model, instance.blocks.values_list('pk', flat=True))
+        instance.blocks.all().delete()
+        block_model.objects.bulk_create([
+            block_model(**{parent_field: instance, 'order': order, **payloads[block_hash]})
+            for order, block_hash in enumerate(hashes)
+        ])
+        if indexed:
+            index_documents(block_model, [(block.pk, block.dedup_text) for block in instance.blocks.all()])
+        return record_revision(instance, author=author)
+
+
+def compact_revisions(instance, keep=KEEP_REVISIONS):
+    """
+    Drops all but the `keep` most recent revisions of a document. The oldest
+    kept revision is rewritten as a snapshot so the chain stays restorable.
+    Returns the number of deleted revisions.
+    """
+    revisions = _revisions_for(instance).order_by('-number')
+    oldest_kept = revisions[keep - 1:keep].first()
+    if oldest_kept is None:
+        return 0
+
+    with transaction.atomic():
+        if not oldest_kept.is_snapshot:
+            oldest_kept.data = {'blocks': _rebuild_hashes(instance, oldest_kept.number)}
+            oldest_kept.is_snapshot = True
+            oldest_kept.save(update_fields=['data', 'is_snapshot'])
+        deleted, _ = revisions.filter(number__lt=oldest_kept.number).delete()
+    return deleted
+
+
+def purge_orphan_blobs(batch_size=500):
+    """ Deletes blobs no longer referenced by any revision. Returns the count. """
+    referenced = set()
+    for is_snapshot, data in ContentRevision.objects.values_list('is_snapshot', 'data').iterator():
+        if is_snapshot:
+            referenced.update(data['blocks'])
+        else:
+            referenced.update(block_hash for _, block_hash in data['changed'])
+
+    orphan_ids = [
+        blob_id for blob_id, blob_hash in ContentBlob.objects.values_list('id', 'hash').iterator()
+        if blob_hash not in referenced
+    ]
+    for start in range(0, len(orphan_ids), batch_size):
+        ContentBlob.objects.filter(id__in=orphan_ids[start:start + batch_size]).delete()
+    return len(orphan_ids)
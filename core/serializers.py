@@ -2,7 +2,7 @@
 
 from rest_framework import serializers
 # MODIFIED: Removed 'Slide' and 'SlideBlock' from this import
-from .models import Curriculum, Language, Subject, Label, StudySkill, StudySkillCategory
+from .models import Curriculum, Language, Subject, Label, StudySkill, StudySkillCategory, ContentRevision
 
 class CurriculumSerializer(serializers.ModelSerializer):
     class Meta:
@@ -42,4 +42,11 @@ class StudySkillCategorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = StudySkillCategory
-        fields = ['id', 'name', 'description', 'order', 'skills']
\ No newline at end of file
+        fields = ['id', 'name', 'description', 'order', 'skills']
+
+class ContentRevisionSerializer(serializers.ModelSerializer):
+    author_name = serializers.CharField(source='author.username', read_only=True, allow_null=True)
+
+    class Meta:
+        model = ContentRevision
+        fields = ['number', 'is_snapshot', 'fields', 'author_name', 'created_at']
@@ -0,0 +1,80 @@
+# core/streaming.py
+"""
+Helpers for importing large files without loading them whole.
+
+iter_json_array() yields the items of a top-level JSON array one at a time,
+reading the file in fixed-size chunks, so memory use is bounded by the
+largest single item rather than by the size of the archive.
+"""
+import json
+from itertools import islice
+
+JSON_CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = ' \t\r\n'
+
+
+def iter_json_array(fileobj, chunk_size=JSON_CHUNK_SIZE):
+    """ Yields the items of the JSON array read from the text file `fileobj`. """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    started = False
+    expect_separator = False
+
+    while True:
+        while position < len(buffer) and buffer[position] in _WHITESPACE:
+            position += 1
+        if position == len(buffer):
+            if eof:
+                raise ValueError("Unexpected end of file: the JSON array is not closed.")
+            chunk = fileobj.read(chunk_size)
+            eof = not chunk
+            # Drop what was already consumed so the buffer stays small.
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+
+        char = buffer[position]
+        if not started:
+            if char != '[':
+                raise ValueError("The file does not contain a JSON array.")
+            started = True
+            position += 1
+            continue
+        if char == ']':
+            return
+        if expect_separator:
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' in the JSON array, got {char!r}.")
+            expect_separator = False
+            position += 1
+            continue
+
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            item, end = None, None
+        # An item touching the end of the buffer may continue in the next
+        # chunk (e.g. a number cut in two), so it is only trusted at EOF.
+        if end is None or (end == len(buffer) and not eof):
+            if eof:
+                raise ValueError("Invalid JSON item in the array.")
+            chunk = fileobj.read(chunk_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+
+        yield item
+        position = end
+        expect_separator = True
+
+
+def batched(iterable, size):
+    """ Yields lists of at most `size` items from `iterable`. """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
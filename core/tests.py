@@ -1,3 +1,223 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe, RecipeBlock
+from slides.models import Slide, SlideBlock
+
+from .dedup import find_near_duplicates, index_documents
+from .minhash import DUPLICATE_THRESHOLD, minhash, normalize_text, similarity
+from .models import ContentBlob, ContentRevision, ContentSignature
+from .offline_html import embed_images
+from .revisions import compact_revisions, list_revisions, purge_orphan_blobs, record_revision, restore_revision
+from .thumbnails import build_thumbnail_page
+
+
+class EmbedImagesPathTests(SimpleTestCase):
+    """ Only files inside the media and static roots may be embedded. """
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base)
+        self.media_root = os.path.join(self.base, 'media')
+        os.makedirs(self.media_root)
+        with open(os.path.join(self.media_root, 'pixel.png'), 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n')
+        with open(os.path.join(self.base, 'secret.txt'), 'w') as f:
+            f.write('SECRET')
+        override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_URL='/media/')
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_media_file_is_embedded(self):
+        html = embed_images('<img src="/media/pixel.png">')
+        self.assertIn('src="data:image/png;base64,', html)
+
+    def test_parent_directory_is_not_embedded(self):
+        html = '<img src="/media/../secret.txt">'
+        self.assertEqual(embed_images(html), html)
+
+    def test_absolute_path_is_not_embedded(self):
+        html = f'<img src="/media/{self.base}/secret.txt">'
+        self.assertEqual(embed_images(html), html)
+
+    def test_symlink_out_of_media_root_is_not_embedded(self):
+        os.symlink(os.path.join(self.base, 'secret.txt'), os.path.join(self.media_root, 'link.txt'))
+        html = '<img src="/media/link.txt">'
+        self.assertEqual(embed_images(html), html)
+
+    def test_static_parent_directory_is_not_embedded(self):
+        html = '<img src="/static/../central/settings.py">'
+        self.assertEqual(embed_images(html), html)
+
+
+class ThumbnailPageTests(TestCase):
+
+    def test_media_url_outside_media_root_is_not_embedded(self):
+        slide = Slide.objects.create(title='Deck')
+        SlideBlock.objects.create(slide=slide, order=0, template_name='text', content_html='<img src="/media/../central/settings.py">')
+        page = build_thumbnail_page(slide)
+        self.assertIn('src="/media/../central/settings.py"', page)
+        self.assertNotIn('base64,', page)
+
+
+class RevisionTests(TestCase):
+    # (title, block texts) of each revision: deletions, a reorder with an
+    # insertion, a title-only change, then a full rewrite.
+    HISTORY = [
+        ("Deck", ["A", "B", "C"]),
+        ("Deck", ["A", "C"]),
+        ("Deck", ["C", "A", "D"]),
+        ("Renamed deck", ["C", "A", "D"]),
+        ("Renamed deck", ["E"]),
+    ]
+
+    def setUp(self):
+        self.author = get_user_model().objects.create_user('author', password='x')
+        self.slide = Slide.objects.create(title="Deck", author=self.author)
+        # A snapshot every 3 revisions, so that the history mixes both kinds.
+        with mock.patch('core.revisions.SNAPSHOT_INTERVAL', 3):
+            for title, texts in self.HISTORY:
+                self.edit(title, texts)
+                record_revision(self.slide, author=self.author)
+
+    def edit(self, title, texts):
+        self.slide.title = title
+        self.slide.save()
+        self.slide.blocks.all().delete()
+        SlideBlock.objects.bulk_create([
+            SlideBlock(slide=self.slide, order=order, template_name='text', content_html=f"<p>{text}</p>")
+            for order, text in enumerate(texts)
+        ])
+
+    def state(self):
+        self.slide.refresh_from_db()
+        return (self.slide.title, [block.content_html[3:-4] for block in self.slide.blocks.order_by('order')])
+
+    def test_snapshots_and_deltas_restore_every_revision(self):
+        self.assertEqual(
+            [(revision.number, revision.is_snapshot) for revision in list_revisions(self.slide)],
+            [(5, False), (4, True), (3, False), (2, False), (1, True)],
+        )
+        for number, expected in enumerate(self.HISTORY, start=1):
+            restore_revision(self.slide, number)
+            self.assertEqual(self.state(), expected)
+
+    def test_unchanged_document_records_nothing(self):
+        self.assertIsNone(record_revision(self.slide))
+        restored = restore_revision(self.slide, 3, author=self.author)
+        self.assertEqual((restored.number, restored.author), (6, self.author))
+
+    def test_compacted_history_stays_restorable(self):
+        self.assertEqual(compact_revisions(self.slide, keep=3), 2)
+        self.assertEqual([revision.number for revision in list_revisions(self.slide)], [5, 4, 3])
+        self.assertTrue(list_revisions(self.slide).get(number=3).is_snapshot)
+        # Only the blob of "B" was left unreferenced.
+        self.assertEqual(purge_orphan_blobs(), 1)
+        restore_revision(self.slide, 3)
+        self.assertEqual(self.state(), self.HISTORY[2])
+
+    def test_compact_revisions_command(self):
+        orphan = Slide.objects.create(title="Deleted deck")
+        record_revision(orphan)
+        orphan.delete()
+        out = io.StringIO()
+        call_command('compact_revisions', keep=1, stdout=out)
+        self.assertIn("Deleted 5 revision(s)", out.getvalue())
+        self.assertEqual([revision.number for revision in list_revisions(self.slide)], [5])
+        self.assertEqual(ContentRevision.objects.count(), 1)
+        self.assertEqual(ContentBlob.objects.count(), 1)
+
+    def test_revision_endpoints(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.get(reverse('slideshow-revisions', args=[self.slide.pk]))
+        self.assertEqual([revision['number'] for revision in response.json()], [5, 4, 3, 2, 1])
+        self.assertEqual(response.json()[0]['author_name'], 'author')
+
+        restore_url = reverse('slideshow-restore-revision', kwargs={'pk': self.slide.pk, 'number': 2})
+        client.force_authenticate(get_user_model().objects.create_user('other', password='x'))
+        self.assertEqual(client.post(restore_url).status_code, 403)
+        client.force_authenticate(self.author)
+        self.assertEqual(client.post(reverse('slideshow-restore-revision', kwargs={'pk': self.slide.pk, 'number': 9})).status_code, 404)
+        response = client.post(restore_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], "Deck")
+        self.assertEqual(self.state(), self.HISTORY[1])
+
+
+class RestoreRevisionIndexTests(TestCase):
+
+    def test_restored_recipe_blocks_replace_the_old_ones_in_the_index(self):
+        original = "Photosynthesis turns light energy, water and carbon dioxide into glucose and oxygen inside the chloroplasts."
+        edited = "The French Revolution began in 1789 with the storming of the Bastille and ended the absolute monarchy."
+        recipe = Recipe.objects.create(title="Test Revisions Recipe")
+        block = RecipeBlock.objects.create(recipe=recipe, order=0, template_name='text', content_html=original)
+        index_documents(RecipeBlock, [(block.pk, block.dedup_text)])
+        record_revision(recipe)
+        block.content_html = edited
+        block.save()
+        index_documents(RecipeBlock, [(block.pk, block.dedup_text)])
+        record_revision(recipe)
+
+        restore_revision(recipe, 1)
+
+        restored = recipe.blocks.get()
+        self.assertEqual(restored.content_html, original)
+        self.assertFalse(ContentSignature.objects.filter(object_id=block.pk).exists())
+        self.assertEqual([pk for pk, _ in find_near_duplicates(RecipeBlock, original)], [restored.pk])
+        self.assertEqual(find_near_duplicates(RecipeBlock, edited), [])
+
+
+PHOTOSYNTHESIS = "Photosynthesis turns light energy, water and carbon dioxide into glucose and oxygen inside the chloroplasts of plant cells."
+REVOLUTION = "The French Revolution began in 1789 with the storming of the Bastille and ended the absolute monarchy of Louis XVI."
+
+
+class MinHashTests(SimpleTestCase):
+
+    def test_normalize_text_drops_markup(self):
+        self.assertEqual(
+            normalize_text("<p>Solve \\(x^2 = 4\\) &amp; <b>CHECK</b>!</p><script>alert(1)</script>"),
+            "solve x 2 4 check",
+        )
+        self.assertEqual(normalize_text(None), "")
+
+    def test_texts_without_words_have_no_signature(self):
+        self.assertIsNone(minhash("<p> &nbsp;! </p>"))
+
+    def test_near_texts_are_similar_and_far_texts_are_not(self):
+        near = PHOTOSYNTHESIS.replace("plant cells", "plant leaf cells")
+        self.assertGreaterEqual(similarity(minhash(PHOTOSYNTHESIS), minhash(near)), DUPLICATE_THRESHOLD)
+        self.assertEqual(similarity(minhash(f"<b>{PHOTOSYNTHESIS.upper()}</b>"), minhash(PHOTOSYNTHESIS)), 1)
+        self.assertLess(similarity(minhash(PHOTOSYNTHESIS), minhash(REVOLUTION)), DUPLICATE_THRESHOLD)
+
+
+class RecipeDuplicateCheckTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user('writer', password='x'))
+        self.recipe = Recipe.objects.create(title="Test Duplicates Recipe")
+        self.block = RecipeBlock.objects.create(recipe=self.recipe, order=0, template_name='text', content_html=PHOTOSYNTHESIS)
+        index_documents(RecipeBlock, [(self.block.pk, self.block.dedup_text)])
+
+    def check(self, content_html, **data):
+        response = self.client.post(reverse('recipe-check-duplicates'), {'content_html': content_html, **data}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['duplicates']
+
+    def test_similar_blocks_of_other_recipes_are_reported(self):
+        [duplicate] = self.check(f"<p>{PHOTOSYNTHESIS}</p>")
+        self.assertEqual((duplicate['block'], duplicate['recipe']), (self.block.pk, self.recipe.pk))
+        self.assertEqual(self.check(REVOLUTION), [])
+
+    def test_blocks_of_the_recipe_being_edited_are_ignored(self):
+        self.assertEqual(self.check(PHOTOSYNTHESIS, recipe=self.recipe.pk), [])
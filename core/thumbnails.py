@@ -0,0 +1,212 @@
+# core/thumbnails.py
+"""
+Background thumbnail rendering for slideshows and recipes.
+
+When a document is saved, schedule_thumbnail() queues it for a single
+background thread. That thread keeps one headless Chromium (pyppeteer) and
+one page open for the life of the process, renders the first block of each
+queued document at 1280x720, and stores a small WebP next to the document,
+named after its updated_at. Documents whose thumbnail already matches their
+updated_at are skipped, and a document saved several times while waiting in
+the queue is rendered once.
+"""
+import asyncio
+import io
+import logging
+import queue
+import threading
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from PIL import Image
+
+from .offline_html import embed_images, inline_stylesheets, render_math
+
+try:
+    from pyppeteer import launch
+except ImportError:  # Thumbnails are simply not rendered without pyppeteer.
+    launch = None
+
+logger = logging.getLogger(__name__)
+
+VIEWPORT = {'width': 1280, 'height': 720}
+THUMBNAIL_SIZE = (320, 180)
+THUMBNAIL_QUALITY = 80
+
+# Documents that get thumbnails, with the stylesheets their blocks rely on.
+THUMBNAIL_SOURCES = {
+    'slides.slide': ['css/slide_styles.css'],
+    'recipes.recipe': ['css/creator.css'],
+}
+
+_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="UTF-8"><style>
+html, body {{ margin: 0; width: 100%; height: 100%; background: #fdfdfa; overflow: hidden; }}
+body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif; }}
+img {{ max-width: 100%; }}
+{css}
+</style></head><body>{content}</body></html>"""
+
+
+def _label(instance):
+    return instance._meta.label_lower
+
+
+def build_thumbnail_page(instance):
+    """ Returns a standalone HTML page showing the first block of `instance`. """
+    first_block = instance.blocks.order_by('order').first()
+    content = render_math(embed_images(first_block.content_html)) if first_block else ''
+    css = inline_stylesheets(THUMBNAIL_SOURCES[_label(instance)])
+    return _PAGE_TEMPLATE.format(css=css, content=content)
+
+
+def _to_webp(png_bytes):
+    image = Image.open(io.BytesIO(png_bytes)).convert('RGB')
+    image.thumbnail(THUMBNAIL_SIZE)
+    output = io.BytesIO()
+    image.save(output, format='WEBP', quality=THUMBNAIL_QUALITY)
+    return output.getvalue()
+
+
+def needs_thumbnail(instance):
+    return not instance.thumbnail or instance.thumbnail_source_updated_at != instance.updated_at
+
+
+async def _render(page, instance):
+    await page.setContent(build_thumbnail_page(instance))
+    return _to_webp(await page.screenshot({'type': 'png'}))
+
+
+def _store(instance, webp_bytes):
+    """
+    Saves the thumbnail file and records it with a queryset update, so that
+    updated_at (auto_now) is not bumped. If the document changed while it was
+    being rendered the new file is discarded: a newer job is already queued.
+    """
+    model = type(instance)
+    old_name = instance.thumbnail.name if instance.thumbnail else None
+    field = instance.thumbnail
+    field.save(f"{instance.pk}-{int(instance.updated_at.timestamp())}.webp", ContentFile(webp_bytes), save=False)
+
+    updated = model.objects.filter(pk=instance.pk, updated_at=instance.updated_at).update(
+        thumbnail=field.name, thumbnail_source_updated_at=instance.updated_at,
+    )
+    storage = field.storage
+    if not updated:
+        storage.delete(field.name)
+    elif old_name and old_name != field.name:
+        storage.delete(old_name)
+
+
+class ThumbnailRenderer:
+    """ Owns one headless browser and page, reused for every thumbnail. """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.browser = None
+        self.page = None
+
+    def _ensure_page(self):
+        if self.page is None:
+            self.browser = self.loop.run_until_complete(launch(
+                headless=True, handleSIGINT=False, handleSIGTERM=False, handleSIGHUP=False,
+            ))
+            self.page = self.loop.run_until_complete(self.browser.newPage())
+            self.loop.run_until_complete(self.page.setViewport(VIEWPORT))
+        return self.page
+
+    def render(self, instance):
+        """ Renders and stores the thumbnail of `instance` if it is out of date. """
+        if not needs_thumbnail(instance):
+            return False
+        try:
+            webp_bytes = self.loop.run_until_complete(_render(self._ensure_page(), instance))
+        except Exception:
+            # A crashed browser is relaunched for the next document.
+            self.close()
+            raise
+        _store(instance, webp_bytes)
+        return True
+
+    def close(self):
+        if self.browser is not None:
+            try:
+                self.loop.run_until_complete(self.browser.close())
+            except Exception:
+                pass
+        self.browser = None
+        self.page = None
+
+
+class ThumbnailWorker:
+    """ A daemon thread draining a queue of (model label, pk) jobs. """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, label, pk):
+        with self._lock:
+            if (label, pk) in self._pending:
+                return
+            self._pending.add((label, pk))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='thumbnail-worker', daemon=True)
+                self._thread.start()
+        self._queue.put((label, pk))
+
+    def _run(self):
+        renderer = ThumbnailRenderer()
+        while True:
+            label, pk = self._queue.get()
+            with self._lock:
+                self._pending.discard((label, pk))
+            close_old_connections()
+            try:
+                instance = apps.get_model(label).objects.filter(pk=pk).first()
+                if instance is not None:
+                    renderer.render(instance)
+            except Exception:
+                logger.exception("Thumbnail rendering failed for %s #%s", label, pk)
+            finally:
+                close_old_connections()
+
+
+_worker = ThumbnailWorker()
+
+
+def schedule_thumbnail(instance):
+    """ Queues `instance` for background rendering once the transaction commits. """
+    if launch is None:
+        return
+    label, pk = _label(instance), instance.pk
+    transaction.on_commit(lambda: _worker.submit(label, pk))
+
+
+def render_pending_thumbnails(labels=None):
+    """
+    Synchronously renders every out-of-date thumbnail with a single browser.
+    Returns the number of thumbnails rendered.
+    """
+    if launch is None:
+        raise RuntimeError("pyppeteer is required to render thumbnails.")
+    renderer = ThumbnailRenderer()
+    rendered = 0
+    try:
+        for label in labels or THUMBNAIL_SOURCES:
+            model = apps.get_model(label)
+            stale = model.objects.filter(
+                Q(thumbnail_source_updated_at__isnull=True) | ~Q(thumbnail_source_updated_at=F('updated_at'))
+            )
+            for instance in stale.iterator():
+                try:
+                    rendered += renderer.render(instance)
+                except Exception:
+                    logger.exception("Thumbnail rendering failed for %s #%s", label, instance.pk)
+    finally:
+        renderer.close()
+    return rendered
@@ -1,6 +1,10 @@
-from rest_framework import viewsets, permissions
-from .models import Curriculum, Language, Subject, Label
-from .serializers import CurriculumSerializer, LanguageSerializer, SubjectSerializer, LabelSerializer
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .models import Curriculum, Language, Subject, Label, ContentRevision
+from .serializers import CurriculumSerializer, LanguageSerializer, SubjectSerializer, LabelSerializer, ContentRevisionSerializer
+from .revisions import list_revisions, restore_revision
+from .thumbnails import schedule_thumbnail
 
 # On utilise des ViewSets en lecture seule car ces données sont généralement
 # gérées via l'interface d'administration Django.
@@ -26,4 +30,32 @@ class LabelViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Label.objects.all()
     serializer_class = LabelSerializer
     permission_classes = [permissions.IsAuthenticated]
-    # filterset_fields = ['subject']
\ No newline at end of file
+    # filterset_fields = ['subject']
+
+
+class RevisionHistoryMixin:
+    """
+    Adds revision history endpoints to a ViewSet of block-based documents:
+      GET  {detail}/revisions/                   -> list of revisions, newest first
+      POST {detail}/revisions/{number}/restore/  -> restore the document to that revision
+    The ViewSet's retrieve serializer is used for the restored document.
+    """
+
+    @action(detail=True, methods=['get'])
+    def revisions(self, request, pk=None):
+        instance = self.get_object()
+        serializer = ContentRevisionSerializer(list_revisions(instance), many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['post'], url_path=r'revisions/(?P<number>[0-9]+)/restore')
+    def restore_revision(self, request, pk=None, number=None):
+        instance = self.get_object()
+        if instance.author != request.user and not request.user.is_staff:
+            return Response({"detail": "You do not have permission to restore this document."}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            restore_revision(instance, int(number), author=request.user)
+        except ContentRevision.DoesNotExist:
+            return Response({"detail": f"Revision {number} not found."}, status=status.HTTP_404_NOT_FOUND)
+        instance.refresh_from_db()
+        schedule_thumbnail(instance)
+        return Response(self.get_serializer(instance).data)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Flashcard
+from .models import CardState, DeckBundle, Flashcard, ReviewEvent, SkillMastery, TopicMastery
 
 @admin.register(Flashcard)
 class FlashcardAdmin(admin.ModelAdmin):
@@ -9,3 +9,31 @@ class FlashcardAdmin(admin.ModelAdmin):
     
     # Use filter_horizontal for a better ManyToManyField user experience in the admin
     filter_horizontal = ('study_skills',)
+
+@admin.register(CardState)
+class CardStateAdmin(admin.ModelAdmin):
+    list_display = ('user', 'flashcard', 'due', 'interval_days', 'ease', 'lapses')
+    list_filter = ('user',)
+    raw_id_fields = ('user', 'flashcard')
+
+@admin.register(ReviewEvent)
+class ReviewEventAdmin(admin.ModelAdmin):
+    list_display = ('user', 'flashcard', 'grade', 'latency_ms', 'reviewed_at')
+    list_filter = ('grade',)
+    raw_id_fields = ('user', 'flashcard')
+
+@admin.register(DeckBundle)
+class DeckBundleAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'created_at', 'last_used_at')
+    readonly_fields = ('hash', 'manifest', 'created_at', 'last_used_at')
+
+@admin.register(TopicMastery)
+class TopicMasteryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'topic', 'cards_seen', 'reviews', 'retention', 'last_reviewed_at')
+    raw_id_fields = ('user', 'topic')
+
+@admin.register(SkillMastery)
+class SkillMasteryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'study_skill', 'cards_seen', 'reviews', 'retention', 'last_reviewed_at')
+    list_filter = ('study_skill',)
+    raw_id_fields = ('user',)
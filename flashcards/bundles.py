@@ -0,0 +1,118 @@
+# flashcards/bundles.py
+"""
+Offline deck bundles.
+
+A deck (the cards of a subject or topic) is sent as one compact JSON
+document: a list of field names and one array per card. Each card row is
+hashed, and the bundle hash is computed from the (card id, row hash) list,
+so it changes whenever a card of the deck is added, edited or removed.
+
+The card list behind every hash handed out is kept in DeckBundle. A client
+holding a bundle asks for the delta since its hash and receives only the
+changed rows and the removed ids, then stores the new hash. Unknown or
+pruned hashes get no delta: the client downloads the full bundle again.
+"""
+import gzip
+import hashlib
+import json
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import DeckBundle, Flashcard
+
+# Bump when BUNDLE_FIELDS or the row format change, so clients refetch.
+BUNDLE_FORMAT_VERSION = 1
+
+BUNDLE_FIELDS = ['id', 'question', 'answer', 'subject', 'topic', 'study_skills', 'status', 'author', 'updated_at']
+
+# Bundles not synced from for this long are deleted by prune_bundles().
+BUNDLE_RETENTION = timedelta(days=90)
+
+# Responses smaller than this are not worth compressing.
+GZIP_MIN_SIZE = 1024
+
+
+def deck_rows(queryset):
+    """ {card id: row} for the cards of `queryset`, in two queries. """
+    cards = queryset.order_by().values_list(
+        'id', 'question', 'answer', 'subject_id', 'topic_id', 'status', 'author__username', 'updated_at',
+    )
+    rows = {}
+    for card_id, question, answer, subject_id, topic_id, card_status, author, updated_at in cards:
+        rows[card_id] = [card_id, question, answer, subject_id, topic_id, [], card_status, author, updated_at.isoformat()]
+
+    through = Flashcard.study_skills.through
+    links = through.objects.filter(flashcard_id__in=queryset.order_by().values('id')).order_by('studyskill_id')
+    for card_id, skill_id in links.values_list('flashcard_id', 'studyskill_id'):
+        if card_id in rows:
+            rows[card_id][5].append(skill_id)
+    return rows
+
+
+def _row_hash(row):
+    encoded = json.dumps(row, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def _bundle_hash(manifest):
+    digest = hashlib.sha256(f"v{BUNDLE_FORMAT_VERSION}".encode('ascii'))
+    for card_id in sorted(manifest, key=int):
+        digest.update(f"|{card_id}:{manifest[card_id]}".encode('ascii'))
+    return digest.hexdigest()
+
+
+def _remember(manifest):
+    """ Stores the manifest under its hash (once) and returns the hash. """
+    bundle_hash = _bundle_hash(manifest)
+    updated = DeckBundle.objects.filter(hash=bundle_hash).update(last_used_at=timezone.now())
+    if not updated:
+        DeckBundle.objects.bulk_create([DeckBundle(hash=bundle_hash, manifest=manifest)], ignore_conflicts=True)
+    return bundle_hash
+
+
+def build_bundle(queryset):
+    """ The full bundle of the cards of `queryset`. """
+    rows = deck_rows(queryset)
+    manifest = {str(card_id): _row_hash(row) for card_id, row in rows.items()}
+    return {
+        'hash': _remember(manifest),
+        'fields': BUNDLE_FIELDS,
+        'cards': [rows[card_id] for card_id in sorted(rows)],
+    }
+
+
+def build_delta(queryset, since):
+    """
+    The changes to the cards of `queryset` since the bundle `since`, or None
+    if that bundle is unknown.
+    """
+    previous = DeckBundle.objects.filter(hash=since).values_list('manifest', flat=True).first()
+    if previous is None:
+        return None
+    rows = deck_rows(queryset)
+    manifest = {str(card_id): _row_hash(row) for card_id, row in rows.items()}
+    bundle_hash = _remember(manifest)
+    return {
+        'hash': bundle_hash,
+        'since': since,
+        'fields': BUNDLE_FIELDS,
+        'changed': [
+            rows[card_id] for card_id in sorted(rows)
+            if previous.get(str(card_id)) != manifest[str(card_id)]
+        ],
+        'removed': sorted(int(card_id) for card_id in previous if card_id not in manifest),
+    }
+
+
+def encode_bundle(payload, accept_encoding=''):
+    """ (body, content encoding) of a bundle or delta, gzipped when the client accepts it. """
+    body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    if len(body) >= GZIP_MIN_SIZE and 'gzip' in accept_encoding:
+        return gzip.compress(body, mtime=0), 'gzip'
+    return body, None
+
+
+def prune_bundles(retention=BUNDLE_RETENTION):
+    deleted, _ = DeckBundle.objects.filter(last_used_at__lt=timezone.now() - retention).delete()
+    return deleted
@@ -0,0 +1,180 @@
+# flashcards/importers.py
+"""
+Bulk import of flashcards from CSV/TSV files and Anki packages.
+
+Sources are read as streams of rows ({'question', 'answer', 'subject', ...})
+and FlashcardImporter inserts them in batches: one bulk_create for the cards
+and one for their study-skill through-rows per batch, so memory stays
+constant and a 10k-card deck costs a few dozen queries. Imported cards are
+added to the near-duplicate index batch by batch as well.
+
+CSV/TSV files need a header row naming the columns: question, answer and
+optionally subject, topic, language, curriculum, status and study_skills
+(several skills separated by ';' or '|'). A file without a recognised header
+is read as question, answer pairs.
+
+Anki .apkg files are zip archives holding an SQLite collection: notes are
+read with a cursor; the first field is the question, the second the answer
+and the note tags are matched against study-skill names.
+"""
+import csv
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import zipfile
+
+from django.db import transaction
+
+from core.dedup import index_documents
+from core.legacy import NaturalKeyResolver
+from core.models import StudySkill
+from core.streaming import batched
+
+from .models import Flashcard
+
+IMPORT_BATCH_SIZE = 1000
+
+COLUMNS = ('question', 'answer', 'subject', 'topic', 'language', 'curriculum', 'status', 'study_skills')
+
+_SKILL_SEPARATOR_RE = re.compile(r'[;|]')
+_ANKI_FIELD_SEPARATOR = '\x1f'
+# Newest first: anki21 replaces anki2 when both are present.
+_ANKI_COLLECTIONS = ('collection.anki21', 'collection.anki2')
+# Anki 2.1.50+ exports a zstd-compressed collection, next to a stub
+# collection.anki2 that only asks to update Anki.
+_ANKI_COMPRESSED_COLLECTION = 'collection.anki21b'
+
+
+class ImportFormatError(ValueError):
+    """ The file cannot be read as the requested format. """
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename)[1].lower()
+    return {'.csv': 'csv', '.tsv': 'tsv', '.txt': 'tsv', '.apkg': 'apkg'}.get(extension)
+
+
+def iter_delimited_rows(fileobj, delimiter=','):
+    """ Yields one dict per line of a CSV/TSV text stream. """
+    reader = csv.reader(fileobj, delimiter=delimiter)
+    first = next(reader, None)
+    if first is None:
+        return
+    header = [name.strip().lower().replace(' ', '_') for name in first]
+    if 'question' in header and 'answer' in header:
+        columns = header
+    else:
+        columns = ['question', 'answer']
+        yield dict(zip(columns, first))
+    for values in reader:
+        yield dict(zip(columns, values))
+
+
+def iter_apkg_rows(fileobj):
+    """ Yields one dict per note of an Anki package (path or binary file object). """
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        raise ImportFormatError("Not an Anki package (.apkg is a zip archive).")
+    with archive:
+        names = set(archive.namelist())
+        if _ANKI_COMPRESSED_COLLECTION in names:
+            raise ImportFormatError(
+                "This package was exported by Anki 2.1.50 or later, whose compressed collection is not supported. "
+                "Export it again with \"Support older Anki versions\" checked."
+            )
+        collection = next((name for name in _ANKI_COLLECTIONS if name in names), None)
+        if collection is None:
+            raise ImportFormatError("No readable collection in this package.")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'collection.sqlite')
+            with archive.open(collection) as source, open(path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+            connection = sqlite3.connect(path)
+            try:
+                for fields, tags in connection.execute('SELECT flds, tags FROM notes ORDER BY id'):
+                    values = fields.split(_ANKI_FIELD_SEPARATOR)
+                    yield {
+                        'question': values[0],
+                        'answer': values[1] if len(values) > 1 else '',
+                        'study_skills': ';'.join(tag.replace('_', ' ') for tag in tags.split()),
+                    }
+            except sqlite3.DatabaseError as exc:
+                raise ImportFormatError(f"Unreadable Anki collection: {exc}")
+            finally:
+                connection.close()
+
+
+class FlashcardImporter:
+    """
+    Maps imported rows onto flashcards. `defaults` (subject, topic, language,
+    curriculum ids and status) apply to rows that leave those columns empty.
+    """
+
+    def __init__(self, author=None, defaults=None, batch_size=IMPORT_BATCH_SIZE):
+        self.author = author
+        self.defaults = defaults or {}
+        self.batch_size = batch_size
+        self.resolver = NaturalKeyResolver()
+        self.skills = {}
+        for skill_id, name, category in StudySkill.objects.values_list('id', 'name', 'category__name'):
+            self.skills.setdefault(name.strip().lower(), skill_id)
+            self.skills[f"{category}: {name}".strip().lower()] = skill_id
+        self.statuses = {value for value, _ in Flashcard.STATUS_CHOICES}
+        self.created = 0
+        self.skipped = 0
+        self.unknown_skills = set()
+
+    def _skill_ids(self, value):
+        ids = []
+        for name in _SKILL_SEPARATOR_RE.split(value or ''):
+            name = name.strip().lower()
+            if not name:
+                continue
+            if name in self.skills:
+                ids.append(self.skills[name])
+            else:
+                self.unknown_skills.add(name)
+        return list(dict.fromkeys(ids))
+
+    def _card(self, row):
+        curriculum_id = self.resolver.curriculum_id(row.get('curriculum')) or self.defaults.get('curriculum_id')
+        language_id = self.resolver.language_id(row.get('language')) or self.defaults.get('language_id')
+        subject = row.get('subject')
+        status = (row.get('status') or '').strip()
+        return Flashcard(
+            question=row['question'],
+            answer=row.get('answer') or '',
+            author=self.author,
+            curriculum_id=curriculum_id,
+            language_id=language_id,
+            subject_id=self.resolver.subject_id(subject, subject, curriculum_id, language_id) or self.defaults.get('subject_id'),
+            topic_id=self.resolver.label_id(row.get('topic')) or self.defaults.get('topic_id'),
+            status=status if status in self.statuses else self.defaults.get('status', 'in_progress'),
+        )
+
+    def import_rows(self, rows):
+        """ Inserts `rows` batch by batch. Rows without a question are skipped. """
+        through = Flashcard.study_skills.through
+        for batch in batched(rows, self.batch_size):
+            cards, skill_lists = [], []
+            for row in batch:
+                if not (row.get('question') or '').strip():
+                    self.skipped += 1
+                    continue
+                cards.append(self._card(row))
+                skill_lists.append(self._skill_ids(row.get('study_skills')))
+
+            with transaction.atomic():
+                Flashcard.objects.bulk_create(cards)
+                through.objects.bulk_create([
+                    through(flashcard_id=card.pk, studyskill_id=skill_id)
+                    for card, skill_ids in zip(cards, skill_lists)
+                    for skill_id in skill_ids
+                ])
+                index_documents(Flashcard, [(card.pk, card.dedup_text) for card in cards])
+            self.created += len(cards)
+        return self.created
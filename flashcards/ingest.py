@@ -0,0 +1,166 @@
+# flashcards/ingest.py
+"""
+Batched ingestion of flashcard review events.
+
+Clients post their answers in batches; the events are appended to an
+in-process buffer and a background thread flushes the buffer every
+FLUSH_INTERVAL seconds (sooner when it holds FLUSH_SIZE events). Each flush
+is one transaction: the events are inserted with bulk_create and the card
+states they affect are loaded with one query, replayed in review order and
+written back with one bulk_create and one bulk_update, and so are the
+student mastery statistics (flashcards/mastery.py). A classroom studying
+together therefore costs a few write transactions per second, instead of
+one per answer all queueing on SQLite's write lock.
+
+Events whose card or user has been deleted meanwhile are dropped before
+the insert. If a flush still fails, the batch is retried in halves down to
+single events and the events that fail on their own are logged and
+discarded, so one bad event cannot block the rest. A database error (e.g.
+a locked database) puts the events not written yet back in the buffer for
+the next flush. Events not flushed yet live in memory only; they are flushed at exit.
+"""
+import atexit
+import logging
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, close_old_connections, transaction
+
+from .mastery import record_mastery
+from .models import CardState, Flashcard, ReviewEvent
+from .scheduling import apply_review
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 0.5
+FLUSH_SIZE = 500
+# Events kept for a retry when the database is unavailable (e.g. locked).
+MAX_PENDING = 50000
+
+_STATE_FIELDS = ['ease', 'interval_days', 'repetitions', 'lapses', 'due', 'last_reviewed_at']
+
+
+def ingest_review_events(events):
+    """
+    Writes `events` (dicts with user_id, flashcard_id, grade, latency_ms and
+    reviewed_at) and updates the card states they affect, in one transaction.
+    Events older than a state's last review are recorded but not replayed.
+    """
+    events = sorted(events, key=lambda event: event['reviewed_at'])
+    user_ids = {event['user_id'] for event in events}
+    flashcard_ids = {event['flashcard_id'] for event in events}
+
+    with transaction.atomic():
+        ReviewEvent.objects.bulk_create([ReviewEvent(**event) for event in events], batch_size=FLUSH_SIZE)
+
+        states = {
+            (state.user_id, state.flashcard_id): state
+            for state in CardState.objects.filter(user_id__in=user_ids, flashcard_id__in=flashcard_ids)
+        }
+        existing = set(states)
+        reviews = []
+        for event in events:
+            key = (event['user_id'], event['flashcard_id'])
+            state = states.get(key)
+            reviews.append(dict(event, first_review=state is None))
+            if state is None:
+                state = states[key] = CardState(user_id=key[0], flashcard_id=key[1])
+            elif state.last_reviewed_at and event['reviewed_at'] < state.last_reviewed_at:
+                continue
+            apply_review(state, event['grade'], event['reviewed_at'])
+
+        CardState.objects.bulk_create([s for k, s in states.items() if k not in existing], batch_size=FLUSH_SIZE)
+        CardState.objects.bulk_update([states[k] for k in existing], _STATE_FIELDS, batch_size=FLUSH_SIZE)
+        record_mastery(reviews)
+
+
+def _drop_orphan_events(events):
+    """ The events whose card and user still exist; the others are logged and dropped. """
+    user_ids = get_user_model().objects.filter(pk__in={event['user_id'] for event in events}).values_list('pk', flat=True)
+    flashcard_ids = Flashcard.objects.filter(pk__in={event['flashcard_id'] for event in events}).values_list('pk', flat=True)
+    user_ids, flashcard_ids = set(user_ids), set(flashcard_ids)
+    kept = [event for event in events if event['user_id'] in user_ids and event['flashcard_id'] in flashcard_ids]
+    if len(kept) < len(events):
+        logger.warning("Dropped %d review event(s) for deleted cards or users", len(events) - len(kept))
+    return kept
+
+
+def _ingest_in_chunks(events):
+    """
+    Ingests `events`, splitting a failing batch in halves until the events
+    that fail on their own are isolated; those are logged and discarded.
+    A database error stops the ingestion. Returns the number of events
+    written and the events not written yet, to retry on the next flush.
+    """
+    written = 0
+    # Chunks still to write, the next one last.
+    chunks = [events]
+    while chunks:
+        chunk = chunks.pop()
+        if not chunk:
+            continue
+        try:
+            ingest_review_events(chunk)
+            written += len(chunk)
+        except OperationalError:
+            logger.exception("Flushing %d review event(s) failed", len(chunk))
+            return written, chunk + [event for pending in reversed(chunks) for event in pending]
+        except Exception:
+            if len(chunk) == 1:
+                logger.exception("Discarded review event %r", chunk[0])
+                continue
+            middle = len(chunk) // 2
+            chunks.extend([chunk[middle:], chunk[:middle]])
+    return written, []
+
+
+class ReviewEventBuffer:
+    """ Collects events from request threads; one daemon thread flushes them. """
+
+    def __init__(self):
+        self._events = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add(self, events):
+        with self._lock:
+            self._events.extend(events)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='review-ingest', daemon=True)
+                self._thread.start()
+            if len(self._events) >= FLUSH_SIZE:
+                self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(FLUSH_INTERVAL)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """ Writes the buffered events now. Returns the number written. """
+        with self._lock:
+            batch, self._events = self._events, []
+        if not batch:
+            return 0
+        close_old_connections()
+        try:
+            written, pending = _ingest_in_chunks(_drop_orphan_events(batch))
+        except OperationalError:
+            logger.exception("Flushing %d review event(s) failed", len(batch))
+            written, pending = 0, batch
+        finally:
+            close_old_connections()
+        if pending:
+            # Only the events not written go back, so none is recorded twice.
+            with self._lock:
+                if len(self._events) + len(pending) <= MAX_PENDING:
+                    self._events[:0] = pending
+                else:
+                    logger.error("Dropped %d review event(s): the buffer is full", len(pending))
+        return written
+
+
+review_buffer = ReviewEventBuffer()
+atexit.register(review_buffer.flush)
@@ -0,0 +1,72 @@
+# flashcards/management/commands/import_flashcards.py
+
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from flashcards.importers import (
+    IMPORT_BATCH_SIZE, FlashcardImporter, ImportFormatError, detect_format, iter_apkg_rows, iter_delimited_rows,
+)
+from flashcards.serializers import ImportDefaultsSerializer
+
+
+class Command(BaseCommand):
+    help = "Imports flashcards from a CSV/TSV file or an Anki .apkg package, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import.")
+        parser.add_argument('--format', choices=['csv', 'tsv', 'apkg'], help="Default: guessed from the extension.")
+        parser.add_argument('--author', help="Username recorded as the author of the cards.")
+        parser.add_argument('--subject', type=int, help="Subject id for rows without a subject.")
+        parser.add_argument('--topic', type=int, help="Topic (label) id for rows without a topic.")
+        parser.add_argument('--language', type=int, help="Language id for rows without a language.")
+        parser.add_argument('--curriculum', type=int, help="Curriculum id for rows without a curriculum.")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                            help=f"Cards inserted per transaction (default: {IMPORT_BATCH_SIZE}).")
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or detect_format(options['path'])
+        if file_format is None:
+            raise CommandError("Unknown file type: pass --format.")
+        author = None
+        if options['author']:
+            author = User.objects.filter(username=options['author']).first()
+            if author is None:
+                raise CommandError(f"Unknown user '{options['author']}'.")
+
+        # Same check as the import endpoint: unknown ids would only fail at commit.
+        fields = ('subject', 'topic', 'language', 'curriculum')
+        defaults_serializer = ImportDefaultsSerializer(data={field: options[field] for field in fields})
+        if not defaults_serializer.is_valid():
+            raise CommandError(' '.join(
+                f"--{field}: {' '.join(map(str, errors))}" for field, errors in defaults_serializer.errors.items()
+            ))
+
+        importer = FlashcardImporter(
+            author=author,
+            defaults={
+                f'{field}_id': value.pk
+                for field, value in defaults_serializer.validated_data.items() if value is not None
+            },
+            batch_size=max(1, options['batch_size']),
+        )
+        started = time.perf_counter()
+        try:
+            if file_format == 'apkg':
+                importer.import_rows(iter_apkg_rows(options['path']))
+            else:
+                with open(options['path'], encoding='utf-8-sig', newline='') as source:
+                    importer.import_rows(iter_delimited_rows(source, '\t' if file_format == 'tsv' else ','))
+        except (OSError, ImportFormatError) as exc:
+            raise CommandError(str(exc))
+        elapsed = max(time.perf_counter() - started, 1e-9)
+
+        if importer.unknown_skills:
+            self.stdout.write(self.style.WARNING(
+                f"Unknown study skills ignored: {', '.join(sorted(importer.unknown_skills))}."
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {importer.created} flashcard(s), skipped {importer.skipped}, "
+            f"in {elapsed:.2f}s ({importer.created / elapsed:.0f} cards/s)."
+        ))
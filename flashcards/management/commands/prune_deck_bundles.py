@@ -0,0 +1,19 @@
+# flashcards/management/commands/prune_deck_bundles.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from flashcards.bundles import BUNDLE_RETENTION, prune_bundles
+
+
+class Command(BaseCommand):
+    help = "Deletes offline deck bundles no client has synced from recently; their holders will refetch the full deck."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=BUNDLE_RETENTION.days,
+                            help=f"Keep bundles used within this many days (default: {BUNDLE_RETENTION.days}).")
+
+    def handle(self, *args, **options):
+        deleted = prune_bundles(timedelta(days=max(0, options['days'])))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} deck bundle(s)."))
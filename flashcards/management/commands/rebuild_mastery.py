@@ -0,0 +1,34 @@
+# flashcards/management/commands/rebuild_mastery.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.streaming import batched
+from flashcards.mastery import record_mastery
+from flashcards.models import ReviewEvent, SkillMastery, TopicMastery
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Recomputes the student mastery statistics from the recorded review events."
+
+    def handle(self, *args, **options):
+        events = (
+            ReviewEvent.objects.order_by('reviewed_at', 'id')
+            .values('user_id', 'flashcard_id', 'grade', 'reviewed_at')
+            .iterator(chunk_size=BATCH_SIZE)
+        )
+        seen = set()
+        count = 0
+        with transaction.atomic():
+            TopicMastery.objects.all().delete()
+            SkillMastery.objects.all().delete()
+            for batch in batched(events, BATCH_SIZE):
+                for event in batch:
+                    key = (event['user_id'], event['flashcard_id'])
+                    event['first_review'] = key not in seen
+                    seen.add(key)
+                record_mastery(batch)
+                count += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Replayed {count} review event(s)."))
@@ -0,0 +1,95 @@
+# flashcards/mastery.py
+"""
+Per-student mastery statistics.
+
+Every recorded review updates, in the same transaction, one TopicMastery row
+for the card's topic and for each topic above it in the label tree, and one
+SkillMastery row per study skill of the card. Reading how well a student
+knows a topic, a chapter or a skill is therefore a lookup, never a scan of
+the review history.
+
+Rows are loaded with one query per table, updated in memory and written
+back with one bulk_create and one bulk_update per table, so a batch of
+reviews costs the same handful of queries as a single one.
+"""
+from django.db import transaction
+
+from core.models import get_label_ancestor_ids
+
+from .models import Flashcard, SkillMastery, TopicMastery
+from .scheduling import PASSING_GRADE
+
+# Weight of the latest review in the retention estimate: recent answers
+# matter more than old ones, without forgetting the history entirely.
+RETENTION_WEIGHT = 0.2
+
+_STATS_FIELDS = ['cards_seen', 'reviews', 'successes', 'retention', 'last_reviewed_at']
+
+
+def _apply(stats, grade, reviewed_at, first_review):
+    recalled = grade >= PASSING_GRADE
+    if first_review:
+        stats.cards_seen += 1
+    # The first review sets the estimate; later ones move it towards the outcome.
+    if stats.reviews:
+        stats.retention += RETENTION_WEIGHT * (float(recalled) - stats.retention)
+    else:
+        stats.retention = float(recalled)
+    stats.reviews += 1
+    stats.successes += int(recalled)
+    if stats.last_reviewed_at is None or reviewed_at > stats.last_reviewed_at:
+        stats.last_reviewed_at = reviewed_at
+
+
+def _update(model, group_field, keys_by_review, reviews):
+    """ Applies `reviews` to the `model` rows keyed by (user id, group id). """
+    keys = {key for review_keys in keys_by_review for key in review_keys}
+    if not keys:
+        return
+    rows = {
+        (row.user_id, getattr(row, group_field)): row
+        for row in model.objects.select_for_update().filter(
+            user_id__in={user_id for user_id, _ in keys},
+            **{f'{group_field}__in': {group_id for _, group_id in keys}},
+        )
+    }
+    existing = set(rows)
+    for review, review_keys in zip(reviews, keys_by_review):
+        for key in review_keys:
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = model(user_id=key[0], **{group_field: key[1]})
+            _apply(row, review['grade'], review['reviewed_at'], review['first_review'])
+
+    model.objects.bulk_create([row for key, row in rows.items() if key not in existing])
+    model.objects.bulk_update([rows[key] for key in existing], _STATS_FIELDS)
+
+
+def record_mastery(reviews):
+    """
+    Updates the statistics for `reviews`: dicts with user_id, flashcard_id,
+    grade, reviewed_at and first_review (True for the student's first review
+    of that card), in review order.
+    """
+    reviews = list(reviews)
+    if not reviews:
+        return
+    flashcard_ids = {review['flashcard_id'] for review in reviews}
+    topics = dict(Flashcard.objects.filter(id__in=flashcard_ids).values_list('id', 'topic_id'))
+    skills = {}
+    through = Flashcard.study_skills.through
+    for flashcard_id, skill_id in through.objects.filter(flashcard_id__in=flashcard_ids).values_list('flashcard_id', 'studyskill_id'):
+        skills.setdefault(flashcard_id, []).append(skill_id)
+    chains = get_label_ancestor_ids({topic_id for topic_id in topics.values() if topic_id is not None})
+
+    topic_keys = [
+        [(review['user_id'], label_id) for label_id in chains.get(topics.get(review['flashcard_id']), [])]
+        for review in reviews
+    ]
+    skill_keys = [
+        [(review['user_id'], skill_id) for skill_id in skills.get(review['flashcard_id'], [])]
+        for review in reviews
+    ]
+    with transaction.atomic():
+        _update(TopicMastery, 'topic_id', topic_keys, reviews)
+        _update(SkillMastery, 'study_skill_id', skill_keys, reviews)
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.17 on 2026-10-19 03:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('flashcards', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ease', models.FloatField(default=2.5, help_text='SM-2 ease factor (never below 1.3).')),
+                ('interval_days', models.PositiveIntegerField(default=0, help_text='Days until the next review (0 while relearning).')),
+                ('repetitions', models.PositiveIntegerField(default=0, help_text='Successful reviews in a row.')),
+                ('lapses', models.PositiveIntegerField(default=0, help_text='Times the card was forgotten after being learned.')),
+                ('due', models.DateTimeField(help_text='When the card should be reviewed next.')),
+                ('last_reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('flashcard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='states', to='flashcards.flashcard')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='flashcard_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'due'], name='flashcards_state_due_idx')],
+                'unique_together': {('user', 'flashcard')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.17 on 2026-10-19 03:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('flashcards', '0002_cardstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade', models.PositiveSmallIntegerField(help_text='SM-2 quality, 0 (forgotten) to 5 (perfect recall).')),
+                ('latency_ms', models.PositiveIntegerField(blank=True, help_text='Time taken to answer, in milliseconds.', null=True)),
+                ('reviewed_at', models.DateTimeField(help_text="When the student answered (client time, clamped to the server's).")),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('flashcard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_events', to='flashcards.flashcard')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='flashcard_reviews', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'reviewed_at'], name='flashcards_review_user_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.17 on 2026-10-19 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flashcards', '0003_reviewevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeckBundle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.CharField(max_length=64, unique=True)),
+                ('manifest', models.JSONField(help_text='Card id -> hash of the card content, as bundled.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True, help_text='Last time a client synced from this bundle.')),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.17 on 2026-10-19 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flashcards', '0004_deckbundle'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flashcard',
+            index=models.Index(fields=['-updated_at'], name='flashcards_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.17 on 2026-10-19 04:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0006_contentsignature_contentsignatureband'),
+        ('flashcards', '0005_flashcard_updated_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TopicMastery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cards_seen', models.PositiveIntegerField(default=0, help_text='Distinct cards reviewed at least once.')),
+                ('reviews', models.PositiveIntegerField(default=0)),
+                ('successes', models.PositiveIntegerField(default=0, help_text='Reviews graded as recalled.')),
+                ('retention', models.FloatField(default=0, help_text='Recall rate weighted towards recent reviews (0 to 1).')),
+                ('last_reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('topic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mastery', to='core.label')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='topic_mastery', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Topic mastery',
+                'unique_together': {('user', 'topic')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SkillMastery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cards_seen', models.PositiveIntegerField(default=0, help_text='Distinct cards reviewed at least once.')),
+                ('reviews', models.PositiveIntegerField(default=0)),
+                ('successes', models.PositiveIntegerField(default=0, help_text='Reviews graded as recalled.')),
+                ('retention', models.FloatField(default=0, help_text='Recall rate weighted towards recent reviews (0 to 1).')),
+                ('last_reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('study_skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mastery', to='core.studyskill')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_mastery', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Skill mastery',
+                'unique_together': {('user', 'study_skill')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.17 on 2026-10-19 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flashcards", "0006_topicmastery_skillmastery"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="flashcard",
+            name="flashcards_updated_idx",
+        ),
+        migrations.AddIndex(
+            model_name="flashcard",
+            index=models.Index(fields=["-updated_at", "-id"], name="flashcards_updated_id_idx"),
+        ),
+    ]
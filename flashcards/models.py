@@ -68,7 +68,151 @@ class Flashcard(models.Model):
 
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # Backs the cursor pagination of the flashcard list.
+            models.Index(fields=['-updated_at', '-id'], name='flashcards_updated_id_idx'),
+        ]
 
     def __str__(self):
         # Return the first 50 characters of the question for a readable representation.
         return (self.question[:50] + '...') if len(self.question) > 50 else self.question
+
+    @property
+    def dedup_text(self):
+        """ The text compared when looking for near-duplicates (see core/dedup.py). """
+        return f"{self.question}\n{self.answer}"
+
+
+class CardState(models.Model):
+    """
+    A student's spaced-repetition state for one flashcard (see
+    flashcards/scheduling.py). Created on the first review of the card.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='flashcard_states'
+    )
+    flashcard = models.ForeignKey(
+        Flashcard,
+        on_delete=models.CASCADE,
+        related_name='states'
+    )
+
+    ease = models.FloatField(default=2.5, help_text="SM-2 ease factor (never below 1.3).")
+    interval_days = models.PositiveIntegerField(default=0, help_text="Days until the next review (0 while relearning).")
+    repetitions = models.PositiveIntegerField(default=0, help_text="Successful reviews in a row.")
+    lapses = models.PositiveIntegerField(default=0, help_text="Times the card was forgotten after being learned.")
+    due = models.DateTimeField(help_text="When the card should be reviewed next.")
+    last_reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('user', 'flashcard')
+        indexes = [
+            # Backs the "next due cards" query: a range scan on one user's states.
+            models.Index(fields=['user', 'due'], name='flashcards_state_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} / card {self.flashcard_id}: due {self.due:%Y-%m-%d %H:%M}"
+
+
+class ReviewEvent(models.Model):
+    """
+    One answer given while studying, as sent by the client. Events are
+    append-only and written in batches (see flashcards/ingest.py).
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='flashcard_reviews'
+    )
+    flashcard = models.ForeignKey(
+        Flashcard,
+        on_delete=models.CASCADE,
+        related_name='review_events'
+    )
+    grade = models.PositiveSmallIntegerField(help_text="SM-2 quality, 0 (forgotten) to 5 (perfect recall).")
+    latency_ms = models.PositiveIntegerField(null=True, blank=True, help_text="Time taken to answer, in milliseconds.")
+    reviewed_at = models.DateTimeField(help_text="When the student answered (client time, clamped to the server's).")
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'reviewed_at'], name='flashcards_review_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} graded card {self.flashcard_id}: {self.grade}"
+
+
+
+class DeckBundle(models.Model):
+    """
+    The card list of an offline deck bundle, kept under the bundle hash so
+    that later syncs can be answered with a delta (see flashcards/bundles.py).
+    """
+    hash = models.CharField(max_length=64, unique=True)
+    manifest = models.JSONField(help_text="Card id -> hash of the card content, as bundled.")
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True, help_text="Last time a client synced from this bundle.")
+
+    def __str__(self):
+        return f"Deck bundle {self.hash[:12]} ({len(self.manifest)} cards)"
+
+
+class MasteryStats(models.Model):
+    """
+    Review statistics of a student over a group of cards, updated as reviews
+    are recorded (see flashcards/mastery.py).
+    """
+    cards_seen = models.PositiveIntegerField(default=0, help_text="Distinct cards reviewed at least once.")
+    reviews = models.PositiveIntegerField(default=0)
+    successes = models.PositiveIntegerField(default=0, help_text="Reviews graded as recalled.")
+    retention = models.FloatField(default=0, help_text="Recall rate weighted towards recent reviews (0 to 1).")
+    last_reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+
+class TopicMastery(MasteryStats):
+    """ A student's statistics for a topic, including every sub-topic below it. """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='topic_mastery'
+    )
+    topic = models.ForeignKey(
+        Label,
+        on_delete=models.CASCADE,
+        related_name='mastery'
+    )
+
+    class Meta:
+        unique_together = ('user', 'topic')
+        verbose_name_plural = "Topic mastery"
+
+    def __str__(self):
+        return f"{self.user} / {self.topic}: {self.retention:.0%}"
+
+
+class SkillMastery(MasteryStats):
+    """ A student's statistics for the cards linked to a study skill. """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='skill_mastery'
+    )
+    study_skill = models.ForeignKey(
+        StudySkill,
+        on_delete=models.CASCADE,
+        related_name='mastery'
+    )
+
+    class Meta:
+        unique_together = ('user', 'study_skill')
+        verbose_name_plural = "Skill mastery"
+
+    def __str__(self):
+        return f"{self.user} / {self.study_skill}: {self.retention:.0%}"
@@ -0,0 +1,93 @@
+# flashcards/sampling.py
+"""
+Random decks without ORDER BY RANDOM().
+
+Sorting the filtered table by a random key reads and sorts every matching
+row. Two cheaper strategies are used instead, both driven by a seeded
+generator so that the same seed and the same card bank give the same deck:
+
+- id-range sampling: random ids are drawn between the smallest and largest
+  matching id and looked up by primary key, keeping those that exist and
+  match. With ids reasonably dense this costs a few index lookups per card.
+- reservoir sampling, when matching ids are too sparse for that: the ids are
+  streamed in primary-key order (an index scan, no sort) through Algorithm L.
+"""
+import math
+import random
+from itertools import islice
+
+from django.db.models import Count, Max, Min
+
+# Below this share of existing ids in [min id, max id], id-range sampling
+# would waste most of its lookups and the reservoir is used instead.
+MIN_ID_DENSITY = 0.05
+MAX_RANGE_ROUNDS = 4
+
+
+def _uniform(rng):
+    """ A random float in the open interval (0, 1). """
+    value = rng.random()
+    while value == 0.0:
+        value = rng.random()
+    return value
+
+
+def reservoir_sample(iterable, size, rng):
+    """
+    Returns `size` items drawn uniformly from `iterable` in one pass, using
+    Algorithm L: the gaps between replacements are drawn directly, so only
+    O(size * log(n / size)) random numbers are needed and skipped items are
+    consumed without any Python-level work.
+    """
+    iterator = iter(iterable)
+    reservoir = list(islice(iterator, size))
+    if len(reservoir) == size and size > 0:
+        weight = math.exp(math.log(_uniform(rng)) / size)
+        while True:
+            skip = math.floor(math.log(_uniform(rng)) / math.log(1 - weight))
+            item = next(islice(iterator, skip, None), None)
+            if item is None:
+                break
+            reservoir[rng.randrange(size)] = item
+            weight *= math.exp(math.log(_uniform(rng)) / size)
+    rng.shuffle(reservoir)
+    return reservoir
+
+
+def _range_sample(queryset, size, rng, low, high, density):
+    """ Id-range rejection sampling; returns None if it does not find `size` ids. """
+    chosen, tried = [], set()
+    for _ in range(MAX_RANGE_ROUNDS):
+        wanted = size - len(chosen)
+        # Draw enough candidates to expect `wanted` hits, with some margin.
+        target = min(math.ceil(wanted / density * 1.25) + 8, high - low + 1 - len(tried))
+        candidates = []
+        for _ in range(target * 4):
+            if len(candidates) >= target:
+                break
+            candidate = rng.randint(low, high)
+            if candidate not in tried:
+                tried.add(candidate)
+                candidates.append(candidate)
+        found = set(queryset.filter(pk__in=candidates).values_list('pk', flat=True))
+        chosen.extend([candidate for candidate in candidates if candidate in found][:wanted])
+        if len(chosen) >= size:
+            return chosen
+    return None
+
+
+def sample_ids(queryset, size, seed):
+    """ Draws up to `size` ids of `queryset`, deterministically for a given `seed`. """
+    rng = random.Random(seed)
+    queryset = queryset.order_by()
+    bounds = queryset.aggregate(low=Min('pk'), high=Max('pk'), count=Count('pk'))
+    if not bounds['count']:
+        return []
+    if bounds['count'] > size:
+        density = bounds['count'] / (bounds['high'] - bounds['low'] + 1)
+        if density >= MIN_ID_DENSITY:
+            chosen = _range_sample(queryset, size, rng, bounds['low'], bounds['high'], density)
+            if chosen is not None:
+                return chosen
+    ids = queryset.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=5000)
+    return reservoir_sample(ids, size, rng)
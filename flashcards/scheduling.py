@@ -0,0 +1,44 @@
+# flashcards/scheduling.py
+"""
+SM-2 spaced-repetition scheduler.
+
+A review is graded 0-5 (SM-2 "quality"): below PASSING_GRADE the card was
+forgotten and goes back to relearning a few minutes later; otherwise its
+interval grows (1 day, 6 days, then interval x ease) and the ease factor is
+adjusted by how hard the recall was.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+MIN_GRADE = 0
+MAX_GRADE = 5
+PASSING_GRADE = 3
+
+MIN_EASE = 1.3
+RELEARN_DELAY = timedelta(minutes=10)
+
+
+def apply_review(state, grade, reviewed_at=None):
+    """ Updates `state` (a CardState, saved or not) in place for a review graded `grade`. """
+    reviewed_at = reviewed_at or timezone.now()
+    if grade < PASSING_GRADE:
+        if state.repetitions > 0:
+            state.lapses += 1
+        state.repetitions = 0
+        state.interval_days = 0
+        state.due = reviewed_at + RELEARN_DELAY
+    else:
+        if state.repetitions == 0:
+            state.interval_days = 1
+        elif state.repetitions == 1:
+            state.interval_days = 6
+        else:
+            state.interval_days = max(1, round(state.interval_days * state.ease))
+        state.repetitions += 1
+        state.due = reviewed_at + timedelta(days=state.interval_days)
+
+    penalty = MAX_GRADE - grade
+    state.ease = round(max(MIN_EASE, state.ease + 0.1 - penalty * (0.08 + penalty * 0.02)), 3)
+    state.last_reviewed_at = reviewed_at
+    return state
@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import Flashcard
+from core.models import Curriculum, Label, Language, Subject
+from .models import CardState, Flashcard
+from .scheduling import MAX_GRADE, MIN_GRADE
 
 class FlashcardListSerializer(serializers.ModelSerializer):
     """
@@ -23,4 +25,53 @@ class FlashcardDetailSerializer(serializers.ModelSerializer):
             'id', 'question', 'answer', 'author', 'subject', 'topic', 'language',
             'curriculum', 'status', 'study_skills', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['author', 'created_at', 'updated_at']
\ No newline at end of file
+        read_only_fields = ['author', 'created_at', 'updated_at']
+
+class CardStateSerializer(serializers.ModelSerializer):
+    """ A student's review state for a flashcard. """
+    class Meta:
+        model = CardState
+        fields = ['ease', 'interval_days', 'repetitions', 'lapses', 'due', 'last_reviewed_at']
+        read_only_fields = fields
+
+class DueCardSerializer(serializers.ModelSerializer):
+    """ A card of the review queue: the flashcard content with its review state. """
+    id = serializers.IntegerField(source='flashcard.id', read_only=True)
+    question = serializers.CharField(source='flashcard.question', read_only=True)
+    answer = serializers.CharField(source='flashcard.answer', read_only=True)
+    state = CardStateSerializer(source='*', read_only=True)
+
+    class Meta:
+        model = CardState
+        fields = ['id', 'question', 'answer', 'state']
+
+class ReviewSerializer(serializers.Serializer):
+    """ The grade (SM-2 quality, 0 = forgotten ... 5 = perfect recall) of one review. """
+    grade = serializers.IntegerField(min_value=MIN_GRADE, max_value=MAX_GRADE)
+
+class ReviewEventSerializer(serializers.Serializer):
+    """ One answer of a review batch. """
+    card = serializers.IntegerField(min_value=1)
+    grade = serializers.IntegerField(min_value=MIN_GRADE, max_value=MAX_GRADE)
+    latency_ms = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    reviewed_at = serializers.DateTimeField(required=False)
+
+class ReviewBatchSerializer(serializers.Serializer):
+    """ A batch of answers posted by a studying client. """
+    MAX_EVENTS = 500
+
+    events = ReviewEventSerializer(many=True, allow_empty=False, max_length=MAX_EVENTS)
+
+class ImportDefaultsSerializer(serializers.Serializer):
+    """ Taxonomy ids applied to imported rows that do not name their own. """
+    subject = serializers.PrimaryKeyRelatedField(queryset=Subject.objects.all(), required=False, allow_null=True)
+    topic = serializers.PrimaryKeyRelatedField(queryset=Label.objects.all(), required=False, allow_null=True)
+    language = serializers.PrimaryKeyRelatedField(queryset=Language.objects.all(), required=False, allow_null=True)
+    curriculum = serializers.PrimaryKeyRelatedField(queryset=Curriculum.objects.all(), required=False, allow_null=True)
+
+
+class DuplicateCheckSerializer(serializers.Serializer):
+    """ A flashcard being written, checked against the existing ones. """
+    question = serializers.CharField()
+    answer = serializers.CharField(required=False, allow_blank=True, default='')
+    exclude = serializers.IntegerField(required=False, allow_null=True, help_text="Id of the card being edited.")
@@ -1,3 +1,419 @@
-from django.test import TestCase
+import datetime
+import gzip
+import io
+import json
+import os
+import random
+import tempfile
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Curriculum, Language, StudySkill, StudySkillCategory, Subject
+
+from .importers import ImportFormatError, iter_apkg_rows
+from .ingest import ReviewEventBuffer, ingest_review_events
+from .models import CardState, Flashcard, ReviewEvent
+from .sampling import reservoir_sample, sample_ids
+from .scheduling import MIN_EASE, RELEARN_DELAY, apply_review
+
+
+class ReviewEventBufferTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('student', password='x')
+        self.cards = [Flashcard.objects.create(question=f"Q{i}", answer=f"A{i}") for i in range(3)]
+        self.now = timezone.now()
+
+    def event(self, card_id, grade=4, user_id=None, minutes=0):
+        return {
+            'user_id': user_id or self.user.id,
+            'flashcard_id': card_id,
+            'grade': grade,
+            'latency_ms': 1200,
+            'reviewed_at': self.now - datetime.timedelta(minutes=minutes),
+        }
+
+    def flush(self, events):
+        buffer = ReviewEventBuffer()
+        buffer._events = list(events)
+        written = buffer.flush()
+        self.assertEqual(buffer._events, [])
+        return written
+
+    def test_events_for_deleted_cards_and_users_are_dropped(self):
+        deleted_card = Flashcard.objects.create(question='gone', answer='gone')
+        deleted_card_id = deleted_card.id
+        deleted_card.delete()
+        with self.assertLogs('flashcards.ingest', 'WARNING'):
+            written = self.flush([
+                self.event(self.cards[0].id),
+                self.event(deleted_card_id),
+                self.event(self.cards[1].id, user_id=self.user.id + 1000),
+            ])
+        self.assertEqual(written, 1)
+        self.assertEqual(list(ReviewEvent.objects.values_list('flashcard_id', flat=True)), [self.cards[0].id])
+
+    def test_failing_event_does_not_block_the_others(self):
+        events = [self.event(card.id, minutes=i) for i, card in enumerate(self.cards)]
+        events[1]['grade'] = None
+        with self.assertLogs('flashcards.ingest', 'ERROR') as logs:
+            self.assertEqual(self.flush(events), 2)
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(ReviewEvent.objects.count(), 2)
+        self.assertEqual(
+            set(CardState.objects.values_list('flashcard_id', flat=True)),
+            {self.cards[0].id, self.cards[2].id},
+        )
+        # The next flush is not held back by the discarded event.
+        self.assertEqual(self.flush([self.event(self.cards[1].id)]), 1)
+
+    def test_database_error_requeues_only_unwritten_events(self):
+        events = [self.event(card.id, minutes=6 - i) for i, card in enumerate(self.cards * 2)]
+        calls = []
+
+        def ingest(chunk):
+            calls.append(len(chunk))
+            if len(calls) == 1:
+                raise ValueError("bad event somewhere")
+            if len(calls) == 3:
+                raise OperationalError("database is locked")
+            ingest_review_events(chunk)
+
+        buffer = ReviewEventBuffer()
+        buffer._events = list(events)
+        with mock.patch('flashcards.ingest.ingest_review_events', ingest), self.assertLogs('flashcards.ingest', 'ERROR'):
+            self.assertEqual(buffer.flush(), 3)
+        # The first half was written; the second half waits for the next flush.
+        self.assertEqual(calls, [6, 3, 3])
+        self.assertEqual(buffer._events, events[3:])
+        self.assertEqual(ReviewEvent.objects.count(), 3)
+
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(buffer._events, [])
+        self.assertEqual(ReviewEvent.objects.count(), 6)
+        self.assertEqual(sorted(CardState.objects.values_list('repetitions', flat=True)), [2, 2, 2])
+
+
+class FlashcardQueryCountTests(TestCase):
+    """ Listing and reading cards costs the same number of queries however many cards there are. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('teacher', password='x')
+        cls.category = StudySkillCategory.objects.create(name='Test skills')
+        cls.skills = [StudySkill.objects.create(category=cls.category, name=f"Skill {i}") for i in range(3)]
+        cls.subject = Subject.objects.create(
+            name='Test biology',
+            curriculum=Curriculum.objects.create(name='Test curriculum'),
+            language=Language.objects.create(name='Test language', code='xx'),
+            level=Subject.Level.SL,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_cards(self, count):
+        for i in range(count):
+            card = Flashcard.objects.create(question=f"Q{i}", answer=f"A{i}", author=self.user, subject=self.subject)
+            card.study_skills.set(self.skills)
+
+    def get_list(self, **params):
+        response = self.client.get(reverse('flashcard-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def assert_list_queries(self, params):
+        # One query for the page, whatever the number of cards and skills on it.
+        for count in (2, 10):
+            self.add_cards(count)
+            with self.assertNumQueries(1):
+                page = self.get_list(**params)
+            self.assertTrue(page['results'])
+
+    def test_list(self):
+        self.assert_list_queries({})
+
+    def test_list_with_several_study_skills(self):
+        self.assert_list_queries({'study_skill': ','.join(str(skill.id) for skill in self.skills)})
+
+    def test_list_with_all_study_skills(self):
+        self.assert_list_queries({'study_skill': [skill.id for skill in self.skills], 'study_skill_match': 'all'})
+
+    def test_list_with_study_skill_category(self):
+        self.assert_list_queries({'study_skill_category': self.category.id})
+
+    def test_cursor_pages(self):
+        self.add_cards(9)
+        page = self.get_list(page_size=2, study_skill_category=self.category.id)
+        seen = [card['id'] for card in page['results']]
+        while page['next']:
+            with self.assertNumQueries(1):
+                response = self.client.get(page['next'])
+            page = response.json()
+            seen.extend(card['id'] for card in page['results'])
+        self.assertEqual(sorted(seen), sorted(Flashcard.objects.values_list('id', flat=True)))
+
+    def test_cursor_pages_are_stable_when_updated_at_ties(self):
+        self.add_cards(7)
+        Flashcard.objects.update(updated_at=timezone.now())
+        seen = []
+        page = self.get_list(page_size=2)
+        seen.extend(card['id'] for card in page['results'])
+        while page['next']:
+            page = self.client.get(page['next']).json()
+            seen.extend(card['id'] for card in page['results'])
+        # Ties are broken by id, newest first.
+        self.assertEqual(seen, sorted(Flashcard.objects.values_list('id', flat=True), reverse=True))
+
+    def test_detail(self):
+        for count in (2, 10):
+            self.add_cards(count)
+            card = Flashcard.objects.latest('id')
+            # The card, then its study skills in one prefetch query.
+            with self.assertNumQueries(2):
+                response = self.client.get(reverse('flashcard-detail', args=[card.id]))
+            self.assertEqual(sorted(response.json()['study_skills']), sorted(skill.id for skill in self.skills))
+
+
+class ImportCardsTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user('staff', password='x', is_staff=True))
+
+    def post(self, **data):
+        upload = SimpleUploadedFile('cards.csv', b'question,answer\nQ,A\n', content_type='text/csv')
+        return self.client.post(reverse('flashcard-import'), {'file': upload, **data}, format='multipart')
+
+    def test_unknown_default_ids_are_rejected(self):
+        missing = Subject.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        response = self.post(subject=missing + 1)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('subject', response.json())
+        self.assertEqual(self.post(language='x').status_code, 400)
+        self.assertFalse(Flashcard.objects.exists())
+
+    def test_rows_are_imported_without_defaults(self):
+        response = self.post(subject='')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 1)
+
+    def test_compressed_anki_collection_is_rejected(self):
+        package = io.BytesIO()
+        with zipfile.ZipFile(package, 'w') as archive:
+            archive.writestr('collection.anki2', b'stub')
+            archive.writestr('collection.anki21b', b'compressed')
+        package.seek(0)
+        with self.assertRaisesMessage(ImportFormatError, 'Anki 2.1.50'):
+            list(iter_apkg_rows(package))
+
+
+class ImportFlashcardsCommandTests(TestCase):
+
+    def setUp(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as source:
+            source.write('question,answer\nQ,A\n')
+        self.addCleanup(os.remove, source.name)
+        self.path = source.name
+
+    def test_unknown_default_ids_are_rejected(self):
+        missing = (Subject.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+        with self.assertRaisesMessage(CommandError, '--subject'):
+            call_command('import_flashcards', self.path, subject=missing, stdout=io.StringIO())
+        self.assertFalse(Flashcard.objects.exists())
+
+    def test_known_default_ids_are_applied(self):
+        subject = Subject.objects.create(
+            name='Test chemistry',
+            curriculum=Curriculum.objects.create(name='Test curriculum'),
+            language=Language.objects.create(name='Test language', code='xx'),
+            level=Subject.Level.HL,
+        )
+        call_command('import_flashcards', self.path, subject=subject.pk, stdout=io.StringIO())
+        self.assertEqual(list(Flashcard.objects.values_list('subject_id', flat=True)), [subject.pk])
+
+
+class FlashcardDuplicateTests(TestCase):
+    QUESTION = "What does photosynthesis produce inside the chloroplasts of plant cells?"
+    ANSWER = "Glucose and oxygen, from light energy, water and carbon dioxide."
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user('writer', password='x'))
+
+    def check(self, question, answer, **data):
+        response = self.client.post(
+            reverse('flashcard-check-duplicates'), {'question': question, 'answer': answer, **data}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return [card['id'] for card in response.json()['duplicates']]
+
+    def test_index_follows_create_update_and_delete(self):
+        response = self.client.post(reverse('flashcard-list'), {'question': self.QUESTION, 'answer': self.ANSWER}, format='json')
+        self.assertEqual(response.status_code, 201)
+        card_id = response.json()['id']
+        self.assertEqual(self.check(self.QUESTION.upper(), self.ANSWER), [card_id])
+        self.assertEqual(self.check(self.QUESTION, self.ANSWER, exclude=card_id), [])
+
+        self.client.patch(
+            reverse('flashcard-detail', args=[card_id]),
+            {'question': "When did the French Revolution begin?", 'answer': "In 1789, with the storming of the Bastille."},
+            format='json',
+        )
+        self.assertEqual(self.check(self.QUESTION, self.ANSWER), [])
+        self.assertEqual(self.check("When did the French Revolution begin?", "In 1789, with the storming of the Bastille!"), [card_id])
+
+        self.assertEqual(self.client.delete(reverse('flashcard-detail', args=[card_id])).status_code, 204)
+        self.assertEqual(self.check("When did the French Revolution begin?", "In 1789, with the storming of the Bastille."), [])
+
+
+class SchedulingTests(SimpleTestCase):
+    NOW = timezone.make_aware(datetime.datetime(2025, 1, 6, 9))
+
+    def review(self, state, grades):
+        history = []
+        for day, grade in enumerate(grades):
+            apply_review(state, grade, reviewed_at=self.NOW + datetime.timedelta(days=day))
+            history.append((state.interval_days, state.ease))
+        return history
+
+    def test_intervals_grow_by_the_ease(self):
+        self.assertEqual(self.review(CardState(), [4, 4, 4, 4]), [(1, 2.5), (6, 2.5), (15, 2.5), (38, 2.5)])
+        self.assertEqual(self.review(CardState(), [5, 5, 5]), [(1, 2.6), (6, 2.7), (16, 2.8)])
+
+    def test_hard_recalls_lower_the_ease(self):
+        self.assertEqual(self.review(CardState(), [3, 3]), [(1, 2.36), (6, 2.22)])
+
+    def test_forgotten_card_is_relearned(self):
+        state = CardState()
+        self.review(state, [4, 4, 4])
+        apply_review(state, 1, reviewed_at=self.NOW)
+        self.assertEqual((state.repetitions, state.interval_days, state.lapses), (0, 0, 1))
+        self.assertEqual(state.due, self.NOW + RELEARN_DELAY)
+        self.assertEqual(state.ease, 1.96)
+        # Relearning restarts the interval sequence.
+        self.assertEqual(self.review(state, [4, 4])[-1][0], 6)
+
+    def test_new_card_failures_are_not_lapses_and_ease_has_a_floor(self):
+        state = CardState()
+        self.review(state, [0] * 5)
+        self.assertEqual((state.lapses, state.ease), (0, MIN_EASE))
+
+
+class SamplingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('student', password='x')
+        cards = [Flashcard.objects.create(question=f"Q{i}", answer=f"A{i}") for i in range(40)]
+        # Holes in the id range, as left by deleted cards.
+        Flashcard.objects.filter(pk__in=[card.pk for card in cards[5:15]]).delete()
+        cls.ids = set(Flashcard.objects.values_list('pk', flat=True))
+
+    def test_seeded_samples_are_reproducible(self):
+        sample = sample_ids(Flashcard.objects.all(), 10, 'seed')
+        self.assertEqual(len(set(sample)), 10)
+        self.assertLessEqual(set(sample), self.ids)
+        self.assertEqual(sample_ids(Flashcard.objects.all(), 10, 'seed'), sample)
+        self.assertNotEqual(sample_ids(Flashcard.objects.all(), 10, 'other seed'), sample)
+
+    def test_small_banks_are_returned_whole(self):
+        self.assertEqual(set(sample_ids(Flashcard.objects.all(), 50, 'seed')), self.ids)
+        self.assertEqual(sample_ids(Flashcard.objects.none(), 5, 'seed'), [])
+
+    def test_samples_are_uniform_over_existing_ids(self):
+        counts = dict.fromkeys(self.ids, 0)
+        for seed in range(600):
+            for card_id in sample_ids(Flashcard.objects.all(), 5, seed):
+                counts[card_id] += 1
+        # 600 * 5 / 30 = 100 draws expected per card.
+        self.assertTrue(all(60 <= count <= 140 for count in counts.values()), counts)
+
+    def test_reservoir_is_uniform(self):
+        counts = [0] * 20
+        for seed in range(2000):
+            for item in reservoir_sample(range(20), 5, random.Random(seed)):
+                counts[item] += 1
+        # 2000 * 5 / 20 = 500 draws expected per item.
+        self.assertTrue(all(400 <= count <= 600 for count in counts), counts)
+
+    def test_sample_endpoint_keeps_the_session_seed(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        first = client.get(reverse('flashcard-sample'), {'size': 5}).json()
+        again = client.get(reverse('flashcard-sample'), {'size': 5}).json()
+        self.assertEqual([card['id'] for card in again['cards']], [card['id'] for card in first['cards']])
+        chosen = client.get(reverse('flashcard-sample'), {'size': 5, 'seed': 'fixed'}).json()
+        self.assertEqual([card['id'] for card in chosen['cards']], sample_ids(Flashcard.objects.all(), 5, 'fixed'))
+
+
+class DeckBundleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('student', password='x')
+        curriculum = Curriculum.objects.create(name='Test curriculum')
+        language = Language.objects.create(name='Test language', code='xx')
+        cls.subject, other = (
+            Subject.objects.create(name=name, curriculum=curriculum, language=language, level=Subject.Level.SL)
+            for name in ('Test chemistry', 'Test physics')
+        )
+        cls.cards = [Flashcard.objects.create(question=f"Q{i}", answer=f"A{i}", subject=cls.subject) for i in range(3)]
+        Flashcard.objects.create(question="Other deck", answer="-", subject=other)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, name, headers=None, **params):
+        return self.client.get(reverse(name), {'subject': self.subject.pk, **params}, headers=headers)
+
+    def test_delta_reproduces_the_new_bundle(self):
+        old = json.loads(self.get('flashcard-bundle').content)
+        self.assertEqual([row[0] for row in old['cards']], [card.pk for card in self.cards])
+
+        added = Flashcard.objects.create(question="Q3", answer="A3", subject=self.subject)
+        edited, removed_id = self.cards[1], self.cards[2].pk
+        edited.question = "Q1 edited"
+        edited.save()
+        self.cards[2].delete()
+
+        delta = json.loads(self.get('flashcard-delta', since=old['hash']).content)
+        new = json.loads(self.get('flashcard-bundle').content)
+        self.assertEqual(delta['hash'], new['hash'])
+        self.assertEqual([row[0] for row in delta['changed']], [edited.pk, added.pk])
+        self.assertEqual(delta['removed'], [removed_id])
+
+        rows = {row[0]: row for row in old['cards']}
+        rows.update((row[0], row) for row in delta['changed'])
+        for card_id in delta['removed']:
+            del rows[card_id]
+        self.assertEqual([rows[card_id] for card_id in sorted(rows)], new['cards'])
+
+    def test_unchanged_deck(self):
+        bundle = self.get('flashcard-bundle')
+        self.assertEqual(self.get('flashcard-bundle', headers={'If-None-Match': bundle['ETag']}).status_code, 304)
+        delta = json.loads(self.get('flashcard-delta', since=json.loads(bundle.content)['hash']).content)
+        self.assertEqual((delta['changed'], delta['removed']), ([], []))
+
+    def test_unknown_bundle_is_gone(self):
+        self.assertEqual(self.get('flashcard-delta', since='0' * 64).status_code, 410)
+        self.assertEqual(self.get('flashcard-delta').status_code, 410)
+        self.assertEqual(self.client.get(reverse('flashcard-delta'), {'since': '0' * 64}).status_code, 400)
+
+    def test_large_bundles_are_gzipped(self):
+        Flashcard.objects.filter(pk=self.cards[0].pk).update(answer="x" * 2000)
+        response = self.get('flashcard-bundle', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content))['cards'][0][2], "x" * 2000)
+        self.assertFalse(self.get('flashcard-bundle').has_header('Content-Encoding'))
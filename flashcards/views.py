@@ -1,14 +1,34 @@
+import io
+
 
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Value
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+from django.http import HttpResponse
 from django.shortcuts import render, get_object_or_404
 from django.urls import reverse
 from django.middleware.csrf import get_token
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
-from .models import Flashcard
-from .serializers import FlashcardListSerializer, FlashcardDetailSerializer
-from core.models import Curriculum, Language, Subject, Label, StudySkillCategory
+from .bundles import build_bundle, build_delta, encode_bundle
+from .importers import FlashcardImporter, ImportFormatError, detect_format, iter_apkg_rows, iter_delimited_rows
+from .ingest import review_buffer
+from .mastery import record_mastery
+from .sampling import sample_ids
+from .models import CardState, Flashcard, ReviewEvent, SkillMastery, TopicMastery
+from .scheduling import apply_review
+from .serializers import (
+    CardStateSerializer, DueCardSerializer, DuplicateCheckSerializer, FlashcardListSerializer,
+    FlashcardDetailSerializer, ImportDefaultsSerializer, ReviewBatchSerializer, ReviewSerializer,
+)
+from core.dedup import find_near_duplicates, index_documents, remove_documents
+from core.models import Curriculum, Language, Subject, Label, StudySkillCategory, get_label_subtree_ids
 
 @login_required
 def flashcard_browser_view(request):
@@ -25,7 +45,9 @@ def flashcard_browser_view(request):
     
     api_urls = {
         'flashcards': reverse('flashcard-list'),
-        'flashcard_delete': reverse('flashcard-detail', args=[0])
+        'flashcard_delete': reverse('flashcard-detail', args=[0]),
+        'bundle': reverse('flashcard-bundle'),
+        'delta': reverse('flashcard-delta'),
     }
     
     context = {
@@ -51,6 +73,7 @@ def flashcard_creator_view(request):
     api_config = {
         'urls': {
             'flashcards': reverse('flashcard-list'),
+            'import': reverse('flashcard-import'),
         },
         'csrf_token': get_token(request)
     }
@@ -67,33 +90,82 @@ def flashcard_detail_view(request, pk):
     flashcard = get_object_or_404(Flashcard, pk=pk)
     return render(request, 'flashcards/flashcard_detail.html', {'flashcard': flashcard})
 
+# Size of a review batch returned by the due-cards endpoint.
+DUE_BATCH_SIZE = 20
+MAX_DUE_BATCH_SIZE = 100
+
+# Size of a random deck drawn by the sampling endpoint.
+SAMPLE_SIZE = 20
+MAX_SAMPLE_SIZE = 200
+
+class FlashcardCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the indexed (updated_at, id) pair, as for the
+    slideshow list: every page costs the same, however deep the client has
+    scrolled. The id breaks ties between cards saved in the same instant
+    (bulk imports), so no page skips or repeats one.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-updated_at', '-id')
+
 class FlashcardViewSet(viewsets.ModelViewSet):
     """
     API endpoint that allows flashcards to be viewed or edited.
+    The list is cursor-paginated.
     """
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FlashcardCursorPagination
 
     def get_serializer_class(self):
         if self.action == 'list':
             return FlashcardListSerializer
         return FlashcardDetailSerializer
 
+    def _id_list(self, name):
+        """ Ids given as `?name=1,2` and/or `?name=1&name=2`. """
+        values = [value for param in self.request.query_params.getlist(name) for value in param.split(',') if value.strip()]
+        try:
+            return [int(value) for value in values]
+        except ValueError:
+            raise ValidationError({name: "Must be a list of ids."})
+
     def get_queryset(self):
-        queryset = Flashcard.objects.select_related(
-            'author', 'subject', 'topic', 'language', 'curriculum'
-        ).all().order_by('-updated_at')
+        queryset = Flashcard.objects.all().order_by('-updated_at', '-id')
+        if self.action == 'list':
+            # The list serializer reads author and subject names.
+            queryset = queryset.select_related('author', 'subject')
+        elif self.action in ('retrieve', 'update', 'partial_update'):
+            # The detail serializer lists the study skills.
+            queryset = queryset.prefetch_related('study_skills')
 
         # Filtering logic
         curriculum_id = self.request.query_params.get('curriculum')
         language_id = self.request.query_params.get('language')
         subject_id = self.request.query_params.get('subject')
         topic_id = self.request.query_params.get('topic')
-        skill_id = self.request.query_params.get('study_skill')
+        topic_tree_id = self.request.query_params.get('topic_tree')
+        skill_ids = self._id_list('study_skill')
+        category_ids = self._id_list('study_skill_category')
 
         if curriculum_id: queryset = queryset.filter(curriculum_id=curriculum_id)
         if language_id: queryset = queryset.filter(language_id=language_id)
         if topic_id: queryset = queryset.filter(topic_id=topic_id)
-        if skill_id: queryset = queryset.filter(study_skills__id=skill_id)
+        # The topic and every sub-topic below it.
+        if topic_tree_id: queryset = queryset.filter(topic_id__in=get_label_subtree_ids(topic_tree_id))
+
+        # Skills are matched with EXISTS subqueries rather than joins, so a
+        # card linked to several matching skills is still listed once.
+        # Several skills match any of them, or all with ?study_skill_match=all.
+        skill_links = Flashcard.study_skills.through.objects.filter(flashcard_id=OuterRef('pk'))
+        if skill_ids and self.request.query_params.get('study_skill_match') == 'all':
+            for skill_id in set(skill_ids):
+                queryset = queryset.filter(Exists(skill_links.filter(studyskill_id=skill_id)))
+        elif skill_ids:
+            queryset = queryset.filter(Exists(skill_links.filter(studyskill_id__in=skill_ids)))
+        if category_ids:
+            queryset = queryset.filter(Exists(skill_links.filter(studyskill__category_id__in=category_ids)))
 
         if subject_id:
             try:
@@ -107,19 +179,298 @@ class FlashcardViewSet(viewsets.ModelViewSet):
         return queryset
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        card = serializer.save(author=self.request.user)
+        index_documents(Flashcard, [(card.pk, card.dedup_text)])
     
     def perform_update(self, serializer):
         from django.core.exceptions import PermissionDenied
         if self.request.user == serializer.instance.author or self.request.user.is_staff:
-            serializer.save()
+            card = serializer.save()
+            index_documents(Flashcard, [(card.pk, card.dedup_text)])
         else:
             raise PermissionDenied("You do not have permission to edit this flashcard.")
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         if request.user == instance.author or request.user.is_staff:
+            remove_documents(Flashcard, [instance.pk])
             self.perform_destroy(instance)
             return Response(status=status.HTTP_204_NO_CONTENT)
         else:
-            return Response(status=status.HTTP_403_FORBIDDEN)
\ No newline at end of file
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+    @action(detail=False, methods=['get'])
+    def due(self, request):
+        """
+        The next `?limit=` cards due for review by the current user, most
+        overdue first. Answered from the (user, due) index, so the cost does
+        not depend on how many cards the user has studied. `?new=` adds up to
+        that many never-reviewed cards when fewer cards are due.
+        """
+        try:
+            limit = int(request.query_params.get('limit', DUE_BATCH_SIZE))
+            new_limit = int(request.query_params.get('new', 0))
+        except ValueError:
+            return Response({"detail": "limit and new must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, MAX_DUE_BATCH_SIZE))
+
+        due_states = list(
+            CardState.objects.filter(user=request.user, due__lte=timezone.now())
+            .select_related('flashcard').order_by('due')[:limit]
+        )
+        cards = DueCardSerializer(due_states, many=True).data
+
+        new_limit = max(0, min(new_limit, limit - len(due_states)))
+        if new_limit:
+            unseen = (
+                self.get_queryset().exclude(states__user=request.user)
+                .order_by('id').only('id', 'question', 'answer')[:new_limit]
+            )
+            cards += [
+                {'id': card.id, 'question': card.question, 'answer': card.answer, 'state': None}
+                for card in unseen
+            ]
+        return Response({'count': len(cards), 'cards': cards})
+
+    @action(detail=True, methods=['post'])
+    def review(self, request, pk=None):
+        """ Records a review of this card by the current user and schedules the next one. """
+        flashcard = self.get_object()
+        serializer = ReviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            state = (
+                CardState.objects.select_for_update().filter(user=request.user, flashcard=flashcard).first()
+                or CardState(user=request.user, flashcard=flashcard)
+            )
+            first_review = state.pk is None
+            apply_review(state, serializer.validated_data['grade'])
+            state.save()
+            ReviewEvent.objects.create(
+                user=request.user, flashcard=flashcard,
+                grade=serializer.validated_data['grade'], reviewed_at=state.last_reviewed_at,
+            )
+            record_mastery([{
+                'user_id': request.user.id,
+                'flashcard_id': flashcard.id,
+                'grade': serializer.validated_data['grade'],
+                'reviewed_at': state.last_reviewed_at,
+                'first_review': first_review,
+            }])
+        return Response(CardStateSerializer(state).data)
+
+    @action(detail=False, methods=['post'])
+    def reviews(self, request):
+        """
+        Accepts a batch of answers {events: [{card, grade, latency_ms,
+        reviewed_at}]} from the current user. Events are buffered and written
+        in batched transactions (see flashcards/ingest.py), so the response is
+        202 and card states are updated within a second.
+        """
+        serializer = ReviewBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        events = serializer.validated_data['events']
+
+        card_ids = {event['card'] for event in events}
+        known = set(Flashcard.objects.filter(id__in=card_ids).values_list('id', flat=True))
+        if card_ids - known:
+            unknown = ', '.join(str(card_id) for card_id in sorted(card_ids - known))
+            return Response({"detail": f"Unknown flashcard(s): {unknown}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        review_buffer.add([
+            {
+                'user_id': request.user.id,
+                'flashcard_id': event['card'],
+                'grade': event['grade'],
+                'latency_ms': event.get('latency_ms'),
+                # Client clocks may run ahead; a review cannot come from the future.
+                'reviewed_at': min(event.get('reviewed_at') or now, now),
+            }
+            for event in events
+        ])
+        return Response({'accepted': len(events)}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['post'], url_path='import', url_name='import')
+    def import_cards(self, request):
+        """
+        Staff only. Imports the uploaded `file` (.csv, .tsv or Anki .apkg) in
+        batches; `subject`, `topic`, `language` and `curriculum` ids apply to
+        rows that do not name their own.
+        """
+        if not request.user.is_staff:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "A file is required."}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get('format') or detect_format(upload.name)
+        if file_format not in ('csv', 'tsv', 'apkg'):
+            return Response({"detail": "Supported formats are .csv, .tsv and .apkg."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Unknown ids are rejected here rather than failing the insert.
+        defaults_serializer = ImportDefaultsSerializer(data=request.data)
+        defaults_serializer.is_valid(raise_exception=True)
+        defaults = {f'{field}_id': value.pk for field, value in defaults_serializer.validated_data.items() if value is not None}
+
+        importer = FlashcardImporter(author=request.user, defaults=defaults)
+        try:
+            if file_format == 'apkg':
+                importer.import_rows(iter_apkg_rows(upload.file))
+            else:
+                text = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+                importer.import_rows(iter_delimited_rows(text, '\t' if file_format == 'tsv' else ','))
+        except (ImportFormatError, UnicodeDecodeError) as exc:
+            return Response({"detail": str(exc), "created": importer.created}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'created': importer.created,
+            'skipped': importer.skipped,
+            'unknown_study_skills': sorted(importer.unknown_skills),
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'])
+    def sample(self, request):
+        """
+        `?size=` random cards matching the usual filters (subject family,
+        topic or `topic_tree`, study_skill). The deck is drawn from the ids of
+        the matching cards with a seeded sampler (see flashcards/sampling.py):
+        `?seed=` picks the deck, and without one the session keeps its own
+        seed, so reloading a study session shows the same cards.
+        """
+        try:
+            size = int(request.query_params.get('size', SAMPLE_SIZE))
+        except ValueError:
+            return Response({"detail": "size must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        size = max(1, min(size, MAX_SAMPLE_SIZE))
+
+        seed = request.query_params.get('seed')
+        if not seed:
+            seed = request.session.get('flashcard_sample_seed')
+            if not seed:
+                seed = request.session['flashcard_sample_seed'] = get_random_string(12)
+
+        ids = sample_ids(self.get_queryset(), size, seed)
+        cards = Flashcard.objects.prefetch_related('study_skills').in_bulk(ids)
+        deck = [cards[card_id] for card_id in ids if card_id in cards]
+        return Response({
+            'seed': seed,
+            'count': len(deck),
+            'cards': FlashcardDetailSerializer(deck, many=True).data,
+        })
+
+    @action(detail=False, methods=['post'], url_path='check-duplicates', url_name='check-duplicates')
+    def check_duplicates(self, request):
+        """
+        Existing cards whose question and answer closely resemble the posted
+        ones, most similar first, looked up in the MinHash index (see
+        core/dedup.py). `exclude` leaves out the card being edited.
+        """
+        serializer = DuplicateCheckSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        exclude = [data['exclude']] if data.get('exclude') else []
+
+        candidate = Flashcard(question=data['question'], answer=data['answer'])
+        matches = find_near_duplicates(Flashcard, candidate.dedup_text, exclude=exclude)
+        cards = Flashcard.objects.select_related('author', 'subject').in_bulk([pk for pk, _ in matches])
+        duplicates = [
+            dict(FlashcardListSerializer(cards[pk]).data, similarity=round(score, 2))
+            for pk, score in matches if pk in cards
+        ]
+        return Response({'count': len(duplicates), 'duplicates': duplicates})
+
+    def _deck_queryset(self, request):
+        """ The cards of the deck named by the filters, or None if no subject or topic is given. """
+        if not any(request.query_params.get(name) for name in ('subject', 'topic', 'topic_tree')):
+            return None
+        return self.get_queryset()
+
+    def _bundle_response(self, request, payload):
+        body, encoding = encode_bundle(payload, request.headers.get('Accept-Encoding', ''))
+        response = HttpResponse(body, content_type='application/json')
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Vary'] = 'Accept-Encoding'
+        return response
+
+    @action(detail=False, methods=['get'])
+    def bundle(self, request):
+        """
+        All the cards of a deck (`?subject=`, `?topic=` or `?topic_tree=`, with
+        the usual filters) as one compact, content-hashed bundle for offline
+        study: {hash, fields, cards: [[...values in `fields` order]]}. The
+        hash is also the ETag; see flashcards/bundles.py.
+        """
+        queryset = self._deck_queryset(request)
+        if queryset is None:
+            return Response({"detail": "A subject or topic is required."}, status=status.HTTP_400_BAD_REQUEST)
+        payload = build_bundle(queryset)
+        etag = f'"{payload["hash"]}"'
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        response = self._bundle_response(request, payload)
+        response['ETag'] = etag
+        return response
+
+    @action(detail=False, methods=['get'])
+    def delta(self, request):
+        """
+        What changed in a deck since the bundle `?since=<hash>`: {hash, since,
+        fields, changed: [rows added or edited], removed: [ids]}. Answers 410
+        when that bundle is unknown, in which case the client fetches the
+        full bundle again.
+        """
+        queryset = self._deck_queryset(request)
+        if queryset is None:
+            return Response({"detail": "A subject or topic is required."}, status=status.HTTP_400_BAD_REQUEST)
+        since = request.query_params.get('since', '')
+        payload = build_delta(queryset, since) if since else None
+        if payload is None:
+            return Response({"detail": "Unknown bundle, fetch the full deck."}, status=status.HTTP_410_GONE)
+        return self._bundle_response(request, payload)
+
+    @action(detail=False, methods=['get'])
+    def mastery(self, request):
+        """
+        Mastery map of students: per topic (sub-topics included) and per
+        study skill, the cards seen, review counts, recall rate, retention
+        estimate and last review, read from the materialized statistics
+        (see flashcards/mastery.py) in one query.
+
+        Students see their own map. Staff can ask for `?student=` ids or a
+        whole class with `?group=` (an auth group). `?subject=` restricts
+        topics to one subject.
+        """
+        student_ids = self._id_list('student')
+        group_ids = self._id_list('group')
+        if not (student_ids or group_ids):
+            student_ids = [request.user.id]
+        elif not request.user.is_staff and (group_ids or set(student_ids) != {request.user.id}):
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        students = User.objects.filter(id__in=student_ids)
+        if group_ids:
+            students = students | User.objects.filter(groups__id__in=group_ids)
+        students = {user_id: username for user_id, username in students.distinct().values_list('id', 'username')}
+
+        columns = ('kind', 'user_id', 'group_id', 'cards_seen', 'reviews', 'successes', 'retention', 'last_reviewed_at')
+        topics = TopicMastery.objects.filter(user_id__in=students).annotate(kind=Value('topic'))
+        subject_id = request.query_params.get('subject')
+        if subject_id:
+            topics = topics.filter(topic__subject_id=subject_id)
+        skills = SkillMastery.objects.filter(user_id__in=students).annotate(kind=Value('skill'))
+        rows = topics.annotate(group_id=F('topic_id')).values_list(*columns).union(
+            skills.annotate(group_id=F('study_skill_id')).values_list(*columns), all=True,
+        )
+
+        maps = {user_id: {'id': user_id, 'username': username, 'topics': [], 'skills': []} for user_id, username in students.items()}
+        for kind, user_id, group_id, cards_seen, reviews, successes, retention, last_reviewed_at in rows:
+            maps[user_id]['topics' if kind == 'topic' else 'skills'].append({
+                kind: group_id,
+                'cards_seen': cards_seen,
+                'reviews': reviews,
+                'success_rate': round(successes / reviews, 3) if reviews else None,
+                'retention': round(retention, 3),
+                'last_reviewed_at': last_reviewed_at,
+            })
+        return Response({'students': [maps[user_id] for user_id in sorted(maps)]})
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import StudyPlan, ScheduledSession
+from .models import StudyPlan, ScheduledSession, VacationPeriod
 
 class ScheduledSessionInline(admin.TabularInline):
     model = ScheduledSession
@@ -58,6 +58,9 @@ class StudyPlanAdmin(admin.ModelAdmin):
     def view_sessions_link(self, obj):
         from django.urls import reverse
         from django.utils.html import format_html
+        if obj.compact_schedule is not None:
+            hours = sum(run[1] for run in obj.compact_schedule.get('runs', []))
+            return f"{hours} session(s), {len(obj.compact_schedule.get('runs', []))} block(s) (compact)"
         count = obj.sessions.count()
         if count == 0:
             return "No sessions"
@@ -87,3 +90,10 @@ class ScheduledSessionAdmin(admin.ModelAdmin):
     study_plan_link.short_description = 'Study Plan'
     study_plan_link.admin_order_field = 'study_plan__name'
 
+
+@admin.register(VacationPeriod)
+class VacationPeriodAdmin(admin.ModelAdmin):
+    list_display = ('name', 'curriculum', 'start_date', 'end_date')
+    list_filter = ('curriculum',)
+    search_fields = ('name',)
+    date_hierarchy = 'start_date'
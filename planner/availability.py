@@ -0,0 +1,67 @@
+# planner/availability.py
+"""
+Weekly availability as a bitmask.
+
+The planner page edits availability as {"Monday": {"07:00": true, ...}, ...}.
+Plans store it as `availabilityMask`: seven integers, Monday first, where
+bit h is set when the student can study from h:00 to h+1:00. The JSON form
+is rebuilt for the page by the serializer.
+"""
+
+DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Hours shown by the planner page (7:00 to 22:00 starts).
+PLANNER_HOURS = range(7, 23)
+HOURS_IN_DAY = [f"{hour:02d}:00" for hour in PLANNER_HOURS]
+
+MASK_KEY = 'availabilityMask'
+
+
+def availability_to_mask(availability):
+    """ The seven day masks of an availability dict; unknown days and hours are ignored. """
+    mask = []
+    for day in DAYS_OF_WEEK:
+        day_availability = availability.get(day) or {}
+        bits = 0
+        for hour in PLANNER_HOURS:
+            if day_availability.get(HOURS_IN_DAY[hour - PLANNER_HOURS.start]):
+                bits |= 1 << hour
+        mask.append(bits)
+    return mask
+
+
+def mask_to_availability(mask):
+    """ The availability dict of seven day masks, with every planner hour present. """
+    return {
+        day: {label: bool(bits >> hour & 1) for hour, label in zip(PLANNER_HOURS, HOURS_IN_DAY)}
+        for day, bits in zip(DAYS_OF_WEEK, mask)
+    }
+
+
+def hours_by_weekday(mask):
+    """ The available hours of each weekday (0 = Monday), as tuples of ints. """
+    return tuple(tuple(hour for hour in range(24) if bits >> hour & 1) for bits in mask)
+
+
+def config_mask(config):
+    """ The availability mask of a plan config, in either stored or page form. """
+    mask = config.get(MASK_KEY)
+    if isinstance(mask, list) and len(mask) == len(DAYS_OF_WEEK):
+        return [int(bits) for bits in mask]
+    return availability_to_mask(config.get('availability') or {})
+
+
+def compact_config(config):
+    """ The config to store: the availability dict replaced by its mask. """
+    compact = {key: value for key, value in config.items() if key != 'availability'}
+    compact[MASK_KEY] = config_mask(config)
+    return compact
+
+
+def expand_config(config):
+    """ The config sent to the page: the mask turned back into the availability dict. """
+    if MASK_KEY not in config:
+        return config
+    expanded = {key: value for key, value in config.items() if key != MASK_KEY}
+    expanded['availability'] = mask_to_availability(config_mask(config))
+    return expanded
@@ -0,0 +1,97 @@
+# planner/compact.py
+"""
+Run-length encoded schedules.
+
+A plan in compact storage keeps its sessions in StudyPlan.compact_schedule
+instead of one ScheduledSession row per hour:
+
+    {"subjects": [[name, color, local id], ...],
+     "runs": [[first hour, number of hours, subject index], ...]}
+
+Hours are counted from the Unix epoch (UTC), and a run is a block of
+back-to-back one-hour sessions of the same subject. Names and colors are
+written once per subject, so even a schedule that alternates subjects every
+hour costs three small integers per run instead of a row per session.
+"""
+import datetime
+import math
+from bisect import bisect_left
+from operator import itemgetter
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+SESSION_LENGTH = datetime.timedelta(hours=1)
+
+
+def _hour(moment):
+    seconds = (moment - EPOCH).total_seconds()
+    if seconds % 3600:
+        raise ValueError(f"Sessions must start on the hour: {moment.isoformat()}.")
+    return int(seconds) // 3600
+
+
+def _bound(moment):
+    """ The first hour starting at or after `moment`. """
+    return math.ceil((moment - EPOCH).total_seconds() / 3600)
+
+
+def encode_sessions(sessions):
+    """
+    The compact schedule of `sessions` (dicts with subject_name,
+    subject_color, start_time, end_time and subject_local_id). Raises
+    ValueError for sessions that are not one hour long and on the hour.
+    """
+    subjects = []
+    subject_indexes = {}
+    runs = []
+    for session in sorted(sessions, key=lambda session: session['start_time']):
+        if session['end_time'] - session['start_time'] != SESSION_LENGTH:
+            raise ValueError(f"Sessions must last one hour: {session['start_time'].isoformat()}.")
+        subject = (session['subject_name'], session.get('subject_color') or '#808080', session.get('subject_local_id'))
+        index = subject_indexes.get(subject)
+        if index is None:
+            index = subject_indexes[subject] = len(subjects)
+            subjects.append(list(subject))
+
+        hour = _hour(session['start_time'])
+        if runs and runs[-1][2] == index and runs[-1][0] + runs[-1][1] == hour:
+            runs[-1][1] += 1
+        else:
+            runs.append([hour, 1, index])
+    return {'subjects': subjects, 'runs': runs}
+
+
+def expand_sessions(compact, start=None, end=None):
+    """
+    The one-hour sessions of a compact schedule, in order, limited to those
+    starting in [start, end) when given.
+    """
+    first = _bound(start) if start is not None else None
+    last = _bound(end) if end is not None else None
+    subjects = compact.get('subjects', [])
+    runs = compact.get('runs', [])
+    position = 0
+    if first is not None:
+        # Runs are sorted by first hour: skip those ending before the window.
+        position = bisect_left(runs, first, key=itemgetter(0))
+        while position and runs[position - 1][0] + runs[position - 1][1] > first:
+            position -= 1
+    sessions = []
+    for run_start, hours, index in runs[position:]:
+        if last is not None and run_start >= last:
+            break
+        run_end = run_start + hours
+        if first is not None:
+            run_start = max(run_start, first)
+        if last is not None:
+            run_end = min(run_end, last)
+        name, color, local_id = subjects[index]
+        for hour in range(run_start, run_end):
+            start_time = EPOCH + datetime.timedelta(hours=hour)
+            sessions.append({
+                'subject_name': name,
+                'subject_color': color,
+                'start_time': start_time,
+                'end_time': start_time + SESSION_LENGTH,
+                'subject_local_id': local_id,
+            })
+    return sessions
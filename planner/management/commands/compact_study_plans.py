@@ -0,0 +1,36 @@
+# planner/management/commands/compact_study_plans.py
+
+from django.core.management.base import BaseCommand
+
+from planner.models import StudyPlan
+from planner.services import set_compact_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the sessions of study plans into compact (run-length encoded) storage, "
+        "or back to one ScheduledSession row per hour with --expand."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--expand', action='store_true', help="Convert compact plans back to session rows.")
+        parser.add_argument('--student', action='append', help="Only the plan of this username (repeatable).")
+
+    def handle(self, *args, **options):
+        compact = not options['expand']
+        plans = StudyPlan.objects.filter(compact_schedule__isnull=compact).order_by('pk')
+        if options['student']:
+            plans = plans.filter(student__username__in=options['student'])
+
+        converted = skipped = 0
+        for plan in plans.iterator(chunk_size=100):
+            try:
+                set_compact_storage(plan, compact)
+            except ValueError as exc:
+                skipped += 1
+                self.stderr.write(f"Plan {plan.pk} ({plan.student_id}) left unchanged: {exc}")
+                continue
+            converted += 1
+
+        target = "compact storage" if compact else "session rows"
+        self.stdout.write(self.style.SUCCESS(f"Moved {converted} plan(s) to {target}, skipped {skipped}."))
@@ -0,0 +1,183 @@
+# planner/management/commands/import_legacy_schedules.py
+
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.legacy import NaturalKeyResolver
+from core.models import Subject
+from core.streaming import batched, iter_json_array
+from planner.availability import compact_config
+from planner.models import ScheduledSession, StudyPlan
+
+DEFAULT_PATH = settings.BASE_DIR / 'init' / 'schedule_projects_master.json'
+
+# Legacy sessions are one-hour slots stored as a UTC date and hour, like the planner's.
+SESSION_LENGTH = timedelta(hours=1)
+
+# Legacy subjects carry a numeric weight instead of a priority: a subject
+# gets 'high' from this share of the plan's largest weight, then 'medium'.
+LEGACY_WEIGHT_PRIORITIES = [(2 / 3, 'high'), (1 / 3, 'medium')]
+LEVEL_DISPLAY = {Subject.Level.SL: 'SL', Subject.Level.HL: 'HL'}
+
+
+def _as_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _priority(weight, max_weight):
+    if weight <= 0 or max_weight <= 0:
+        return 'none'
+    for share, priority in LEGACY_WEIGHT_PRIORITIES:
+        if weight >= share * max_weight:
+            return priority
+    return 'low'
+
+
+def _resolve_subjects(config, resolver):
+    """ The current subject id of each legacy subject entry of `config` (None if unknown). """
+    curriculum_id = resolver.curriculum_id(config.get('curriculumId'))
+    language_id = resolver.language_id(config.get('languageId'))
+    return [
+        resolver.subject_id(subject.get('name'), subject.get('pk'), curriculum_id, language_id)
+        for subject in config.get('subjects') or []
+    ]
+
+
+def _plan_config(config, subject_ids, subjects):
+    """
+    Maps a legacy plan config to the planner's: subjects point to current
+    subject ids and carry a priority and the details the page shows, the
+    legacy curriculumId/languageId are dropped and availability is stored as
+    a mask. Unresolved subjects are kept without a pk, as on the page.
+    `subjects` maps subject ids to (name, level, curriculum name, language code).
+    """
+    legacy_subjects = config.get('subjects') or []
+    max_weight = max((_as_number(subject.get('weight')) for subject in legacy_subjects), default=0)
+    plan_subjects = []
+    for legacy, subject_id in zip(legacy_subjects, subject_ids):
+        name, level, curriculum_name, language_code = subjects.get(subject_id, (legacy.get('name') or '', None, '', ''))
+        plan_subjects.append({
+            'localId': legacy.get('localId'),
+            'pk': str(subject_id) if subject_id in subjects else '',
+            'name': name,
+            'examDate': legacy.get('examDate') or '',
+            'priority': legacy.get('priority') or _priority(_as_number(legacy.get('weight')), max_weight),
+            'color': (legacy.get('color') or '#808080')[:7],
+            'curriculum_name': curriculum_name,
+            'language_code': language_code,
+            'level': level,
+            'level_display': LEVEL_DISPLAY.get(level, 'Other') if level else '',
+        })
+    other = {key: value for key, value in config.items() if key not in ('subjects', 'curriculumId', 'languageId')}
+    return compact_config({**other, 'subjects': plan_subjects})
+
+
+def _session(plan, entry):
+    """ Maps a legacy {date, time, subjectId, subjectName, color} entry, or returns None. """
+    try:
+        start = datetime.strptime(f"{entry['date']} {entry['time']}", '%Y-%m-%d %H:%M').replace(tzinfo=timezone.utc)
+    except (KeyError, TypeError, ValueError):
+        return None
+    subject_local_id = entry.get('subjectId')
+    return ScheduledSession(
+        study_plan=plan,
+        subject_name=(entry.get('subjectName') or '')[:200],
+        subject_color=(entry.get('color') or '#808080')[:7],
+        start_time=start,
+        end_time=start + SESSION_LENGTH,
+        subject_local_id=subject_local_id if isinstance(subject_local_id, int) else None,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams a legacy schedule archive ([{studentUsername, projectName, config, schedule}]) "
+        "into study plans and scheduled sessions, with batched bulk inserts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=str(DEFAULT_PATH), help="Archive to import.")
+        parser.add_argument('--batch-size', type=int, default=200, help="Plans inserted per transaction (default: 200).")
+        parser.add_argument('--replace', action='store_true',
+                            help="Replace the existing plan of a student instead of skipping it.")
+
+    def handle(self, *args, **options):
+        resolver = NaturalKeyResolver()
+        self.plans = self.sessions = self.skipped = self.invalid_sessions = 0
+        started = time.perf_counter()
+        try:
+            with open(options['path'], encoding='utf-8') as archive:
+                for batch in batched(iter_json_array(archive), max(1, options['batch_size'])):
+                    self._import_batch(batch, resolver, options['replace'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Could not read {options['path']}: {exc}")
+        elapsed = max(time.perf_counter() - started, 1e-9)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.plans} plan(s) and {self.sessions} session(s), skipped {self.skipped} plan(s) "
+            f"and {self.invalid_sessions} invalid session(s), in {elapsed:.2f}s "
+            f"({self.plans / elapsed:.0f} plans/s, {self.sessions / elapsed:.0f} sessions/s)."
+        ))
+
+    def _import_batch(self, items, resolver, replace):
+        students = resolver.user_ids({item.get('studentUsername') for item in items})
+
+        # A student has at most one plan; the last entry of the archive wins within a batch.
+        entries = {}
+        for item in items:
+            student_id = students.get(item.get('studentUsername'))
+            if student_id is None:
+                self.skipped += 1
+                continue
+            if student_id in entries:
+                self.skipped += 1
+            entries[student_id] = item
+
+        with transaction.atomic():
+            existing = StudyPlan.objects.filter(student_id__in=entries)
+            if replace:
+                existing.delete()
+            else:
+                for student_id in existing.values_list('student_id', flat=True):
+                    del entries[student_id]
+                    self.skipped += 1
+            if not entries:
+                return
+
+            configs = [item.get('config') or {} for item in entries.values()]
+            subject_ids = [_resolve_subjects(config, resolver) for config in configs]
+            subjects = {
+                pk: (name, level, curriculum_name, language_code)
+                for pk, name, level, curriculum_name, language_code in Subject.objects.filter(
+                    pk__in={pk for ids in subject_ids for pk in ids if pk}
+                ).values_list('id', 'name', 'level', 'curriculum__name', 'language__code')
+            }
+            plans = [
+                StudyPlan(
+                    student_id=student_id,
+                    name=(item.get('projectName') or 'My Study Plan')[:255],
+                    config=_plan_config(config, ids, subjects),
+                )
+                for (student_id, item), config, ids in zip(entries.items(), configs, subject_ids)
+            ]
+            StudyPlan.objects.bulk_create(plans)
+
+            sessions = []
+            for plan, item in zip(plans, entries.values()):
+                for entry in item.get('schedule') or []:
+                    session = _session(plan, entry)
+                    if session is None:
+                        self.invalid_sessions += 1
+                    else:
+                        sessions.append(session)
+            ScheduledSession.objects.bulk_create(sessions, batch_size=1000)
+
+        self.plans += len(plans)
+        self.sessions += len(sessions)
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.17 on 2026-10-19 04:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_contentsignature_contentsignatureband'),
+        ('planner', '0002_alter_scheduledsession_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VacationPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=200)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(help_text='Last day of the holidays (included).')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('curriculum', models.ForeignKey(blank=True, help_text='Leave empty for holidays shared by every curriculum.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='vacation_periods', to='core.curriculum')),
+            ],
+            options={
+                'verbose_name': 'Vacation Period',
+                'verbose_name_plural': 'Vacation Periods',
+                'ordering': ['start_date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='vacationperiod',
+            constraint=models.CheckConstraint(check=models.Q(('end_date__gte', models.F('start_date'))), name='planner_vacation_dates_ordered'),
+        ),
+    ]
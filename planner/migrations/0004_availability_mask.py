@@ -0,0 +1,68 @@
+from django.db import migrations
+
+# Frozen copy of the conversions of planner.availability as of this
+# migration, so later changes to that module do not change what it writes.
+DAYS_OF_WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+PLANNER_HOURS = range(7, 23)
+MASK_KEY = "availabilityMask"
+
+
+def _label(hour):
+    return f"{hour:02d}:00"
+
+
+def _config_mask(config):
+    mask = config.get(MASK_KEY)
+    if isinstance(mask, list) and len(mask) == len(DAYS_OF_WEEK):
+        return [int(bits) for bits in mask]
+    availability = config.get("availability") or {}
+    mask = []
+    for day in DAYS_OF_WEEK:
+        day_availability = availability.get(day) or {}
+        mask.append(sum(1 << hour for hour in PLANNER_HOURS if day_availability.get(_label(hour))))
+    return mask
+
+
+def _compact_config(config):
+    compact = {key: value for key, value in config.items() if key != "availability"}
+    compact[MASK_KEY] = _config_mask(config)
+    return compact
+
+
+def _expand_config(config):
+    if MASK_KEY not in config:
+        return config
+    expanded = {key: value for key, value in config.items() if key != MASK_KEY}
+    expanded["availability"] = {
+        day: {_label(hour): bool(bits >> hour & 1) for hour in PLANNER_HOURS}
+        for day, bits in zip(DAYS_OF_WEEK, _config_mask(config))
+    }
+    return expanded
+
+
+def compact_availability(apps, schema_editor):
+    """ Replaces the availability dict of existing plans by its bitmask. """
+    StudyPlan = apps.get_model("planner", "StudyPlan")
+    plans = list(StudyPlan.objects.only("id", "config"))
+    for plan in plans:
+        plan.config = _compact_config(plan.config or {})
+    StudyPlan.objects.bulk_update(plans, ["config"], batch_size=500)
+
+
+def expand_availability(apps, schema_editor):
+    StudyPlan = apps.get_model("planner", "StudyPlan")
+    plans = list(StudyPlan.objects.only("id", "config"))
+    for plan in plans:
+        plan.config = _expand_config(plan.config or {})
+    StudyPlan.objects.bulk_update(plans, ["config"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("planner", "0003_vacationperiod"),
+    ]
+
+    operations = [
+        migrations.RunPython(compact_availability, expand_availability),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.17 on 2026-10-19 04:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0004_availability_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studyplan',
+            name='compact_schedule',
+            field=models.JSONField(blank=True, help_text='Run-length encoded sessions, when the plan uses compact storage.', null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.17 on 2026-10-19 04:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0005_studyplan_compact_schedule'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scheduledsession',
+            index=models.Index(fields=['study_plan', 'start_time'], name='planner_session_plan_start_idx'),
+        ),
+    ]
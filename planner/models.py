@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from core.models import Curriculum
 # Curriculum is not directly on StudyPlan, but through Subject in config
 
 class StudyPlan(models.Model):
@@ -21,9 +22,15 @@ class StudyPlan(models.Model):
     # config will store:
     # {
     #   "subjects": [ { "localId": 0, "pk": "1", "name": "Math HL", "examDate": "2025-05-20", "priority": "high", "color": "#3498db", "level_display": "HL" }, ... ],
-    #   "availability": { "Monday": { "07:00": false, ... }, ... }
+    #   "availabilityMask": [128, ...]  (one int per weekday, Monday first; bit h = free from h:00, see planner/availability.py)
     # }
     config = models.JSONField(default=dict, help_text="Configuration of subjects, exam dates, priorities, availability...")
+    # Compact storage (see planner/compact.py): the sessions as run-length encoded
+    # blocks instead of ScheduledSession rows. None means the plan uses rows.
+    compact_schedule = models.JSONField(
+        null=True, blank=True,
+        help_text="Run-length encoded sessions, when the plan uses compact storage.",
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -45,8 +52,39 @@ class ScheduledSession(models.Model):
 
     class Meta:
         ordering = ['start_time']
+        indexes = [
+            # Serves the sessions of a plan in a date window (StudyPlanViewSet.sessions).
+            models.Index(fields=['study_plan', 'start_time'], name='planner_session_plan_start_idx'),
+        ]
         verbose_name = "Scheduled Session"
         verbose_name_plural = "Scheduled Sessions"
 
     def __str__(self):
         return f"{self.subject_name} for {self.study_plan.student.username} at {self.start_time.strftime('%Y-%m-%d %H:%M')}"
+
+
+class VacationPeriod(models.Model):
+    """
+    School holidays: generated schedules use the vacation hours on these
+    days instead of the weekly availability. A period without curriculum
+    applies to every plan.
+    """
+    name = models.CharField(max_length=200, blank=True)
+    curriculum = models.ForeignKey(
+        Curriculum, null=True, blank=True, on_delete=models.CASCADE, related_name='vacation_periods',
+        help_text="Leave empty for holidays shared by every curriculum.",
+    )
+    start_date = models.DateField()
+    end_date = models.DateField(help_text="Last day of the holidays (included).")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['start_date']
+        verbose_name = "Vacation Period"
+        verbose_name_plural = "Vacation Periods"
+        constraints = [
+            models.CheckConstraint(check=models.Q(end_date__gte=models.F('start_date')), name='planner_vacation_dates_ordered'),
+        ]
+
+    def __str__(self):
+        return f"{self.name or 'Vacation'} ({self.start_date} - {self.end_date})"
@@ -1,6 +1,10 @@
+from django.db import transaction
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from .availability import compact_config, expand_config
 from .models import StudyPlan, ScheduledSession
+from .compact import encode_sessions
+from .services import load_sessions, set_compact_storage, store_sessions
 
 class ScheduledSessionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,7 +17,11 @@ class StudyPlanSerializer(serializers.ModelSerializer):
     # Nested serializer for sessions related to this study plan
     # 'required=False' means sessions don't have to be provided on create/update
     # 'allow_null=True' can be used if an empty list of sessions should be treated as null by the DB (not typical for JSONField)
-    sessions = ScheduledSessionSerializer(many=True, required=False) 
+    # Written through this field, but read in to_representation(), which also
+    # serves plans kept in compact storage.
+    sessions = ScheduledSessionSerializer(many=True, required=False, write_only=True)
+    # True to keep the sessions run-length encoded on the plan instead of one row per hour.
+    compact_sessions = serializers.BooleanField(required=False, write_only=True)
     student_username = serializers.CharField(source='student.username', read_only=True)
     # The 'student' field itself is a PrimaryKeyRelatedField by default for ForeignKeys/OneToOneFields.
     # We will make it read-only in the serializer if it's always set by the view based on the request.user
@@ -31,27 +39,73 @@ class StudyPlanSerializer(serializers.ModelSerializer):
             'student_username', 
             'config', 
             'sessions', 
+            'compact_sessions',
             'created_at', 
             'updated_at'
         ]
         read_only_fields = ['id', 'student_username', 'created_at', 'updated_at']
 
-    def _handle_sessions(self, study_plan_instance, sessions_data):
+    def validate_config(self, value):
         """
-        Helper method to delete old sessions and create new ones.
+        Stores availability as its weekly bitmask rather than the page's
+        day -> {"HH:MM": bool} dict; to_representation() expands it back.
         """
-        # Clear existing sessions associated with this study plan
-        study_plan_instance.sessions.all().delete()
-        if sessions_data: # Check if sessions_data is provided and not empty
-            for session_data in sessions_data:
-                ScheduledSession.objects.create(study_plan=study_plan_instance, **session_data)
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("The plan configuration must be an object.")
+        return compact_config(value)
 
+    def to_representation(self, instance):
+        """
+        Sessions are sent one per hour, or as the run-length encoded
+        `session_runs` (see planner/compact.py) when the request asks for
+        ?session_format=runs, which is several times smaller for long plans.
+        With ?session_format=none they are left out, for clients reading them
+        a few weeks at a time from StudyPlanViewSet.sessions.
+        """
+        data = super().to_representation(instance)
+        data['config'] = expand_config(data['config'] or {})
+        data['compact_sessions'] = instance.compact_schedule is not None
+        request = self.context.get('request')
+        session_format = request.query_params.get('session_format') if request is not None else None
+        if session_format == 'none':
+            return data
+        if session_format == 'runs':
+            if instance.compact_schedule is not None:
+                data['session_runs'] = instance.compact_schedule
+                return data
+            try:
+                data['session_runs'] = encode_sessions(load_sessions(instance))
+                return data
+            except ValueError:
+                pass  # Sessions that are not whole hours are sent one by one.
+        if instance.compact_schedule is not None:
+            data['sessions'] = ScheduledSessionSerializer(load_sessions(instance), many=True).data
+        else:
+            data['sessions'] = ScheduledSessionSerializer(instance.sessions.all(), many=True).data
+        return data
+
+    def _handle_sessions(self, study_plan_instance, sessions_data, compact=None):
+        """
+        Makes the plan's sessions match `sessions_data`, writing only the
+        difference (see planner.services.store_sessions), and switches the
+        plan to or from compact storage when `compact` is given.
+        """
+        try:
+            if compact is None:
+                store_sessions(study_plan_instance, sessions_data)
+            else:
+                set_compact_storage(study_plan_instance, compact, sessions_data)
+        except ValueError as exc:
+            raise serializers.ValidationError({"sessions": str(exc)})
+
+    @transaction.atomic
     def create(self, validated_data):
         """
         Handles creation of a new StudyPlan and its associated ScheduledSessions.
         The 'student' field is expected to be in validated_data, set by the view.
         """
         sessions_data = validated_data.pop('sessions', [])
+        compact = validated_data.pop('compact_sessions', None)
         
         # The view's perform_create or create method should ensure the 'student' is correctly set
         # and that a plan for this student doesn't already exist (due to OneToOneField).
@@ -72,14 +126,16 @@ class StudyPlanSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"student": "A study plan already exists for this student. Updates should be done via PUT."})
 
         study_plan = StudyPlan.objects.create(**validated_data)
-        self._handle_sessions(study_plan, sessions_data)
+        self._handle_sessions(study_plan, sessions_data, compact)
         return study_plan
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """
         Handles updates to an existing StudyPlan and its ScheduledSessions.
         """
         sessions_data = validated_data.pop('sessions', None) # Use None to detect if 'sessions' key was passed
+        compact = validated_data.pop('compact_sessions', None)
 
         # Update StudyPlan fields from validated_data
         instance.name = validated_data.get('name', instance.name)
@@ -92,8 +148,9 @@ class StudyPlanSerializer(serializers.ModelSerializer):
             
         instance.save()
 
-        # Only update sessions if the 'sessions' key was explicitly provided in the request data
-        if sessions_data is not None:
-            self._handle_sessions(instance, sessions_data)
+        # Only update sessions if the 'sessions' key was explicitly provided in the request data,
+        # or convert the stored ones when only the storage mode changes.
+        if sessions_data is not None or compact is not None:
+            self._handle_sessions(instance, sessions_data, compact)
         
         return instance
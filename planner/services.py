@@ -1,102 +1,351 @@
 # planner/services.py
 import datetime
+import heapq
+import math
+from bisect import bisect_left
+
+from django.db import transaction
+
+from .availability import DAYS_OF_WEEK, config_mask, hours_by_weekday
+from .compact import encode_sessions, expand_sessions
+from .models import ScheduledSession
+from .vacations import VacationCalendar
+
+PRIORITY_VALUES = {'high': 30, 'medium': 20, 'low': 10, 'none': 0}
+
+# Pendant les vacances, on révise le matin et l'après-midi quelle que soit la disponibilité.
+VACATION_HOURS = (9, 10, 11, 14, 15, 16)
+
+# Au-delà, on laisse la place à la matière suivante si une autre est éligible.
+MAX_CONSECUTIVE_HOURS = 2
+
+DEFAULT_SUBJECT_COLOR = '#808080'
+
+
+class ScheduleConfigError(ValueError):
+    """ La configuration du plan ne permet pas de générer un planning. """
+
+
+class _SubjectState:
+    """ Avancement d'une matière pendant la génération. """
+    __slots__ = ('index', 'subject', 'exam_day', 'target', 'assigned', 'consecutive', 'version')
+
+    def __init__(self, index, subject, exam_day, target):
+        self.index = index
+        self.subject = subject
+        self.exam_day = exam_day  # Ordinal de la date d'examen.
+        self.target = target
+        self.assigned = 0
+        self.consecutive = 0
+        # Incrémentée à chaque changement de clé : les entrées plus anciennes du tas sont ignorées.
+        self.version = 0
+
+    def entry(self):
+        """
+        Entrée du tas : l'examen le plus proche d'abord, puis la plus grande part
+        de créneaux restant à placer, puis le moins d'heures d'affilée, puis
+        l'ordre de la configuration (le tri du client est stable).
+        """
+        remaining_ratio = (self.target - self.assigned) / (self.target or 1)
+        return (self.exam_day, -remaining_ratio, self.consecutive, self.index, self.version)
+
 
 class ScheduleGenerator:
     """
     Logique métier pour la génération d'un planning d'étude.
+
+    Mêmes règles que la génération côté client du planificateur : chaque
+    matière reçoit une part des créneaux proportionnelle à sa priorité, et
+    chaque créneau va à la matière éligible dont l'examen est le plus proche,
+    puis à celle qui a le plus de retard, sans dépasser MAX_CONSECUTIVE_HOURS
+    heures d'affilée quand une autre matière peut prendre le relais.
+
+    `vacation_periods` est un VacationCalendar, ou une liste au format de la
+    page (dates "AAAA-MM-JJ" ou dictionnaires {"start", "end"}).
+
+    Les matières sont rangées dans un tas : seules la matière choisie et celle
+    dont la série d'heures s'interrompt changent de clé à chaque créneau, d'où
+    un coût en O(créneaux · log matières).
     """
-    def __init__(self, plan_config, vacation_periods):
+    def __init__(self, plan_config, vacation_periods=(), start_date=None):
         self.config = plan_config
+        if not isinstance(vacation_periods, VacationCalendar):
+            vacation_periods = VacationCalendar.from_periods(vacation_periods)
         self.vacations = vacation_periods
+        self.start_date = start_date or datetime.datetime.now(datetime.timezone.utc).date()
 
     def is_date_in_vacation(self, date_obj):
-        date_str = date_obj.strftime('%Y-%m-%d')
-        for period in self.vacations:
-            if isinstance(period, str) and period == date_str:
-                return True
-            if isinstance(period, dict) and period['start'] <= date_str <= period['end']:
-                return True
-        return False
-
-    def generate(self):
+        return self.vacations.contains_ordinal(date_obj.toordinal())
+
+    def subjects_to_plan(self):
+        """
+        Les matières à planifier et leur date d'examen, validées comme sur la page.
+        Lève ScheduleConfigError si la configuration est incomplète.
+        """
+        subjects = [
+            s for s in self.config.get('subjects', [])
+            if s.get('pk') and s.get('priority') != 'none'
+        ]
+        if not subjects:
+            raise ScheduleConfigError("Please select at least one subject with a priority other than 'None'.")
+        missing = [s.get('name', '') for s in subjects if not s.get('examDate')]
+        if missing:
+            raise ScheduleConfigError(f"Please enter an exam date for: {', '.join(missing)}.")
+        if not sum(PRIORITY_VALUES.get(s.get('priority'), 0) for s in subjects):
+            raise ScheduleConfigError("The total priority weight is 0. Please assign valid priorities (Low, Medium, or High).")
+
+        planned = []
+        for subject in subjects:
+            try:
+                exam_date = datetime.date.fromisoformat(subject['examDate'])
+            except (TypeError, ValueError):
+                raise ScheduleConfigError(f"Invalid exam date for {subject.get('name', '')}: {subject['examDate']!r}.")
+            planned.append((subject, exam_date))
+        return planned
+
+    def available_slots(self, end_date):
+        """
+        Les créneaux (ordinal du jour, heure) disponibles du premier jour du
+        plan jusqu'à `end_date`. Les heures de chaque jour de la semaine sont
+        calculées une fois à partir du masque de disponibilité.
+        """
+        weekly_hours = hours_by_weekday(config_mask(self.config))
+        in_vacation = self.vacations.contains_ordinal
+        slots = []
+        for ordinal in range(self.start_date.toordinal(), end_date.toordinal() + 1):
+            # L'ordinal 1 (1er janvier de l'an 1) est un lundi.
+            hours = VACATION_HOURS if in_vacation(ordinal) else weekly_hours[(ordinal - 1) % 7]
+            slots.extend((ordinal, hour) for hour in hours)
+        return slots
+
+    def generate(self, since=None, kept_sessions=()):
         """
         Génère une liste de sessions d'étude basées sur la configuration.
         Retourne une liste de dictionnaires.
-        """
-        subjects_config = self.config.get('subjects', [])
-        availability = self.config.get('availability', {})
-        days_of_week = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
 
-        if not subjects_config:
+        Mode incrémental : avec `since` (une date), seules les sessions à
+        partir de ce jour sont générées. `kept_sessions` sont les sessions
+        conservées avant `since` (dictionnaires ou objets avec start_time et
+        subject_local_id) : l'état du planificateur (créneaux attribués, série
+        d'heures en cours) en est reconstruit, si bien qu'une configuration
+        inchangée donne exactement la suite d'une génération complète.
+        """
+        subjects = self.subjects_to_plan()
+        slots = self.available_slots(max(exam_date for _, exam_date in subjects))
+        if not slots:
             return []
 
-        # 1. Déterminer la période de planification
-        exam_dates = [datetime.datetime.strptime(s['examDate'], '%Y-%m-%d').date() for s in subjects_config if s.get('examDate')]
-        if not exam_dates:
-            return []
-        
-        start_date = datetime.date.today()
-        end_date = max(exam_dates)
-
-        # 2. Collecter tous les créneaux disponibles
-        available_slots = []
-        current_date = start_date
-        while current_date <= end_date:
-            day_name = days_of_week[current_date.weekday()]
-            is_vacation = self.is_date_in_vacation(current_date)
-            
-            if is_vacation:
-                # Logique pour les vacances (ex: 9h-12h, 14h-17h)
-                for hour in range(9, 12):
-                    available_slots.append({'date': current_date, 'time': f"{hour:02d}:00"})
-                for hour in range(14, 17):
-                    available_slots.append({'date': current_date, 'time': f"{hour:02d}:00"})
-            else:
-                # Logique pour la disponibilité standard
-                day_availability = availability.get(day_name, {})
-                for hour, is_available in day_availability.items():
-                    if is_available:
-                        available_slots.append({'date': current_date, 'time': hour})
-            
-            current_date += datetime.timedelta(days=1)
-        
-        # 3. Distribuer les sujets dans les créneaux (logique simplifiée)
-        total_weight = sum(s.get('weight', 0) for s in subjects_config)
-        if total_weight == 0:
-            return [] # ou gérer autrement
-
-        subject_slots_needed = {
-            s['localId']: round(len(available_slots) * s.get('weight', 0) / total_weight)
-            for s in subjects_config
-        }
-        subject_slots_assigned = {s['localId']: 0 for s in subjects_config}
-        
+        total_priority = sum(PRIORITY_VALUES.get(s.get('priority'), 0) for s, _ in subjects)
+        states = [
+            _SubjectState(
+                index, subject, exam_date.toordinal(),
+                max(0, math.floor(PRIORITY_VALUES.get(subject.get('priority'), 0) / total_priority * len(slots))),
+            )
+            for index, (subject, exam_date) in enumerate(subjects)
+        ]
+        current = None  # La matière de la série d'heures en cours.
+        if since is not None:
+            first = bisect_left(slots, (since.toordinal(), 0))
+            current = self._restore(states, slots[:first], kept_sessions)
+            slots = slots[first:]
+
+        heap = [state.entry() for state in states]
+        heapq.heapify(heap)
+
         schedule = []
-        subjects_by_id = {s['localId']: s for s in subjects_config}
-
-        # Logique de distribution à améliorer (priorité, urgence, etc.)
-        # Pour l'instant, on remplit simplement
-        slot_index = 0
-        while slot_index < len(available_slots):
-            for sub_id, slots_needed in subject_slots_needed.items():
-                if slot_index >= len(available_slots): break
-                if subject_slots_assigned[sub_id] < slots_needed:
-                    slot = available_slots[slot_index]
-                    subject_info = subjects_by_id[sub_id]
-
-                    start_time = datetime.datetime.combine(
-                        slot['date'],
-                        datetime.datetime.strptime(slot['time'], '%H:%M').time()
-                    )
-                    
-                    schedule.append({
-                        'subject_name': subject_info['name'],
-                        'subject_color': subject_info['color'],
-                        'subject_local_id': sub_id,
-                        'start_time': start_time,
-                        'end_time': start_time + datetime.timedelta(hours=1)
-                    })
-                    subject_slots_assigned[sub_id] += 1
-                    slot_index += 1
-        
-        return schedule
\ No newline at end of file
+        for slot_day, hour in slots:
+            chosen = self._pop_eligible(heap, states, slot_day)
+            if chosen is not None and chosen.consecutive >= MAX_CONSECUTIVE_HOURS:
+                relay = self._pop_eligible(heap, states, slot_day)
+                if relay is not None:
+                    heapq.heappush(heap, chosen.entry())
+                    chosen = relay
+
+            if current is not None and current is not chosen:
+                current.consecutive = 0
+                self._push(heap, current)
+            current = chosen
+            if chosen is None:
+                continue
+
+            chosen.assigned += 1
+            chosen.consecutive += 1
+            self._push(heap, chosen)
+
+            start_time = datetime.datetime.combine(
+                datetime.date.fromordinal(slot_day), datetime.time(hour), tzinfo=datetime.timezone.utc,
+            )
+            schedule.append({
+                'subject_name': chosen.subject.get('name', ''),
+                'subject_color': chosen.subject.get('color') or DEFAULT_SUBJECT_COLOR,
+                'subject_local_id': chosen.subject.get('localId'),
+                'start_time': start_time,
+                'end_time': start_time + datetime.timedelta(hours=1),
+            })
+
+        return schedule
+
+    @staticmethod
+    def _restore(states, kept_slots, kept_sessions):
+        """
+        Reporte les sessions conservées sur `states` et retourne la matière de
+        la série d'heures qui termine `kept_slots`, ou None.
+        """
+        by_local_id = {state.subject.get('localId'): state for state in states}
+        kept = {}
+        for session in kept_sessions:
+            if isinstance(session, dict):
+                start_time, local_id = session['start_time'], session['subject_local_id']
+            else:
+                start_time, local_id = session.start_time, session.subject_local_id
+            start_time = start_time.astimezone(datetime.timezone.utc)
+            kept[(start_time.toordinal(), start_time.hour)] = local_id
+            if local_id in by_local_id:
+                by_local_id[local_id].assigned += 1
+
+        # Comme à la génération, la série compte les derniers créneaux attribués d'affilée.
+        current = None
+        for slot in reversed(kept_slots):
+            state = by_local_id.get(kept.get(slot))
+            if state is None or (current is not None and state is not current):
+                break
+            current = state
+            current.consecutive += 1
+        return current
+
+    @staticmethod
+    def _push(heap, state):
+        state.version += 1
+        heapq.heappush(heap, state.entry())
+
+    @staticmethod
+    def _pop_eligible(heap, states, slot_day):
+        """
+        Retire du tas la première matière éligible pour ce créneau, ou None.
+        Les matières complètes ou dont l'examen est passé ne le redeviennent
+        jamais : leurs entrées sont simplement abandonnées.
+        """
+        while heap:
+            entry = heapq.heappop(heap)
+            state = states[entry[3]]
+            if entry[4] != state.version:
+                continue
+            if state.assigned < state.target and slot_day <= state.exam_day:
+                return state
+        return None
+
+
+def first_affected_date(old_config, new_config, today):
+    """
+    Premier jour, à partir de `today`, dont le planning dépend de ce qui a
+    changé entre deux configurations, ou None si rien n'a changé.
+
+    Les matières (priorités, dates d'examen, noms) influent sur chaque
+    créneau : on repart de `today`. Une modification de la seule
+    disponibilité ne touche qu'à partir du premier jour de la semaine concerné.
+    """
+    if old_config.get('subjects') != new_config.get('subjects'):
+        return today
+    old_mask, new_mask = config_mask(old_config), config_mask(new_config)
+    changed = [weekday for weekday in range(len(DAYS_OF_WEEK)) if old_mask[weekday] != new_mask[weekday]]
+    if not changed:
+        return None
+    return min(today + datetime.timedelta(days=(weekday - today.weekday()) % 7) for weekday in changed)
+
+
+SESSION_FIELDS = ('subject_name', 'subject_color', 'start_time', 'end_time', 'subject_local_id')
+
+
+def save_sessions(study_plan, sessions, since=None):
+    """
+    Enregistre `sessions` (dictionnaires) comme sessions du plan à partir de
+    `since` (toutes si None) en ne touchant que ce qui diffère : les sessions
+    sont comparées par (start_time, subject_local_id), les nouvelles sont
+    créées en une fois et les disparues supprimées en une requête.
+    Retourne (créées, supprimées).
+    """
+    existing = study_plan.sessions.all()
+    if since is not None:
+        existing = existing.filter(start_time__gte=since)
+        sessions = [session for session in sessions if session['start_time'] >= since]
+
+    stored = {}
+    stale = []
+    for row in existing.values('id', *SESSION_FIELDS):
+        key = (row['start_time'], row['subject_local_id'])
+        if key in stored:
+            stale.append(row['id'])
+        else:
+            stored[key] = row
+
+    created = []
+    for session in sessions:
+        row = stored.pop((session['start_time'], session.get('subject_local_id')), None)
+        if row is not None:
+            if all(row[field] == session[field] for field in SESSION_FIELDS if field in session):
+                continue
+            stale.append(row['id'])
+        created.append(ScheduledSession(study_plan=study_plan, **{
+            field: session[field] for field in SESSION_FIELDS if field in session
+        }))
+    stale.extend(row['id'] for row in stored.values())
+
+    with transaction.atomic():
+        if stale:
+            ScheduledSession.objects.filter(id__in=stale).delete()
+        ScheduledSession.objects.bulk_create(created, batch_size=500)
+    return len(created), len(stale)
+
+
+def load_sessions(study_plan, before=None, since=None):
+    """
+    Les sessions du plan (dictionnaires, dans l'ordre) commençant dans
+    [since, before) quand ces bornes sont données, quel que soit le stockage.
+    """
+    if study_plan.compact_schedule is not None:
+        return expand_sessions(study_plan.compact_schedule, start=since, end=before)
+    sessions = study_plan.sessions.all()
+    if since is not None:
+        sessions = sessions.filter(start_time__gte=since)
+    if before is not None:
+        sessions = sessions.filter(start_time__lt=before)
+    return list(sessions.values(*SESSION_FIELDS))
+
+
+def store_sessions(study_plan, sessions, since=None):
+    """
+    Enregistre `sessions` comme sessions du plan à partir de `since` (toutes
+    si None). En stockage compact, le planning conservé avant `since` et les
+    nouvelles sessions sont réencodés en une seule mise à jour du plan ; sinon
+    voir save_sessions(). Lève ValueError si une session ne peut pas être
+    encodée (durée différente d'une heure).
+    """
+    if study_plan.compact_schedule is None:
+        return save_sessions(study_plan, sessions, since=since)
+    if since is not None:
+        sessions = load_sessions(study_plan, before=since) + [s for s in sessions if s['start_time'] >= since]
+    study_plan.compact_schedule = encode_sessions(sessions)
+    study_plan.save(update_fields=['compact_schedule', 'updated_at'])
+
+
+def set_compact_storage(study_plan, compact, sessions=None):
+    """
+    Passe le plan en stockage compact (ou en lignes ScheduledSession) en
+    convertissant ses sessions, ou en enregistrant `sessions` à leur place.
+    """
+    if compact == (study_plan.compact_schedule is not None):
+        if sessions is not None:
+            store_sessions(study_plan, sessions)
+        return
+    if sessions is None:
+        sessions = load_sessions(study_plan)
+    with transaction.atomic():
+        if compact:
+            study_plan.compact_schedule = encode_sessions(sessions)
+            study_plan.sessions.all().delete()
+        else:
+            study_plan.compact_schedule = None
+            ScheduledSession.objects.bulk_create(
+                [ScheduledSession(study_plan=study_plan, **session) for session in sessions], batch_size=500,
+            )
+        study_plan.save(update_fields=['compact_schedule', 'updated_at'])
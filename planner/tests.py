@@ -1,3 +1,587 @@
-from django.test import TestCase
+import datetime
+import importlib
+import io
+import json
+import os
+import random
+import tempfile
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Curriculum, Language, Subject
+
+from .availability import (
+    DAYS_OF_WEEK, HOURS_IN_DAY, MASK_KEY, availability_to_mask, compact_config, expand_config, hours_by_weekday,
+    mask_to_availability,
+)
+from .compact import encode_sessions, expand_sessions
+from .models import StudyPlan, VacationPeriod
+from .services import (
+    PRIORITY_VALUES, ScheduleConfigError, ScheduleGenerator, first_affected_date, load_sessions, save_sessions,
+    set_compact_storage,
+)
+from .vacations import VacationCalendar, get_vacation_calendar
+
+
+def client_schedule(config, vacation_days, start_date):
+    """
+    Port of the planner page's former clientSideGenerateSchedule: every slot
+    sorts the eligible subjects. The server must give the same sessions.
+    """
+    subjects = [s for s in config['subjects'] if s.get('pk') and s.get('priority') != 'none']
+    total_priority = sum(PRIORITY_VALUES.get(s['priority'], 0) for s in subjects)
+    last_exam = max(datetime.date.fromisoformat(s['examDate']) for s in subjects)
+    slots = []
+    day = start_date
+    while day <= last_exam:
+        if day in vacation_days:
+            hours = [h for h in HOURS_IN_DAY if 9 <= int(h[:2]) < 12 or 14 <= int(h[:2]) < 17]
+        else:
+            availability = config['availability'].get(DAYS_OF_WEEK[day.weekday()]) or {}
+            hours = [h for h in HOURS_IN_DAY if availability.get(h)]
+        slots.extend((day, int(h[:2])) for h in hours)
+        day += datetime.timedelta(days=1)
+
+    work = [
+        dict(s, target=max(0, int(PRIORITY_VALUES.get(s['priority'], 0) / (total_priority or 1) * len(slots))),
+             assigned=0, consecutive=0, exam=datetime.date.fromisoformat(s['examDate']))
+        for s in subjects
+    ]
+    schedule = []
+    for day, hour in slots:
+        eligible = [s for s in work if s['assigned'] < s['target'] and day <= s['exam']]
+        if not eligible:
+            for s in work:
+                s['consecutive'] = 0
+            continue
+
+        def key(s):
+            urgency = (s['exam'] - day).days
+            return (urgency >= 7, urgency, -(s['target'] - s['assigned']) / (s['target'] or 1), s['consecutive'])
+        eligible.sort(key=key)
+        chosen = next((s for s in eligible if s['consecutive'] < 2), eligible[0])
+        start = datetime.datetime.combine(day, datetime.time(hour), tzinfo=datetime.timezone.utc)
+        schedule.append((start, chosen['localId']))
+        chosen['assigned'] += 1
+        for s in work:
+            s['consecutive'] = s['consecutive'] + 1 if s is chosen else 0
+    return schedule
+
+
+def random_config(rng, start_date):
+    subjects = []
+    for local_id in range(rng.randint(1, 6)):
+        subjects.append({
+            'localId': local_id,
+            'pk': str(rng.randint(1, 50)) if rng.random() > 0.1 else '',
+            'name': f"Subject {local_id}",
+            'examDate': (start_date + datetime.timedelta(days=rng.randint(0, 90))).isoformat(),
+            'priority': rng.choice(['high', 'medium', 'low', 'none']),
+            'color': '#a2d2ff',
+        })
+    availability = {day: {hour: rng.random() < 0.3 for hour in HOURS_IN_DAY} for day in DAYS_OF_WEEK}
+    return {'subjects': subjects, 'availability': availability}
+
+
+def random_vacations(rng, start_date):
+    periods = []
+    for _ in range(rng.randint(0, 3)):
+        first = start_date + datetime.timedelta(days=rng.randint(0, 90))
+        periods.append({'start': first.isoformat(), 'end': (first + datetime.timedelta(days=rng.randint(0, 14))).isoformat()})
+    days = {
+        datetime.date.fromisoformat(p['start']) + datetime.timedelta(days=offset)
+        for p in periods
+        for offset in range((datetime.date.fromisoformat(p['end']) - datetime.date.fromisoformat(p['start'])).days + 1)
+    }
+    return periods, days
+
+
+class ScheduleGeneratorTests(SimpleTestCase):
+    start_date = datetime.date(2025, 1, 6)
+
+    def test_matches_the_client_generation(self):
+        rng = random.Random(44)
+        compared = 0
+        for _ in range(200):
+            config = random_config(rng, self.start_date)
+            periods, vacation_days = random_vacations(rng, self.start_date)
+            generator = ScheduleGenerator(compact_config(config), periods, start_date=self.start_date)
+            try:
+                sessions = generator.generate()
+            except ScheduleConfigError:
+                continue
+            expected = client_schedule(config, vacation_days, self.start_date)
+            self.assertEqual([(s['start_time'], s['subject_local_id']) for s in sessions], expected)
+            compared += 1
+        self.assertGreater(compared, 100)
+
+    def test_sessions_last_one_hour_with_subject_details(self):
+        config = {
+            'subjects': [{'localId': 3, 'pk': '1', 'name': 'Maths', 'examDate': '2025-01-12', 'priority': 'high'}],
+            'availability': {'Monday': {'17:00': True}, 'Saturday': {'09:00': True, '10:00': True}},
+        }
+        sessions = ScheduleGenerator(config, start_date=self.start_date).generate()
+        self.assertEqual(
+            [s['start_time'] for s in sessions],
+            [datetime.datetime(2025, 1, d, h, tzinfo=datetime.timezone.utc) for d, h in ((6, 17), (11, 9), (11, 10))],
+        )
+        for session in sessions:
+            self.assertEqual(session['end_time'] - session['start_time'], datetime.timedelta(hours=1))
+            self.assertEqual((session['subject_name'], session['subject_color'], session['subject_local_id']), ('Maths', '#808080', 3))
+
+    def test_invalid_configs_are_rejected(self):
+        subject = {'localId': 0, 'pk': '1', 'name': 'Maths', 'examDate': '2025-02-01', 'priority': 'high'}
+        for subjects in ([], [dict(subject, priority='none')], [dict(subject, examDate='')], [dict(subject, examDate='soon')]):
+            with self.subTest(subjects=subjects), self.assertRaises(ScheduleConfigError):
+                ScheduleGenerator({'subjects': subjects}, start_date=self.start_date).generate()
+
+
+def day(iso):
+    return datetime.date.fromisoformat(iso)
+
+
+class VacationCalendarTests(TestCase):
+
+    def setUp(self):
+        VacationPeriod.objects.all().delete()
+        cache.clear()
+        self.curriculum = Curriculum.objects.create(name='Test curriculum')
+        self.other = Curriculum.objects.create(name='Other curriculum')
+
+    def test_overlapping_and_adjacent_periods_are_merged(self):
+        calendar = VacationCalendar.from_periods([
+            {'start': '2025-02-10', 'end': '2025-02-14'},
+            '2025-02-15',
+            {'start': '2025-02-12', 'end': '2025-02-20'},
+            {'start': '2025-04-01', 'end': '2025-04-02'},
+        ])
+        self.assertEqual(calendar.starts, [day('2025-02-10').toordinal(), day('2025-04-01').toordinal()])
+        self.assertEqual(calendar.ends, [day('2025-02-20').toordinal(), day('2025-04-02').toordinal()])
+
+    def test_dates_are_found_by_bisection(self):
+        calendar = VacationCalendar.from_periods([{'start': '2025-02-10', 'end': '2025-02-14'}, '2025-03-01'])
+        inside = ['2025-02-10', '2025-02-12', '2025-02-14', '2025-03-01']
+        outside = ['2025-01-01', '2025-02-09', '2025-02-15', '2025-02-28', '2025-03-02']
+        self.assertTrue(all(day(d) in calendar for d in inside))
+        self.assertFalse(any(day(d) in calendar for d in outside))
+        self.assertNotIn(day('2025-01-01'), VacationCalendar())
+
+    def test_calendar_holds_shared_and_curriculum_periods(self):
+        VacationPeriod.objects.create(start_date=day('2025-02-10'), end_date=day('2025-02-14'))
+        VacationPeriod.objects.create(curriculum=self.curriculum, start_date=day('2025-03-03'), end_date=day('2025-03-07'))
+        VacationPeriod.objects.create(curriculum=self.other, start_date=day('2025-04-07'), end_date=day('2025-04-11'))
+        calendar = get_vacation_calendar([self.curriculum.pk])
+        self.assertIn(day('2025-02-12'), calendar)
+        self.assertIn(day('2025-03-05'), calendar)
+        self.assertNotIn(day('2025-04-09'), calendar)
+        self.assertNotIn(day('2025-03-05'), get_vacation_calendar())
+
+    def test_cached_calendar_follows_table_changes(self):
+        period = VacationPeriod.objects.create(start_date=day('2025-02-10'), end_date=day('2025-02-14'))
+        self.assertIn(day('2025-02-12'), get_vacation_calendar())
+        # A cached calendar costs only the version query.
+        with self.assertNumQueries(1):
+            self.assertIn(day('2025-02-12'), get_vacation_calendar())
+
+        period.end_date = day('2025-02-21')
+        period.save()
+        self.assertIn(day('2025-02-20'), get_vacation_calendar())
+        added = VacationPeriod.objects.create(start_date=day('2025-05-01'), end_date=day('2025-05-01'))
+        self.assertIn(day('2025-05-01'), get_vacation_calendar())
+        added.delete()
+        self.assertNotIn(day('2025-05-01'), get_vacation_calendar())
+
+
+class IncrementalGenerationTests(SimpleTestCase):
+    start_date = datetime.date(2025, 1, 6)
+
+    def test_incremental_generation_continues_the_full_one(self):
+        rng = random.Random(47)
+        compared = 0
+        for _ in range(60):
+            config = compact_config(random_config(rng, self.start_date))
+            periods, _ = random_vacations(rng, self.start_date)
+            try:
+                full = ScheduleGenerator(config, periods, start_date=self.start_date).generate()
+            except ScheduleConfigError:
+                continue
+            for offset in sorted(rng.sample(range(1, 80), 4)):
+                since = self.start_date + datetime.timedelta(days=offset)
+                kept = [s for s in full if s['start_time'].date() < since]
+                tail = ScheduleGenerator(config, periods, start_date=self.start_date).generate(since=since, kept_sessions=kept)
+                self.assertEqual(tail, [s for s in full if s['start_time'].date() >= since])
+                compared += 1
+        self.assertGreater(compared, 100)
+
+    def test_kept_sessions_may_be_model_instances(self):
+        config = compact_config(random_config(random.Random(3), self.start_date))
+        config['subjects'] = [dict(s, pk='1', priority='high') for s in config['subjects']]
+        full = ScheduleGenerator(config, start_date=self.start_date).generate()
+        since = self.start_date + datetime.timedelta(days=10)
+        kept = [SimpleNamespace(**s) for s in full if s['start_time'].date() < since]
+        tail = ScheduleGenerator(config, start_date=self.start_date).generate(since=since, kept_sessions=kept)
+        self.assertEqual(tail, [s for s in full if s['start_time'].date() >= since])
+
+    def test_first_affected_date(self):
+        today = datetime.date(2025, 1, 8)  # A Wednesday.
+        config = compact_config({'subjects': [{'localId': 0, 'pk': '1'}], 'availability': {'Monday': {'17:00': True}}})
+        self.assertIsNone(first_affected_date(config, dict(config), today))
+
+        friday = compact_config({'subjects': config['subjects'], 'availability': {'Monday': {'17:00': True}, 'Friday': {'09:00': True}}})
+        self.assertEqual(first_affected_date(config, friday, today), datetime.date(2025, 1, 10))
+        monday = compact_config({'subjects': config['subjects'], 'availability': {}})
+        self.assertEqual(first_affected_date(config, monday, today), datetime.date(2025, 1, 13))
+
+        renamed = dict(config, subjects=[{'localId': 0, 'pk': '2'}])
+        self.assertEqual(first_affected_date(config, renamed, today), today)
+
+
+class RegenerateEndpointTests(TestCase):
+
+    def setUp(self):
+        VacationPeriod.objects.all().delete()
+        self.student = get_user_model().objects.create_user('regen-student', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        exam = (timezone.now().date() + datetime.timedelta(days=30)).isoformat()
+        self.config = {
+            'subjects': [
+                {'localId': 0, 'pk': '1', 'name': 'Maths', 'examDate': exam, 'priority': 'high', 'color': '#a2d2ff'},
+                {'localId': 1, 'pk': '2', 'name': 'Physics', 'examDate': exam, 'priority': 'low', 'color': '#ffafcc'},
+            ],
+            'availability': {day: {'17:00': True, '18:00': True} for day in DAYS_OF_WEEK},
+        }
+        self.plan = StudyPlan.objects.create(student=self.student, name='Plan', config=compact_config(self.config))
+        self.url = reverse('studyplan-regenerate', args=[self.plan.pk])
+
+    def test_unchanged_plan_keeps_its_sessions(self):
+        full = self.client.post(self.url, {'config': self.config, 'from': timezone.now().date().isoformat(), 'save': True}, format='json').json()
+        self.assertTrue(full['sessions'])
+        response = self.client.post(self.url, {'config': self.config}, format='json').json()
+        self.assertIsNone(response['from'])
+        self.assertEqual(response['sessions'], full['sessions'])
+
+    def test_saved_regeneration_matches_a_full_generation(self):
+        today = timezone.now().date()
+        self.client.post(self.url, {'config': self.config, 'from': today.isoformat(), 'save': True}, format='json')
+        changed = dict(self.config, availability={day: {'07:00': True} for day in DAYS_OF_WEEK})
+        response = self.client.post(self.url, {'config': changed, 'save': True}, format='json').json()
+
+        expected = ScheduleGenerator(compact_config(changed), start_date=today).generate()
+        self.assertEqual(
+            [(s['start_time'], s['subject_local_id']) for s in self.plan.sessions.order_by('start_time').values('start_time', 'subject_local_id')],
+            [(s['start_time'], s['subject_local_id']) for s in expected],
+        )
+        self.assertEqual(len(response['sessions']), len(expected))
+
+
+def hourly_sessions(count, start=datetime.datetime(2025, 1, 6, 7, tzinfo=datetime.timezone.utc), local_id=0):
+    return [
+        {
+            'subject_name': f"Subject {local_id}",
+            'subject_color': '#a2d2ff',
+            'start_time': start + datetime.timedelta(hours=i),
+            'end_time': start + datetime.timedelta(hours=i + 1),
+            'subject_local_id': local_id,
+        }
+        for i in range(count)
+    ]
+
+
+class SaveSessionsTests(TestCase):
+
+    def setUp(self):
+        self.student = get_user_model().objects.create_user('save-student', password='x')
+        self.plan = StudyPlan.objects.create(student=self.student, name='Plan', config={})
+
+    def stored(self):
+        return list(self.plan.sessions.order_by('start_time').values('start_time', 'subject_local_id', 'subject_name'))
+
+    def test_unchanged_sessions_cost_one_read(self):
+        for count in (10, 200):
+            sessions = hourly_sessions(count)
+            save_sessions(self.plan, sessions)
+            ids = set(self.plan.sessions.values_list('id', flat=True))
+            # The read, and the savepoint of the (empty) write transaction.
+            with self.assertNumQueries(3):
+                self.assertEqual(save_sessions(self.plan, sessions), (0, 0))
+            self.assertEqual(set(self.plan.sessions.values_list('id', flat=True)), ids)
+
+    def test_only_changed_sessions_are_written(self):
+        sessions = hourly_sessions(100)
+        save_sessions(self.plan, sessions)
+        sessions[10] = dict(sessions[10], subject_local_id=1)
+        sessions[20] = dict(sessions[20], subject_name='Renamed')
+        del sessions[30]
+        sessions.append(hourly_sessions(1, start=sessions[-1]['end_time'])[0])
+        # Read, savepoint, one delete, one insert, release.
+        with self.assertNumQueries(5):
+            self.assertEqual(save_sessions(self.plan, sessions), (3, 3))
+        self.assertEqual(
+            self.stored(),
+            [{'start_time': s['start_time'], 'subject_local_id': s['subject_local_id'], 'subject_name': s['subject_name']} for s in sessions],
+        )
+
+    def test_sessions_before_since_are_kept(self):
+        sessions = hourly_sessions(48)
+        save_sessions(self.plan, sessions)
+        since = sessions[24]['start_time']
+        replaced = hourly_sessions(24, start=since, local_id=2)
+        self.assertEqual(save_sessions(self.plan, replaced, since=since), (24, 24))
+        self.assertEqual([s['subject_local_id'] for s in self.stored()], [0] * 24 + [2] * 24)
+
+    def test_saving_an_unchanged_plan_does_not_grow_with_its_sessions(self):
+        client = APIClient()
+        client.force_authenticate(self.student)
+        url = reverse('studyplan-list')
+        counts = []
+        for count in (10, 200):
+            payload = {'student': self.student.pk, 'name': 'Plan', 'config': {}, 'sessions': [
+                dict(s, start_time=s['start_time'].isoformat(), end_time=s['end_time'].isoformat()) for s in hourly_sessions(count)
+            ]}
+            self.assertEqual(client.post(url, payload, format='json').status_code, 200)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(client.post(url, payload, format='json').status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class CompactSessionsTests(SimpleTestCase):
+    start = datetime.datetime(2025, 1, 6, 7, tzinfo=datetime.timezone.utc)
+
+    def at(self, hours):
+        return self.start + datetime.timedelta(hours=hours)
+
+    def sessions(self):
+        # Three hours of subject 0, a gap, one hour of subject 1, then subject 0 again.
+        return hourly_sessions(3, start=self.at(0)) + hourly_sessions(1, start=self.at(5), local_id=1) + hourly_sessions(2, start=self.at(6))
+
+    def test_back_to_back_hours_of_a_subject_are_one_run(self):
+        compact = encode_sessions(self.sessions())
+        first = int(self.start.timestamp()) // 3600
+        self.assertEqual(compact['subjects'], [['Subject 0', '#a2d2ff', 0], ['Subject 1', '#a2d2ff', 1]])
+        self.assertEqual(compact['runs'], [[first, 3, 0], [first + 5, 1, 1], [first + 6, 2, 0]])
+
+    def test_round_trip(self):
+        sessions = self.sessions()
+        self.assertEqual(expand_sessions(encode_sessions(reversed(sessions))), sessions)
+
+    def test_sessions_must_be_whole_hours(self):
+        session = hourly_sessions(1)[0]
+        with self.assertRaises(ValueError):
+            encode_sessions([dict(session, end_time=session['end_time'] + datetime.timedelta(minutes=30))])
+        with self.assertRaises(ValueError):
+            encode_sessions([dict(session, start_time=session['start_time'] + datetime.timedelta(minutes=30))])
+
+    def test_windows(self):
+        sessions = self.sessions()
+        compact = encode_sessions(sessions)
+        windows = [
+            (self.at(1), self.at(2)),  # Inside the first run.
+            (self.at(1), self.at(7)),  # Across runs and the gap.
+            (self.at(3), self.at(5)),  # Only the gap.
+            (self.at(-10), self.at(0)),  # Before the plan.
+            (self.at(5) - datetime.timedelta(minutes=30), None),  # Off the hour, open end.
+            (None, self.at(2) + datetime.timedelta(minutes=1)),
+        ]
+        for start, end in windows:
+            with self.subTest(start=start, end=end):
+                self.assertEqual(
+                    expand_sessions(compact, start, end),
+                    [s for s in sessions if (start is None or s['start_time'] >= start) and (end is None or s['start_time'] < end)],
+                )
+
+
+class CompactStorageTests(TestCase):
+
+    def setUp(self):
+        self.student = get_user_model().objects.create_user('compact-student', password='x')
+        self.plan = StudyPlan.objects.create(student=self.student, name='Plan', config={})
+        self.sessions = hourly_sessions(30) + hourly_sessions(5, start=datetime.datetime(2025, 2, 3, 9, tzinfo=datetime.timezone.utc), local_id=1)
+        save_sessions(self.plan, self.sessions)
+
+    def test_storage_can_be_switched_both_ways(self):
+        since = datetime.datetime(2025, 1, 7, tzinfo=datetime.timezone.utc)
+        rows = load_sessions(self.plan, since=since)
+        set_compact_storage(self.plan, True)
+        self.assertFalse(self.plan.sessions.exists())
+        self.assertEqual(load_sessions(self.plan), self.sessions)
+        self.assertEqual(load_sessions(self.plan, since=since), rows)
+
+        set_compact_storage(self.plan, False)
+        self.assertIsNone(self.plan.compact_schedule)
+        self.assertEqual(load_sessions(self.plan), self.sessions)
+
+    def test_runs_are_served_on_request(self):
+        set_compact_storage(self.plan, True)
+        client = APIClient()
+        client.force_authenticate(self.student)
+        url = reverse('studyplan-list')
+        runs = client.get(url, {'student_id': self.student.pk, 'session_format': 'runs'}).json()
+        self.assertEqual(runs['session_runs'], self.plan.compact_schedule)
+        self.assertNotIn('sessions', runs)
+        hourly = client.get(url, {'student_id': self.student.pk}).json()
+        self.assertEqual(len(hourly['sessions']), len(self.sessions))
+        self.assertNotIn('sessions', client.get(url, {'student_id': self.student.pk, 'session_format': 'none'}).json())
+
+
+class SessionsEndpointTests(TestCase):
+
+    def setUp(self):
+        self.student = get_user_model().objects.create_user('week-student', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        self.plan = StudyPlan.objects.create(student=self.student, name='Plan', config={})
+        # Every day at 17:00 for four weeks, from Monday 6 January 2025.
+        self.sessions = [
+            s for week_day in range(28)
+            for s in hourly_sessions(1, start=datetime.datetime(2025, 1, 6, 17, tzinfo=datetime.timezone.utc) + datetime.timedelta(days=week_day))
+        ]
+        save_sessions(self.plan, self.sessions)
+        self.url = reverse('studyplan-sessions', args=[self.plan.pk])
+
+    def get(self, **params):
+        return self.client.get(self.url, params)
+
+    def test_window_is_snapped_to_whole_weeks(self):
+        data = self.get(**{'from': '2025-01-15', 'to': '2025-01-21'}).json()
+        self.assertEqual((data['from'], data['to']), ('2025-01-13', '2025-01-26'))
+        self.assertEqual([s['start_time'][:10] for s in data['sessions']], [f"2025-01-{d}" for d in range(13, 27)])
+
+    def test_from_alone_is_one_week(self):
+        data = self.get(**{'from': '2025-01-29'}).json()
+        self.assertEqual((data['from'], data['to']), ('2025-01-27', '2025-02-02'))
+        self.assertEqual(len(data['sessions']), 7)
+        future = (timezone.now().date() + datetime.timedelta(days=30)).isoformat()
+        self.assertEqual(self.get(**{'from': future}).status_code, 200)
+
+    def test_invalid_windows_are_rejected(self):
+        self.assertEqual(self.get(**{'from': 'monday'}).status_code, 400)
+        self.assertEqual(self.get(**{'from': '2025-01-20', 'to': '2025-01-06'}).status_code, 400)
+        self.assertEqual(self.get(**{'from': '2025-01-06', 'to': '2025-12-31'}).status_code, 400)
+
+    def test_unchanged_week_is_not_modified(self):
+        response = self.get(**{'from': '2025-01-06'})
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+        cached = self.client.get(self.url, {'from': '2025-01-06'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], etag)
+
+        # Another week, or the same week once changed, has another ETag.
+        self.assertNotEqual(self.get(**{'from': '2025-01-13'})['ETag'], etag)
+        self.plan.sessions.filter(start_time__date='2025-01-08').update(subject_local_id=5)
+        changed = self.client.get(self.url, {'from': '2025-01-06'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_compact_plans_are_served_the_same(self):
+        rows = self.get(**{'from': '2025-01-13'})
+        set_compact_storage(self.plan, True)
+        compact = self.get(**{'from': '2025-01-13'})
+        self.assertEqual(compact['ETag'], rows['ETag'])
+        self.assertEqual(
+            [(s['start_time'], s['subject_local_id']) for s in compact.json()['sessions']],
+            [(s['start_time'], s['subject_local_id']) for s in rows.json()['sessions']],
+        )
+
+
+class AvailabilityMaskTests(TestCase):
+
+    def random_availability(self, rng):
+        return {day: {hour: rng.random() < 0.4 for hour in HOURS_IN_DAY} for day in DAYS_OF_WEEK}
+
+    def test_round_trip(self):
+        rng = random.Random(46)
+        for _ in range(50):
+            availability = self.random_availability(rng)
+            mask = availability_to_mask(availability)
+            self.assertEqual(len(mask), 7)
+            self.assertEqual(mask_to_availability(mask), availability)
+
+    def test_bits_are_hours(self):
+        mask = availability_to_mask({'Monday': {'07:00': True, '22:00': True}, 'Sunday': {'12:00': True, '23:00': True}})
+        self.assertEqual(mask, [1 << 7 | 1 << 22, 0, 0, 0, 0, 0, 1 << 12])
+        self.assertEqual(hours_by_weekday(mask)[0], (7, 22))
+
+    def test_config_is_compacted_and_expanded(self):
+        availability = self.random_availability(random.Random(1))
+        config = {'subjects': [], 'availability': availability}
+        compact = compact_config(config)
+        self.assertNotIn('availability', compact)
+        self.assertEqual(compact_config(compact), compact)
+        self.assertEqual(expand_config(compact), config)
+        # Configs without a mask are sent as they are.
+        self.assertEqual(expand_config(config), config)
+
+    def test_migration_converts_stored_plans(self):
+        migration = importlib.import_module('planner.migrations.0004_availability_mask')
+        availability = self.random_availability(random.Random(2))
+        student = get_user_model().objects.create_user('mask-student', password='x')
+        plan = StudyPlan.objects.create(student=student, config={'subjects': [], 'availability': availability})
+
+        migration.compact_availability(apps, None)
+        plan.refresh_from_db()
+        self.assertEqual(plan.config, compact_config({'subjects': [], 'availability': availability}))
+
+        migration.expand_availability(apps, None)
+        plan.refresh_from_db()
+        self.assertEqual(plan.config, {'subjects': [], 'availability': availability})
+
+
+class ImportLegacySchedulesTests(TestCase):
+
+    def setUp(self):
+        self.student = get_user_model().objects.create_user('legacy-student', password='x')
+        curriculum = Curriculum.objects.create(name='Test curriculum')
+        language = Language.objects.create(name='Test language', code='xx')
+        self.sl = Subject.objects.create(name='Test maths', curriculum=curriculum, language=language, level=Subject.Level.SL)
+        self.hl = Subject.objects.create(name='Test maths', curriculum=curriculum, language=language, level=Subject.Level.HL)
+
+    def import_archive(self, items):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as archive:
+            json.dump(items, archive)
+        self.addCleanup(os.remove, archive.name)
+        call_command('import_legacy_schedules', archive.name, stdout=io.StringIO())
+
+    def test_imported_plan_generates_a_schedule(self):
+        availability = {day: {'07:00': False, '17:00': True, '18:00': True} for day in ('Monday', 'Tuesday', 'Saturday')}
+        self.import_archive([{
+            'studentUsername': 'legacy-student',
+            'projectName': 'Exams',
+            'config': {
+                'curriculumId': 'Test curriculum',
+                'languageId': 'xx',
+                'subjects': [
+                    # Legacy pks do not match the current database: subjects are found by name.
+                    {'localId': 0, 'pk': '99991', 'name': 'Test maths (SL)', 'examDate': '2025-05-20', 'weight': 56, 'color': '#a2d2ff'},
+                    {'localId': 1, 'pk': '99992', 'name': 'Test maths (HL)', 'examDate': '2025-05-23', 'weight': 11, 'color': '#ffafcc'},
+                ],
+                'availability': availability,
+            },
+            'schedule': [],
+        }])
+
+        config = StudyPlan.objects.get(student=self.student).config
+        self.assertNotIn('curriculumId', config)
+        self.assertNotIn('availability', config)
+        self.assertEqual(config[MASK_KEY][0], 1 << 17 | 1 << 18)
+        self.assertEqual(
+            [(s['pk'], s['priority'], s['level_display']) for s in config['subjects']],
+            [(str(self.sl.pk), 'high', 'SL'), (str(self.hl.pk), 'low', 'HL')],
+        )
+
+        sessions = ScheduleGenerator(config, start_date=datetime.date(2025, 5, 1)).generate()
+        self.assertTrue(sessions)
+        self.assertEqual({session['subject_local_id'] for session in sessions}, {0, 1})
+        self.assertTrue(all(session['start_time'].hour in (17, 18) for session in sessions))
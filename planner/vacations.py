@@ -0,0 +1,97 @@
+# planner/vacations.py
+"""
+School vacation calendar.
+
+Vacation periods are merged into sorted, disjoint intervals of date
+ordinals, so checking a date is one binary search: a year-long schedule
+costs O(days · log periods) instead of scanning every period for every day.
+
+Calendars are cached per curriculum set and per version of the
+VacationPeriod table (latest update and row count), so an edited, added or
+deleted period is picked up by every process without explicit invalidation.
+"""
+import datetime
+from bisect import bisect_right
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+
+from core.models import Subject
+
+from .models import VacationPeriod
+
+# Calendars are keyed by the table version, so a stale entry is never
+# served; the timeout only bounds how long unused calendars are kept.
+CALENDAR_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class VacationCalendar:
+    """ Sorted, disjoint vacation intervals (inclusive date ordinals). """
+
+    def __init__(self, intervals=()):
+        merged = []
+        for start, end in sorted(intervals):
+            # Overlapping or back-to-back periods become one interval.
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+
+    @classmethod
+    def from_periods(cls, periods):
+        """
+        Builds a calendar from the planner page format: "YYYY-MM-DD" strings
+        for single days, {"start": ..., "end": ...} dicts for periods.
+        """
+        intervals = []
+        for period in periods:
+            if isinstance(period, str):
+                start = end = period
+            else:
+                start, end = period['start'], period['end']
+            intervals.append((
+                datetime.date.fromisoformat(start).toordinal(),
+                datetime.date.fromisoformat(end).toordinal(),
+            ))
+        return cls(intervals)
+
+    def contains_ordinal(self, ordinal):
+        index = bisect_right(self.starts, ordinal) - 1
+        return index >= 0 and ordinal <= self.ends[index]
+
+    def __contains__(self, date_obj):
+        return self.contains_ordinal(date_obj.toordinal())
+
+
+def get_vacation_calendar(curriculum_ids=()):
+    """ The calendar of the vacations shared by all curricula and of those of `curriculum_ids`. """
+    curriculum_ids = sorted(set(curriculum_ids))
+    version = VacationPeriod.objects.aggregate(updated=Max('updated_at'), count=Count('id'))
+    updated = version['updated'].timestamp() if version['updated'] else 0
+    key = f"planner:vacations:{updated}:{version['count']}:{','.join(map(str, curriculum_ids))}"
+
+    calendar = cache.get(key)
+    if calendar is None:
+        periods = VacationPeriod.objects.filter(Q(curriculum__isnull=True) | Q(curriculum_id__in=curriculum_ids)).values_list('start_date', 'end_date')
+        calendar = VacationCalendar((start.toordinal(), end.toordinal()) for start, end in periods)
+        cache.set(key, calendar, CALENDAR_CACHE_TIMEOUT)
+    return calendar
+
+
+def get_plan_curriculum_ids(plan_config):
+    """ Curricula of the subjects selected in a plan configuration. """
+    subject_ids = [
+        int(subject['pk']) for subject in plan_config.get('subjects', [])
+        if str(subject.get('pk') or '').isdigit()
+    ]
+    return set(Subject.objects.filter(pk__in=subject_ids).values_list('curriculum_id', flat=True))
+
+
+def vacation_periods_for_page():
+    """ Every vacation period, tagged with its curriculum name (None when shared), for the planner page. """
+    return [
+        {'start': start.isoformat(), 'end': end.isoformat(), 'curriculum': curriculum}
+        for start, end, curriculum in VacationPeriod.objects.values_list('start_date', 'end_date', 'curriculum__name')
+    ]
@@ -1,12 +1,27 @@
+import datetime
+import hashlib
+
+from django.db import transaction
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.urls import reverse
 from django.middleware.csrf import get_token
 from django.contrib.auth.models import User
 from core.models import Subject 
 from rest_framework import viewsets, permissions, serializers, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import StudyPlan
-from .serializers import StudyPlanSerializer
+from .serializers import ScheduledSessionSerializer, StudyPlanSerializer
+from .services import ScheduleConfigError, ScheduleGenerator, first_affected_date, load_sessions, store_sessions
+from .vacations import get_plan_curriculum_ids, get_vacation_calendar, vacation_periods_for_page
+
+# Longest window served by StudyPlanViewSet.sessions, in weeks.
+MAX_SESSION_WINDOW_WEEKS = 13
+
 
 def student_planner_view(request):
     active_users = User.objects.filter(is_active=True).order_by('last_name', 'first_name')
@@ -20,12 +35,15 @@ def student_planner_view(request):
             'level', 
             'curriculum__name', 
             'language__code'  
-        ))
+        )),
+        'vacations': vacation_periods_for_page(),
     }
 
     api_config = { 
         'urls': {
             'study_plans_base': reverse('studyplan-list'), 
+            'generate_schedule': reverse('studyplan-generate'),
+            'study_plan_detail_base': reverse('studyplan-detail', args=[0]).replace('/0', ''),
         },
         'csrf_token': get_token(request),
         'current_user_id': request.user.id if request.user.is_authenticated else None,
@@ -129,6 +147,119 @@ class StudyPlanViewSet(viewsets.ModelViewSet):
             headers = self.get_success_headers(serializer.data)
             return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    @action(detail=False, methods=['post'])
+    def generate(self, request):
+        """
+        Computes the schedule of the plan configuration sent in the body
+        ({"config": {...}}), with the same rules for every client. The sessions
+        are returned, not saved: the plan is saved through create() as before.
+        """
+        config = request.data.get('config')
+        if not isinstance(config, dict):
+            return Response({"config": "A plan configuration object is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            vacations = get_vacation_calendar(get_plan_curriculum_ids(config))
+            sessions = ScheduleGenerator(config, vacations).generate()
+        except ScheduleConfigError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'sessions': ScheduledSessionSerializer(sessions, many=True).data})
+
+    @action(detail=True, methods=['post'])
+    def regenerate(self, request, pk=None):
+        """
+        Incremental generation for a saved plan. Sessions before the first day
+        affected by the new configuration (or before "from", when given) are
+        kept, and the rest is generated from the scheduler state they leave.
+        The response holds the whole schedule. With "save": true, the config is
+        stored and only the sessions that changed are written.
+        """
+        plan = self.get_object()
+        config = request.data.get('config', plan.config)
+        if not isinstance(config, dict):
+            return Response({"config": "A plan configuration object is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.data.get('from'):
+            since = parse_date(str(request.data['from']))
+            if since is None:
+                return Response({"from": "Expected a date (YYYY-MM-DD)."}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            since = first_affected_date(plan.config, config, timezone.now().date())
+
+        if since is None:
+            kept, sessions = load_sessions(plan), []
+        else:
+            since_time = datetime.datetime.combine(since, datetime.time.min, tzinfo=datetime.timezone.utc)
+            kept = load_sessions(plan, before=since_time)
+            # Targets are shared out over the plan's whole period, which starts with its first session.
+            start_date = kept[0]['start_time'].astimezone(datetime.timezone.utc).date() if kept else since
+            try:
+                vacations = get_vacation_calendar(get_plan_curriculum_ids(config))
+                sessions = ScheduleGenerator(config, vacations, start_date=start_date).generate(since=since, kept_sessions=kept)
+            except ScheduleConfigError as exc:
+                return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+            if request.data.get('save'):
+                serializer = self.get_serializer(plan, data={'config': config}, partial=True)
+                serializer.is_valid(raise_exception=True)
+                with transaction.atomic():
+                    serializer.save()
+                    store_sessions(plan, sessions, since=since_time)
+
+        return Response({
+            'from': since,
+            'sessions': ScheduledSessionSerializer(kept, many=True).data + ScheduledSessionSerializer(sessions, many=True).data,
+        })
+
+    @action(detail=True, methods=['get'])
+    def sessions(self, request, pk=None):
+        """
+        The sessions of the weeks (Monday to Sunday) covering ?from= to ?to=
+        (dates; "from" defaults to today and "to" to "from", i.e. one week),
+        read through the (study_plan, start_time) index. The ETag is a digest
+        of those sessions, so a calendar revisiting a week it already has
+        gets a 304.
+        """
+        window = {}
+        for param in ('from', 'to'):
+            value = request.query_params.get(param)
+            if not value:
+                # One week by default: the current one, or the week of "from".
+                window[param] = window.get('from') or timezone.now().date()
+                continue
+            window[param] = parse_date(value)
+            if window[param] is None:
+                return Response({param: "Expected a date (YYYY-MM-DD)."}, status=status.HTTP_400_BAD_REQUEST)
+        first_day = window['from'] - datetime.timedelta(days=window['from'].weekday())
+        last_day = window['to'] + datetime.timedelta(days=6 - window['to'].weekday())
+        if last_day < first_day:
+            return Response({"to": "Must not be before 'from'."}, status=status.HTTP_400_BAD_REQUEST)
+        if (last_day - first_day).days + 1 > 7 * MAX_SESSION_WINDOW_WEEKS:
+            return Response({"detail": f"At most {MAX_SESSION_WINDOW_WEEKS} weeks at a time."}, status=status.HTTP_400_BAD_REQUEST)
+
+        plan = self.get_object()
+        since = datetime.datetime.combine(first_day, datetime.time.min, tzinfo=datetime.timezone.utc)
+        sessions = load_sessions(plan, since=since, before=since + datetime.timedelta(days=(last_day - first_day).days + 1))
+
+        digest = hashlib.sha256(f"{plan.pk}|{first_day}|{last_day}".encode('ascii'))
+        for session in sessions:
+            digest.update(
+                f"|{session['start_time'].isoformat()}|{session['end_time'].isoformat()}|{session['subject_local_id']}"
+                f"|{session['subject_name']}|{session['subject_color']}".encode('utf-8')
+            )
+        etag = f'"{digest.hexdigest()[:32]}"'
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({
+                'from': first_day,
+                'to': last_day,
+                'sessions': ScheduledSessionSerializer(sessions, many=True).data,
+            })
+        response['ETag'] = etag
+        # Weeks change whenever the plan is saved: always revalidate, using the ETag.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
     def perform_create(self, serializer):
         # Student should already be in serializer.validated_data or passed directly
         # The view's create method ensures the student_id is correct and authorized.
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.17 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipeblock_image_alter_recipeblock_content_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='thumbnails/recipes/'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='thumbnail_source_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='updated_at of the recipe when the thumbnail was rendered.', null=True),
+        ),
+    ]
@@ -56,6 +56,15 @@ class Recipe(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Preview of the first block, rendered in the background (see core/thumbnails.py)
+    thumbnail = models.ImageField(upload_to='thumbnails/recipes/', null=True, blank=True, editable=False)
+    thumbnail_source_updated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="updated_at of the recipe when the thumbnail was rendered."
+    )
+
     class Meta:
         ordering = ['-updated_at']
 
@@ -88,4 +97,9 @@ class RecipeBlock(models.Model):
         unique_together = ('recipe', 'order')
 
     def __str__(self):
-        return f"{self.recipe.title} - Block {self.order} ({self.template_name})"
\ No newline at end of file
+        return f"{self.recipe.title} - Block {self.order} ({self.template_name})"
+
+    @property
+    def dedup_text(self):
+        """ The text compared when looking for near-duplicates (see core/dedup.py). """
+        return self.content_html
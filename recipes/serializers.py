@@ -14,10 +14,14 @@ class RecipeBlockSerializer(serializers.ModelSerializer):
 class RecipeListSerializer(serializers.ModelSerializer):
     subject_name = serializers.CharField(source='subject.name', read_only=True, allow_null=True)
     author_name = serializers.CharField(source='author.username', read_only=True, allow_null=True)
+    thumbnail_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ['id', 'title', 'subject_name', 'author_name', 'status', 'updated_at']
+        fields = ['id', 'title', 'subject_name', 'author_name', 'status', 'thumbnail_url', 'updated_at']
+
+    def get_thumbnail_url(self, obj):
+        return obj.thumbnail.url if obj.thumbnail else None
 
 
 class RecipeDetailSerializer(serializers.ModelSerializer):
@@ -29,4 +33,10 @@ class RecipeDetailSerializer(serializers.ModelSerializer):
             'id', 'title', 'author', 'subject', 'topic', 'language',
             'curriculum', 'status', 'blocks', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at', 'author']
\ No newline at end of file
+        read_only_fields = ['created_at', 'updated_at', 'author']
+
+
+class BlockDuplicateCheckSerializer(serializers.Serializer):
+    """ A block being written, checked against the blocks of other recipes. """
+    content_html = serializers.CharField()
+    recipe = serializers.IntegerField(required=False, allow_null=True, help_text="Id of the recipe being edited, whose own blocks are ignored.")
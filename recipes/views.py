@@ -1,16 +1,21 @@
 # recipes/views.py (UPDATED)
 import json
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from django.shortcuts import render, get_object_or_404
 from django.urls import reverse
 from django.middleware.csrf import get_token
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
 from .models import Recipe, RecipeBlock
-from .serializers import RecipeListSerializer, RecipeDetailSerializer
+from .serializers import BlockDuplicateCheckSerializer, RecipeListSerializer, RecipeDetailSerializer
+from core.dedup import find_near_duplicates, index_documents, remove_documents
 from core.models import Curriculum, Language, Subject, Label
+from core.revisions import record_revision
+from core.thumbnails import schedule_thumbnail
+from core.views_api import RevisionHistoryMixin
 
 @login_required
 def recipe_browser_view(request):
@@ -78,7 +83,7 @@ def recipe_detail_view(request, pk):
 
 
 # --- API ViewSet ---
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(RevisionHistoryMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows recipes to be viewed, created, edited, or deleted.
     """
@@ -144,6 +149,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         # Process blocks after saving the recipe instance
         self._process_blocks(request, recipe)
+        record_revision(recipe, author=request.user)
+        schedule_thumbnail(recipe)
         
         # Return the final, serialized recipe with all its blocks
         final_serializer = self.get_serializer(recipe)
@@ -160,6 +167,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return
 
         # Clear existing blocks for a clean update
+        remove_documents(RecipeBlock, recipe.blocks.values_list('pk', flat=True))
         recipe.blocks.all().delete()
 
         for index, block_info in enumerate(blocks_data):
@@ -191,6 +199,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
                     image=None # No new image file
                 )
 
+        index_documents(RecipeBlock, [(block.pk, block.dedup_text) for block in recipe.blocks.all()])
+
     def destroy(self, request, *args, **kwargs):
         """
         Overrides the default destroy action to restrict it to staff members.
@@ -201,4 +211,32 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         # If the user is staff, proceed with the standard deletion
-        return super().destroy(request, *args, **kwargs)
\ No newline at end of file
+        remove_documents(RecipeBlock, self.get_object().blocks.values_list('pk', flat=True))
+        return super().destroy(request, *args, **kwargs)
+
+    @action(detail=False, methods=['post'], url_path='check-duplicates', url_name='check-duplicates',
+            parser_classes=[JSONParser, MultiPartParser, FormParser])
+    def check_duplicates(self, request):
+        """
+        Blocks of other recipes closely resembling the posted `content_html`,
+        most similar first, looked up in the MinHash index (see core/dedup.py).
+        """
+        serializer = BlockDuplicateCheckSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_id = serializer.validated_data.get('recipe')
+        exclude = RecipeBlock.objects.filter(recipe_id=recipe_id).values_list('pk', flat=True) if recipe_id else []
+
+        matches = find_near_duplicates(RecipeBlock, serializer.validated_data['content_html'], exclude=exclude)
+        blocks = RecipeBlock.objects.select_related('recipe').in_bulk([pk for pk, _ in matches])
+        duplicates = [
+            {
+                'block': pk,
+                'order': blocks[pk].order,
+                'recipe': blocks[pk].recipe_id,
+                'recipe_title': blocks[pk].recipe.title,
+                'content_html': blocks[pk].content_html,
+                'similarity': round(score, 2),
+            }
+            for pk, score in matches if pk in blocks
+        ]
+        return Response({'count': len(duplicates), 'duplicates': duplicates})
\ No newline at end of file
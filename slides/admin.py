@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Slide, SlideBlock
+from .models import Slide, SlideBlock, SlideTemplateSkeleton
 
 class SlideInline(admin.TabularInline):
     model = SlideBlock
@@ -11,5 +11,13 @@ class SlideAdmin(admin.ModelAdmin):
     # --- AJOUT DE 'status' ICI ---
     list_display = ('title', 'author', 'subject', 'status', 'updated_at')
     list_filter = ('subject__curriculum', 'language', 'author', 'status')
-    search_fields = ('title', 'blocks__content_html')
-    inlines = [SlideInline]
\ No newline at end of file
+    # Compressed blocks keep their text in slot_values (see slides/skeletons.py).
+    search_fields = ('title', 'blocks__content_html', 'blocks__slot_values')
+    inlines = [SlideInline]
+
+@admin.register(SlideTemplateSkeleton)
+class SlideTemplateSkeletonAdmin(admin.ModelAdmin):
+    # Skeletons are immutable: blocks reference them by version.
+    list_display = ('template_name', 'version', 'created_at')
+    list_filter = ('template_name',)
+    readonly_fields = ('template_name', 'version', 'tokens', 'created_at')
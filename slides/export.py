@@ -0,0 +1,48 @@
+# slides/export.py
+"""
+Self-contained offline export of a slideshow.
+
+The whole deck is packaged into one HTML file: slide styles are inlined,
+local images are embedded as data URIs, LaTeX is converted to MathML (which
+browsers render natively, so MathJax is not needed) and a small inline
+script drives navigation and quizzes. Exports are cached per slideshow and
+`updated_at`, so repeated downloads of an unchanged deck cost one cache hit.
+"""
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from core.offline_html import embed_images, inline_stylesheets, render_math
+
+# Exports are keyed by updated_at, so a stale entry is never served; the
+# timeout only bounds how long unused exports occupy the cache.
+EXPORT_CACHE_TIMEOUT = 60 * 60 * 24
+
+EXPORT_STYLESHEETS = ['css/slide_styles.css']
+
+
+def build_offline_html(slideshow):
+    """ Renders `slideshow` as a single HTML document with no external requests. """
+    uris = {}
+    slides = [
+        render_math(embed_images(block.content_html, uris))
+        for block in slideshow.blocks.order_by('order')
+    ]
+    context = {
+        'slideshow': slideshow,
+        'slides': slides,
+        'inline_css': inline_stylesheets(EXPORT_STYLESHEETS),
+    }
+    return render_to_string('slides/slideshow_offline.html', context)
+
+
+def export_cache_key(slideshow):
+    return f"slides:offline-export:{slideshow.pk}:{slideshow.updated_at.timestamp()}"
+
+
+def get_offline_export(slideshow):
+    """ Returns the offline HTML of `slideshow`, building it on a cache miss. """
+    return cache.get_or_set(
+        export_cache_key(slideshow),
+        lambda: build_offline_html(slideshow),
+        EXPORT_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,122 @@
+# slides/handouts.py
+"""
+Printable N-up handouts of a slideshow.
+
+Slides are laid out 1, 2, 4 or 6 per A4 page, optionally next to ruled
+lines for notes, and printed to PDF by the shared headless browser page
+(core/pdf.py). Each slide is rendered on a fixed 1280x720 canvas and scaled
+down into its cell, so it looks the same as in the player.
+
+PDFs are stored under handouts/ in the default storage and named after a
+hash of the slide contents and the layout, so an unchanged deck is never
+printed twice, and the file is streamed to the client from storage.
+"""
+import hashlib
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+
+from core.offline_html import embed_images, inline_stylesheets, render_math
+from core.pdf import render_pdf
+
+HANDOUT_STYLESHEETS = ['css/slide_styles.css']
+
+# Bump when the handout template changes, so cached PDFs are not reused.
+HANDOUT_LAYOUT_VERSION = 1
+
+# Slides per page -> page grid.
+HANDOUT_LAYOUTS = {
+    1: {'landscape': True, 'columns': 1, 'rows': 1},
+    2: {'landscape': False, 'columns': 1, 'rows': 2},
+    4: {'landscape': False, 'columns': 2, 'rows': 2},
+    6: {'landscape': False, 'columns': 2, 'rows': 3},
+}
+
+CANVAS_WIDTH_PX = 1280
+PAGE_MARGIN_MM = 12
+HEADER_MM = 10
+GAP_MM = 6
+NOTES_SHARE = 0.4
+NOTES_LINE_MM = 8
+_PX_PER_MM = 96 / 25.4
+
+
+def _slide_geometry(layout, notes):
+    """ Size (mm) of each slide and of its notes area, and the canvas scale. """
+    page_width, page_height = (297, 210) if layout['landscape'] else (210, 297)
+    area_width = page_width - 2 * PAGE_MARGIN_MM
+    area_height = page_height - 2 * PAGE_MARGIN_MM - HEADER_MM
+    cell_width = (area_width - GAP_MM * (layout['columns'] - 1)) / layout['columns']
+    cell_height = (area_height - GAP_MM * (layout['rows'] - 1)) / layout['rows']
+
+    # Notes go beside the slide in single-column layouts and below it otherwise.
+    notes_beside = notes and layout['columns'] == 1
+    slide_width = cell_width * (1 - NOTES_SHARE) if notes_beside else cell_width
+    slide_height_limit = cell_height * (1 - NOTES_SHARE) if notes and not notes_beside else cell_height
+    slide_width = min(slide_width, slide_height_limit * 16 / 9)
+    slide_height = slide_width * 9 / 16
+
+    if notes_beside:
+        notes_height = slide_height
+    elif notes:
+        notes_height = cell_height - slide_height - GAP_MM / 2
+    else:
+        notes_height = 0
+    return {
+        'cell_width': cell_width,
+        'cell_height': cell_height,
+        'slide_width': slide_width,
+        'slide_height': slide_height,
+        'scale': slide_width * _PX_PER_MM / CANVAS_WIDTH_PX,
+        'notes_beside': notes_beside,
+        'notes_lines': range(max(0, int(notes_height // NOTES_LINE_MM))),
+    }
+
+
+def handout_hash(slideshow, blocks, per_page, notes):
+    """ Identifies a handout by the deck content and the layout it is printed with. """
+    digest = hashlib.sha256()
+    digest.update(f"{HANDOUT_LAYOUT_VERSION}|{per_page}|{int(notes)}|{slideshow.title}".encode('utf-8'))
+    for block in blocks:
+        digest.update(b'\0' + block.template_name.encode('utf-8') + b'\0' + block.content_html.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def build_handout_html(slideshow, blocks, per_page, notes):
+    layout = HANDOUT_LAYOUTS[per_page]
+    uris = {}
+    slides = [render_math(embed_images(block.content_html, uris)) for block in blocks]
+    pages = [slides[i:i + per_page] for i in range(0, len(slides), per_page)] or [[]]
+    context = {
+        'slideshow': slideshow,
+        'pages': pages,
+        'layout': layout,
+        'geometry': _slide_geometry(layout, notes),
+        'notes': notes,
+        'page_margin': PAGE_MARGIN_MM,
+        'header_height': HEADER_MM,
+        'gap': GAP_MM,
+        'notes_line_height': NOTES_LINE_MM,
+        'inline_css': inline_stylesheets(HANDOUT_STYLESHEETS),
+    }
+    return render_to_string('slides/slideshow_handout.html', context)
+
+
+def get_handout(slideshow, per_page, notes):
+    """
+    Returns (storage name, content hash) of the handout PDF, printing it only
+    if this deck content and layout have not been printed before.
+    """
+    blocks = list(slideshow.blocks.order_by('order'))
+    content_hash = handout_hash(slideshow, blocks, per_page, notes)
+    name = f"handouts/{content_hash}.pdf"
+    if not default_storage.exists(name):
+        pdf = render_pdf(
+            build_handout_html(slideshow, blocks, per_page, notes),
+            format='A4',
+            landscape=HANDOUT_LAYOUTS[per_page]['landscape'],
+            printBackground=True,
+        )
+        name = default_storage.save(name, ContentFile(pdf))
+    return name, content_hash
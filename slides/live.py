@@ -0,0 +1,189 @@
+# slides/live.py
+"""
+Live presenter sync for the slideshow player, as a plain ASGI WebSocket
+application (routed from central/asgi.py).
+
+    /ws/slides/<pk>/live/                  follow the presenter
+    /ws/slides/<pk>/live/?role=presenter   drive the room (author or staff)
+
+The presenter sends {"type": "goto", "position": n} and every connection of
+the room receives {"type": "position", "position": n, "sent_at": ms} through
+the broadcast hub (core/broadcast.py). A connection joining mid-presentation
+immediately receives the current position.
+
+Browsers let any page open a WebSocket with the user's cookies, so the
+handshake is refused unless its Origin is one of ALLOWED_HOSTS or
+CSRF_TRUSTED_ORIGINS.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.contrib.auth.models import AnonymousUser
+from django.http.request import validate_host
+from django.utils.http import is_same_domain
+from django.utils.module_loading import import_string
+
+from core.broadcast import get_backend
+
+from .models import Slide
+
+logger = logging.getLogger(__name__)
+
+LIVE_PATH_RE = re.compile(r'^/ws/slides/(?P<pk>[0-9]+)/live/$')
+
+# Application-defined close codes (4000-4999 range).
+CLOSE_NOT_FOUND = 4404
+CLOSE_FORBIDDEN = 4403
+
+
+def live_room(slideshow_id):
+    return f'slides.{slideshow_id}'
+
+
+def live_path(slideshow_id):
+    return f'/ws/slides/{slideshow_id}/live/'
+
+
+def can_present(user, slideshow):
+    """ Same rule as restoring a revision: the author or a staff member. """
+    return user.is_staff or slideshow.author_id == user.id
+
+
+def _header(scope, name):
+    for key, value in scope.get('headers', []):
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def _cookies(scope):
+    value = _header(scope, b'cookie')
+    if value is None:
+        return {}
+    pairs = (item.split('=', 1) for item in value.split(';') if '=' in item)
+    return {key.strip(): val.strip() for key, val in pairs}
+
+
+def origin_allowed(origin):
+    """
+    Whether a handshake from `origin` may proceed: its host must be in
+    ALLOWED_HOSTS, or the origin in CSRF_TRUSTED_ORIGINS (where
+    "https://*.example.com" allows subdomains), as for Django's CSRF check.
+    """
+    if not origin or origin == 'null':
+        return False
+    try:
+        parts = urlsplit(origin)
+        host = parts.hostname
+    except ValueError:
+        return False
+    if not parts.scheme or not host:
+        return False
+    allowed_hosts = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not allowed_hosts:
+        allowed_hosts = ['.localhost', '127.0.0.1', '[::1]']
+    if validate_host(host, allowed_hosts):
+        return True
+    for trusted in settings.CSRF_TRUSTED_ORIGINS:
+        if '*' not in trusted:
+            if origin == trusted:
+                return True
+        else:
+            trusted_parts = urlsplit(trusted)
+            if trusted_parts.scheme == parts.scheme and is_same_domain(parts.netloc, trusted_parts.netloc.lstrip('*')):
+                return True
+    return False
+
+
+@sync_to_async
+def _session_user(scope):
+    """ Resolves the user from the Django session cookie of the handshake. """
+    session_key = _cookies(scope).get(settings.SESSION_COOKIE_NAME)
+    if not session_key:
+        return AnonymousUser()
+    session = import_string(settings.SESSION_ENGINE + '.SessionStore')(session_key)
+    return get_user(SimpleNamespace(session=session))
+
+
+@sync_to_async
+def _get_slideshow(pk):
+    return Slide.objects.only('id', 'author_id').filter(pk=pk).first()
+
+
+def _position_message(data):
+    """ Turns a presenter's "goto" into the message broadcast to the room. """
+    if not isinstance(data, dict) or data.get('type') != 'goto':
+        return None
+    position = data.get('position')
+    if not isinstance(position, int) or isinstance(position, bool) or position < 0:
+        return None
+    return json.dumps({'type': 'position', 'position': position, 'sent_at': int(time.time() * 1000)})
+
+
+async def _forward(subscription, send):
+    while True:
+        await send({'type': 'websocket.send', 'text': await subscription.get()})
+
+
+def _log_forward_error(task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Forwarding live slideshow messages failed", exc_info=task.exception())
+
+
+async def live_slideshow_application(scope, receive, send):
+    """
+    ASGI application for one live connection. `scope['user']` is used when
+    set by a wrapping middleware; otherwise the session cookie is read.
+    """
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    if not origin_allowed(_header(scope, b'origin')):
+        await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+        return
+
+    match = LIVE_PATH_RE.match(scope['path'])
+    slideshow = await _get_slideshow(int(match['pk'])) if match else None
+    if slideshow is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+
+    user = scope.get('user') or await _session_user(scope)
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    is_presenter = query.get('role', [''])[0] == 'presenter'
+    if not user.is_authenticated or (is_presenter and not can_present(user, slideshow)):
+        await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+        return
+
+    await send({'type': 'websocket.accept'})
+    hub = get_backend()
+    room = live_room(slideshow.pk)
+    subscription = await hub.subscribe(room)
+    forwarder = asyncio.create_task(_forward(subscription, send))
+    forwarder.add_done_callback(_log_forward_error)
+    try:
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            # Viewers only listen; anything they send is ignored.
+            if not is_presenter or message['type'] != 'websocket.receive':
+                continue
+            try:
+                data = json.loads(message.get('text') or '')
+            except ValueError:
+                continue
+            broadcast = _position_message(data)
+            if broadcast is not None:
+                await hub.publish(room, broadcast)
+    finally:
+        forwarder.cancel()
+        await hub.unsubscribe(subscription)
@@ -0,0 +1,34 @@
+# slides/management/commands/compress_slides.py
+
+from django.core.management.base import BaseCommand
+
+from slides.models import SlideBlock
+from slides.skeletons import SKELETON_SAMPLE_SIZE, recompress_blocks, refresh_skeleton
+
+
+class Command(BaseCommand):
+    help = "Learns a skeleton for each slide template and stores slide blocks against it."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--template', action='append', dest='templates',
+                            help="Only process this template (can be repeated). Default: every template in use.")
+        parser.add_argument('--sample', type=int, default=SKELETON_SAMPLE_SIZE,
+                            help=f"Number of recent blocks a skeleton is learned from (default: {SKELETON_SAMPLE_SIZE}).")
+        parser.add_argument('--no-refresh', action='store_true',
+                            help="Reuse the existing skeletons instead of learning new versions.")
+
+    def handle(self, *args, **options):
+        templates = options['templates'] or list(
+            SlideBlock.objects.order_by().values_list('template_name', flat=True).distinct()
+        )
+
+        for template_name in templates:
+            if not options['no_refresh']:
+                skeleton = refresh_skeleton(template_name, sample_size=max(1, options['sample']))
+                if skeleton:
+                    self.stdout.write(f"{template_name}: new skeleton v{skeleton.version} ({len(skeleton.tokens)} tokens).")
+
+            before, after = recompress_blocks(SlideBlock.objects.filter(template_name=template_name))
+            self.stdout.write(f"{template_name}: {before} -> {after} characters stored.")
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(templates)} template(s)."))
@@ -0,0 +1,100 @@
+# slides/management/commands/import_legacy_presentations.py
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.legacy import NaturalKeyResolver
+from core.streaming import batched, iter_json_array
+from slides.models import Slide, SlideBlock, SlideSearchTerm
+from slides.search import tokenize
+
+DEFAULT_PATH = settings.BASE_DIR / 'init' / 'presentations_master.json'
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams a legacy presentations archive ([{metadata, slides: [{template, htmlContent}]}]) "
+        "into slideshows and slide blocks, with batched bulk inserts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=str(DEFAULT_PATH), help="Archive to import.")
+        parser.add_argument('--batch-size', type=int, default=200, help="Decks inserted per transaction (default: 200).")
+        parser.add_argument('--default-author', help="Username used when the legacy writer does not exist.")
+
+    def handle(self, *args, **options):
+        resolver = NaturalKeyResolver()
+        default_author_id = None
+        if options['default_author']:
+            default_author_id = resolver.user_ids([options['default_author']])[options['default_author']]
+            if default_author_id is None:
+                raise CommandError(f"Unknown user '{options['default_author']}'.")
+
+        self.decks = self.blocks = self.skipped = 0
+        started = time.perf_counter()
+        try:
+            with open(options['path'], encoding='utf-8') as archive:
+                for batch in batched(iter_json_array(archive), max(1, options['batch_size'])):
+                    self._import_batch(batch, resolver, default_author_id)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Could not read {options['path']}: {exc}")
+        elapsed = max(time.perf_counter() - started, 1e-9)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.decks} deck(s) and {self.blocks} slide(s), skipped {self.skipped}, "
+            f"in {elapsed:.2f}s ({self.decks / elapsed:.0f} decks/s, {self.blocks / elapsed:.0f} slides/s)."
+        ))
+
+    def _import_batch(self, items, resolver, default_author_id):
+        metadata = [item.get('metadata') or {} for item in items]
+        authors = resolver.user_ids({meta.get('writer') for meta in metadata})
+
+        # A deck is identified by its (title, author): re-running the import skips it.
+        titles = {(meta.get('title') or '').strip()[:200] for meta in metadata}
+        existing = set(Slide.objects.filter(title__in=titles).values_list('title', 'author_id'))
+
+        decks, slide_lists = [], []
+        for item, meta in zip(items, metadata):
+            title = (meta.get('title') or '').strip()[:200]
+            author_id = authors.get(meta.get('writer')) or default_author_id
+            if not title or (title, author_id) in existing:
+                self.skipped += 1
+                continue
+            existing.add((title, author_id))
+
+            curriculum_id = resolver.curriculum_id(meta.get('curriculum'))
+            language_id = resolver.language_id(meta.get('language'))
+            decks.append(Slide(
+                title=title,
+                author_id=author_id,
+                curriculum_id=curriculum_id,
+                language_id=language_id,
+                subject_id=resolver.subject_id(meta.get('subjectText'), meta.get('subject'), curriculum_id, language_id),
+                topic_id=resolver.label_id(meta.get('topic')),
+            ))
+            slide_lists.append(item.get('slides') or [])
+
+        if not decks:
+            return
+        with transaction.atomic():
+            # bulk_create bypasses Slide.save(), so the title index is filled here.
+            Slide.objects.bulk_create(decks)
+            blocks = [
+                SlideBlock(
+                    slide=deck, order=order,
+                    template_name=(slide.get('template') or 'basic')[:50],
+                    content_html=slide.get('htmlContent') or '',
+                )
+                for deck, slides in zip(decks, slide_lists)
+                for order, slide in enumerate(slides)
+            ]
+            SlideBlock.objects.bulk_create(blocks, batch_size=500)
+            SlideSearchTerm.objects.bulk_create(
+                [SlideSearchTerm(slide=deck, term=term) for deck in decks for term in tokenize(deck.title)],
+                batch_size=500,
+            )
+        self.decks += len(decks)
+        self.blocks += len(blocks)
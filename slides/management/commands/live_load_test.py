@@ -0,0 +1,146 @@
+# slides/management/commands/live_load_test.py
+
+import asyncio
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from slides.live import live_path, live_slideshow_application
+from slides.models import Slide
+
+# Propagation target for a presenter's slide change to reach every viewer.
+TARGET_MS = 100
+
+
+def default_origin():
+    """ An origin the live handshake accepts: the first allowed host, over HTTPS. """
+    for host in settings.ALLOWED_HOSTS:
+        host = host.lstrip('.')
+        if host and host != '*':
+            return f'https://{host}'
+    return 'http://localhost'
+
+
+class _Connection:
+    """ Drives live_slideshow_application like an ASGI server would. """
+
+    def __init__(self, slideshow_id, user, origin, presenter=False):
+        self.scope = {
+            'type': 'websocket',
+            'path': live_path(slideshow_id),
+            'query_string': b'role=presenter' if presenter else b'',
+            # The handshake is refused without an allowed Origin (see slides/live.py).
+            'headers': [(b'origin', origin.encode('latin-1'))],
+            'user': user,
+        }
+        self.incoming = asyncio.Queue()
+        self.accepted = asyncio.Event()
+        self.close_code = None
+        self.arrivals = {}
+        self.task = None
+
+    async def _receive(self):
+        return await self.incoming.get()
+
+    async def _send(self, message):
+        if message['type'] == 'websocket.accept':
+            self.accepted.set()
+        elif message['type'] == 'websocket.close':
+            self.close_code = message.get('code')
+            self.accepted.set()
+        elif message['type'] == 'websocket.send':
+            position = json.loads(message['text'])['position']
+            self.arrivals.setdefault(position, time.perf_counter())
+
+    async def open(self):
+        self.task = asyncio.create_task(live_slideshow_application(self.scope, self._receive, self._send))
+        await self.incoming.put({'type': 'websocket.connect'})
+        await self.accepted.wait()
+        if self.close_code is not None:
+            raise CommandError(f"Connection refused (code {self.close_code}).")
+
+    async def send_json(self, data):
+        await self.incoming.put({'type': 'websocket.receive', 'text': json.dumps(data)})
+
+    async def close(self):
+        await self.incoming.put({'type': 'websocket.disconnect', 'code': 1000})
+        await self.task
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests live presenter sync: connects one presenter and N viewers to a "
+        "slideshow room in-process and reports how long slide changes take to reach every viewer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('slideshow', type=int, help="Id of the slideshow whose room is used.")
+        parser.add_argument('--viewers', type=int, default=300, help="Number of viewer connections (default: 300).")
+        parser.add_argument('--moves', type=int, default=50, help="Number of slide changes sent (default: 50).")
+        parser.add_argument('--interval', type=float, default=0.05,
+                            help="Seconds between two slide changes (default: 0.05).")
+        parser.add_argument('--username', help="User the connections authenticate as (default: the slideshow author).")
+        parser.add_argument('--origin', help="Origin header of the handshakes (default: the first of ALLOWED_HOSTS).")
+
+    def handle(self, *args, **options):
+        slideshow = Slide.objects.filter(pk=options['slideshow']).first()
+        if slideshow is None:
+            raise CommandError("Slideshow not found.")
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+        else:
+            user = slideshow.author or User.objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError("No user to connect as: pass --username.")
+
+        origin = options['origin'] or default_origin()
+        latencies, missed = asyncio.run(self._run(slideshow.pk, user, origin, max(1, options['viewers']),
+                                                  max(1, options['moves']), options['interval']))
+        if not latencies:
+            raise CommandError("No position message was delivered.")
+
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f"{options['viewers']} viewers, {options['moves']} moves: {len(latencies)} deliveries, "
+            f"{missed} superseded before delivery."
+        )
+        self.stdout.write(
+            f"Propagation (ms): median {statistics.median(latencies):.2f}, "
+            f"p95 {p95:.2f}, max {latencies[-1]:.2f}."
+        )
+        if p95 <= TARGET_MS:
+            self.stdout.write(self.style.SUCCESS(f"p95 is within the {TARGET_MS} ms target."))
+        else:
+            self.stdout.write(self.style.WARNING(f"p95 exceeds the {TARGET_MS} ms target."))
+
+    async def _run(self, slideshow_id, user, origin, viewer_count, moves, interval):
+        viewers = [_Connection(slideshow_id, user, origin) for _ in range(viewer_count)]
+        presenter = _Connection(slideshow_id, user, origin, presenter=True)
+        for connection in [presenter, *viewers]:
+            await connection.open()
+
+        sent_at = {}
+        for position in range(1, moves + 1):
+            sent_at[position] = time.perf_counter()
+            await presenter.send_json({'type': 'goto', 'position': position})
+            await asyncio.sleep(interval)
+        # Let the last message reach everyone.
+        await asyncio.sleep(max(interval, 0.2))
+
+        for connection in [presenter, *viewers]:
+            await connection.close()
+
+        latencies, missed = [], 0
+        for viewer in viewers:
+            for position, started in sent_at.items():
+                arrived = viewer.arrivals.get(position)
+                if arrived is None:
+                    missed += 1
+                else:
+                    latencies.append((arrived - started) * 1000)
+        return latencies, missed
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.17 on 2026-10-19 09:00
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copy of slides.search.tokenize as of this migration, so later
+# changes to the live tokenizer do not change what this migration writes.
+_WORD_RE = re.compile(r"\w+")
+_TERM_MAX_LENGTH = 100
+
+
+def tokenize(text):
+    normalized = unicodedata.normalize("NFKD", text or "")
+    normalized = "".join(c for c in normalized if not unicodedata.combining(c)).lower()
+    return sorted({word[:_TERM_MAX_LENGTH] for word in _WORD_RE.findall(normalized)})
+
+
+def build_search_index(apps, schema_editor):
+    """ Indexes the titles of the slideshows that already exist. """
+    Slide = apps.get_model("slides", "Slide")
+    SlideSearchTerm = apps.get_model("slides", "SlideSearchTerm")
+    terms = [
+        SlideSearchTerm(slide_id=slide_id, term=term)
+        for slide_id, title in Slide.objects.values_list("id", "title").iterator()
+        for term in tokenize(title)
+    ]
+    SlideSearchTerm.objects.bulk_create(terms, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("slides", "0005_slide_status"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="slide",
+            index=models.Index(fields=["-updated_at"], name="slides_slide_updated_idx"),
+        ),
+        migrations.CreateModel(
+            name="SlideSearchTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=100)),
+                (
+                    "slide",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_terms",
+                        to="slides.slide",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["term", "slide"], name="slides_search_term_idx")
+                ],
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
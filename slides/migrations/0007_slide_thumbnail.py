@@ -0,0 +1,30 @@
+# Generated by Django 4.2.17 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("slides", "0006_slide_search_and_updated_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="slide",
+            name="thumbnail",
+            field=models.ImageField(
+                blank=True, editable=False, null=True, upload_to="thumbnails/slides/"
+            ),
+        ),
+        migrations.AddField(
+            model_name="slide",
+            name="thumbnail_source_updated_at",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text="updated_at of the slideshow when the thumbnail was rendered.",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.17 on 2026-10-19 11:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("slides", "0007_slide_thumbnail"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlideTemplateSkeleton",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("template_name", models.CharField(max_length=50)),
+                ("version", models.PositiveIntegerField()),
+                (
+                    "tokens",
+                    models.JSONField(
+                        help_text="HTML tokens (tags and text) of the skeleton."
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["template_name", "-version"],
+                "unique_together": {("template_name", "version")},
+            },
+        ),
+        migrations.AlterField(
+            model_name="slideblock",
+            name="content_html",
+            field=models.TextField(
+                blank=True,
+                help_text="The raw HTML content of the slide (empty when stored against a skeleton).",
+            ),
+        ),
+        migrations.AddField(
+            model_name="slideblock",
+            name="skeleton",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="blocks",
+                to="slides.slidetemplateskeleton",
+            ),
+        ),
+        migrations.AddField(
+            model_name="slideblock",
+            name="slot_values",
+            field=models.JSONField(
+                blank=True,
+                editable=False,
+                help_text="[[start, end, text], ...] replacing skeleton tokens.",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.17 on 2026-10-19 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("slides", "0008_slidetemplateskeleton_and_more"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="slide",
+            name="slides_slide_updated_idx",
+        ),
+        migrations.AddIndex(
+            model_name="slide",
+            index=models.Index(fields=["-updated_at", "-id"], name="slides_slide_updated_id_idx"),
+        ),
+    ]
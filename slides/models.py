@@ -30,25 +30,151 @@ class Slide(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Preview of the first slide, rendered in the background (see core/thumbnails.py)
+    thumbnail = models.ImageField(upload_to='thumbnails/slides/', null=True, blank=True, editable=False)
+    thumbnail_source_updated_at = models.DateTimeField(null=True, blank=True, editable=False, help_text="updated_at of the slideshow when the thumbnail was rendered.")
+
     class Meta:
         ordering = ['-updated_at']
         verbose_name = "Slideshow"
         verbose_name_plural = "Slideshows"
+        indexes = [
+            # Backs the cursor pagination of the slideshow list.
+            models.Index(fields=['-updated_at', '-id'], name='slides_slide_updated_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        from .search import index_slide_title
+
+        title_changed = self._state.adding or self.title != getattr(self, '_indexed_title', None)
+        super().save(*args, **kwargs)
+        # Keep the title search index in step with the title.
+        if title_changed:
+            index_slide_title(self)
+        self._indexed_title = self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._indexed_title = instance.__dict__.get('title')
+        return instance
+
+class SlideTemplateSkeleton(models.Model):
+    """
+    The HTML shared by every slide of a template, stored once as a token list
+    (see slides/skeletons.py). Versions are never modified: a new version is
+    added when the template changes, and older blocks keep their version.
+    """
+    template_name = models.CharField(max_length=50)
+    version = models.PositiveIntegerField()
+    tokens = models.JSONField(help_text="HTML tokens (tags and text) of the skeleton.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('template_name', 'version')
+        ordering = ['template_name', '-version']
+
+    def __str__(self):
+        return f"{self.template_name} v{self.version}"
+
+class SlideBlockQuerySet(models.QuerySet):
+    """ Compresses content_html against its template skeleton on bulk writes. """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with _packed(objs):
+            return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        if 'content_html' not in fields:
+            return super().bulk_update(objs, fields, *args, **kwargs)
+        fields = [*fields, 'skeleton', 'slot_values']
+        with _packed(objs):
+            return super().bulk_update(objs, fields, *args, **kwargs)
+
+class _packed:
+    """
+    Swaps the full HTML of `blocks` for their stored (compressed) form while
+    they are written, then puts the full HTML back on the instances. The
+    latest skeleton of every template involved is looked up once, however
+    many blocks are written.
+    """
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+
+    def __enter__(self):
+        from .skeletons import latest_skeleton_ids, pack
+
+        latest_ids = latest_skeleton_ids(block.template_name for block in self.blocks)
+        self.full_html = []
+        for block in self.blocks:
+            self.full_html.append(block.content_html)
+            block.content_html, block.skeleton_id, block.slot_values = pack(
+                latest_ids.get(block.template_name), block.content_html
+            )
+
+    def __exit__(self, *exc_info):
+        for block, html in zip(self.blocks, self.full_html):
+            block.content_html = html
+
 class SlideBlock(models.Model):
     """
     Represents a single slide (a content block) within a Slideshow.
+
+    When its template has a skeleton, only the slot values that differ from
+    the skeleton are stored and `content_html` is left empty in the table.
+    Instances always expose the full HTML: it is rebuilt when the row is
+    loaded and compressed again when it is saved.
     """
     slide = models.ForeignKey(Slide, on_delete=models.CASCADE, related_name='blocks')
     order = models.PositiveIntegerField(help_text="The order of the slide in the presentation.")
     template_name = models.CharField(max_length=50, help_text="The name of the template used for this slide.")
-    content_html = models.TextField(help_text="The raw HTML content of the slide.")
+    content_html = models.TextField(blank=True, help_text="The raw HTML content of the slide (empty when stored against a skeleton).")
+    skeleton = models.ForeignKey(SlideTemplateSkeleton, on_delete=models.PROTECT, null=True, blank=True, editable=False, related_name='blocks')
+    slot_values = models.JSONField(null=True, blank=True, editable=False, help_text="[[start, end, text], ...] replacing skeleton tokens.")
+
+    objects = SlideBlockQuerySet.as_manager()
 
     class Meta:
         ordering = ['slide', 'order']
 
     def __str__(self):
-        return f"Block {self.order} for Slideshow: {self.slide.title}"
\ No newline at end of file
+        return f"Block {self.order} for Slideshow: {self.slide.title}"
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content_html' in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'skeleton', 'slot_values']
+        with _packed([self]):
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        from .skeletons import expand
+
+        instance = super().from_db(db, field_names, values)
+        skeleton_id = instance.__dict__.get('skeleton_id')
+        if skeleton_id is not None and 'slot_values' in instance.__dict__:
+            instance.content_html = expand(skeleton_id, instance.slot_values)
+        return instance
+
+class SlideSearchTerm(models.Model):
+    """
+    One normalized word of a slideshow title, used by the indexed title search
+    (see slides/search.py).
+    """
+    slide = models.ForeignKey(Slide, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=100)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'slide'], name='slides_search_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.slide_id}"
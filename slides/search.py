@@ -0,0 +1,47 @@
+# slides/search.py
+"""
+Indexed title search for slideshows.
+
+Each slideshow title is split into normalized words stored in
+SlideSearchTerm. A search word is answered with a range scan on the indexed
+`term` column (term >= word AND term < word + U+FFFF), i.e. a prefix match
+that uses the B-tree index instead of a LIKE '%q%' scan of every title.
+"""
+import re
+import unicodedata
+
+from .models import SlideSearchTerm
+
+_WORD_RE = re.compile(r'\w+')
+
+# Upper bound used to turn a prefix into an index range.
+_PREFIX_END = '\uffff'
+
+
+def tokenize(text):
+    """ Lowercases, strips accents and splits `text` into distinct words. """
+    normalized = unicodedata.normalize('NFKD', text or '')
+    normalized = ''.join(c for c in normalized if not unicodedata.combining(c)).lower()
+    max_length = SlideSearchTerm._meta.get_field('term').max_length
+    return sorted({word[:max_length] for word in _WORD_RE.findall(normalized)})
+
+
+def index_slide_title(slide):
+    """ Replaces the search terms of `slide` with the words of its title. """
+    SlideSearchTerm.objects.filter(slide=slide).delete()
+    SlideSearchTerm.objects.bulk_create(
+        [SlideSearchTerm(slide=slide, term=term) for term in tokenize(slide.title)]
+    )
+
+
+def search_slides(queryset, query):
+    """
+    Restricts `queryset` to the slideshows whose title contains a word
+    starting with each word of `query`.
+    """
+    for word in tokenize(query):
+        matching = SlideSearchTerm.objects.filter(
+            term__gte=word, term__lt=word + _PREFIX_END
+        ).values('slide_id')
+        queryset = queryset.filter(id__in=matching)
+    return queryset
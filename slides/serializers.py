@@ -1,15 +1,39 @@
 # slides/serializers.py
 
+from django.db import transaction
 from rest_framework import serializers
 from .models import Slide, SlideBlock
 from core.models import Subject, Label, Language, Curriculum
 
 class SlideBlockSerializer(serializers.ModelSerializer):
     """ Serializer for individual slide blocks (nested within a slideshow). """
+    # Writable so that a saved deck can send its block ids back and let the
+    # update match blocks by id instead of by position.
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = SlideBlock
         fields = ['id', 'order', 'template_name', 'content_html']
-        read_only_fields = ['id']
+
+class CompactSlideBlockSerializer(serializers.ModelSerializer):
+    """
+    Read-only block representation for the player API: a block stored against
+    a template skeleton is sent as its skeleton id and slot values, and the
+    client rebuilds the HTML from the skeletons listed in the outline.
+    """
+
+    class Meta:
+        model = SlideBlock
+        fields = ['id', 'order', 'template_name', 'content_html', 'skeleton', 'slot_values']
+        read_only_fields = fields
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if data['skeleton'] is None:
+            del data['skeleton'], data['slot_values']
+        else:
+            del data['content_html']
+        return data
 
 class SlideshowListSerializer(serializers.ModelSerializer):
     """
@@ -18,10 +42,11 @@ class SlideshowListSerializer(serializers.ModelSerializer):
     """
     author_name = serializers.SerializerMethodField()
     subject_name = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Slide
-        fields = ['id', 'title', 'author_name', 'status', 'subject_name', 'updated_at']
+        fields = ['id', 'title', 'author_name', 'status', 'subject_name', 'thumbnail_url', 'updated_at']
 
     def get_author_name(self, obj):
         """ Safely get the author's username, or return 'N/A' if no author. """
@@ -31,6 +56,10 @@ class SlideshowListSerializer(serializers.ModelSerializer):
         """ Safely get the subject's name, or return 'N/A' if no subject. """
         return obj.subject.name if obj.subject else 'N/A'
 
+    def get_thumbnail_url(self, obj):
+        """ URL of the first-slide preview, or None until it has been rendered. """
+        return obj.thumbnail.url if obj.thumbnail else None
+
 
 class SlideshowDetailSerializer(serializers.ModelSerializer):
     """
@@ -57,31 +86,94 @@ class SlideshowDetailSerializer(serializers.ModelSerializer):
         Handle creation of a slideshow and its nested slide blocks.
         """
         blocks_data = validated_data.pop('blocks', [])
-        slideshow = Slide.objects.create(**validated_data)
-        for block_data in blocks_data:
-            SlideBlock.objects.create(slide=slideshow, **block_data)
+        with transaction.atomic():
+            slideshow = Slide.objects.create(**validated_data)
+            self._sync_blocks(slideshow, blocks_data)
         return slideshow
 
     def update(self, instance, validated_data):
         """
         Handle updating a slideshow and its nested slide blocks.
-        This completely replaces the old blocks with the new set.
+        The new set of blocks replaces the old one, but only the blocks that
+        actually changed are written.
         """
         blocks_data = validated_data.pop('blocks', None)
-        
-        # Update standard fields on the Slideshow instance
-        instance.title = validated_data.get('title', instance.title)
-        instance.subject = validated_data.get('subject', instance.subject)
-        instance.topic = validated_data.get('topic', instance.topic)
-        instance.language = validated_data.get('language', instance.language)
-        instance.curriculum = validated_data.get('curriculum', instance.curriculum)
-        instance.status = validated_data.get('status', instance.status)
-        instance.save()
-
-        # If block data is provided, replace the existing blocks
-        if blocks_data is not None:
-            instance.blocks.all().delete()
-            for block_data in blocks_data:
-                SlideBlock.objects.create(slide=instance, **block_data)
-                
-        return instance
\ No newline at end of file
+
+        with transaction.atomic():
+            # Update standard fields on the Slideshow instance
+            instance.title = validated_data.get('title', instance.title)
+            instance.subject = validated_data.get('subject', instance.subject)
+            instance.topic = validated_data.get('topic', instance.topic)
+            instance.language = validated_data.get('language', instance.language)
+            instance.curriculum = validated_data.get('curriculum', instance.curriculum)
+            instance.status = validated_data.get('status', instance.status)
+            instance.save()
+
+            if blocks_data is not None:
+                self._sync_blocks(instance, blocks_data)
+
+        return instance
+
+    def _sync_blocks(self, slideshow, blocks_data):
+        """
+        Diffs the submitted blocks against the stored ones and applies the
+        difference with at most one DELETE, two bulk UPDATEs and one bulk
+        INSERT. A submitted block is matched to a stored block by its id when
+        given, otherwise by its position; unchanged blocks are not written.
+        """
+        existing = list(slideshow.blocks.all()) if slideshow.pk else []
+        by_id = {block.id: block for block in existing}
+        by_order = {block.order: block for block in existing}
+        incoming = sorted(blocks_data, key=lambda data: data.get('order', 0))
+
+        # Claim blocks by id first so a positional match cannot steal them.
+        matches, claimed = [], set()
+        for data in incoming:
+            block = by_id.get(data.get('id'))
+            if block is not None and block.id in claimed:
+                block = None
+            matches.append(block)
+            if block is not None:
+                claimed.add(block.id)
+        for position, block in enumerate(matches):
+            if block is None:
+                candidate = by_order.get(position)
+                if candidate is not None and candidate.id not in claimed:
+                    matches[position] = candidate
+                    claimed.add(candidate.id)
+
+        to_create, to_update, moved = [], [], []
+        for position, (data, block) in enumerate(zip(incoming, matches)):
+            template_name = data.get('template_name', '')
+            content_html = data.get('content_html', '')
+            if block is None:
+                to_create.append(SlideBlock(
+                    slide=slideshow, order=position,
+                    template_name=template_name, content_html=content_html,
+                ))
+                continue
+            changed = block.template_name != template_name or block.content_html != content_html
+            if block.order != position:
+                moved.append((block, position))
+                changed = True
+            if changed:
+                block.template_name = template_name
+                block.content_html = content_html
+                to_update.append(block)
+
+        stale_ids = [block.id for block in existing if block.id not in claimed]
+        if stale_ids:
+            SlideBlock.objects.filter(id__in=stale_ids).delete()
+        if moved:
+            # (slide, order) is unique in the database: park moved blocks on
+            # free positions first so swapping two slides cannot collide.
+            offset = max(len(existing), len(incoming)) + 1
+            for block, position in moved:
+                block.order = position + offset
+            SlideBlock.objects.bulk_update([block for block, _ in moved], ['order'])
+            for block, position in moved:
+                block.order = position
+        if to_update:
+            SlideBlock.objects.bulk_update(to_update, ['order', 'template_name', 'content_html'])
+        if to_create:
+            SlideBlock.objects.bulk_create(to_create)
@@ -0,0 +1,167 @@
+# slides/skeletons.py
+"""
+Template-skeleton compression of slide HTML.
+
+Slides made from the same template repeat the same boilerplate (logo image,
+container divs, `.line` separators, closing tags). A SlideTemplateSkeleton
+stores that boilerplate once, as a list of HTML tokens, and a compressed
+SlideBlock only stores the hunks where it differs from its skeleton:
+
+    slot_values = [[start, end, text], ...]
+
+meaning "replace skeleton tokens [start:end] with `text`". Decoding is exact
+for any HTML, so a block can always be compressed against any skeleton.
+Skeletons are versioned and never modified, so a template change only adds
+a new version and existing rows stay valid.
+"""
+import difflib
+import re
+from functools import lru_cache
+
+from django.db.models import Max
+
+_TOKEN_RE = re.compile(r'(<[^>]+>)')
+
+# Number of existing blocks sampled when learning a skeleton.
+SKELETON_SAMPLE_SIZE = 50
+
+
+def tokenize(html):
+    """ Splits HTML into tags and the text between them (empty text kept). """
+    return _TOKEN_RE.split(html or '')
+
+
+def learn_skeleton(htmls):
+    """
+    Returns the tokens common, in order, to every HTML string of `htmls`:
+    the boilerplate shared by all the sampled slides of a template.
+    """
+    skeleton = None
+    for html in htmls:
+        tokens = tokenize(html)
+        if skeleton is None:
+            skeleton = tokens
+            continue
+        matcher = difflib.SequenceMatcher(None, skeleton, tokens, autojunk=False)
+        skeleton = [
+            token
+            for start, _, size in matcher.get_matching_blocks()
+            for token in skeleton[start:start + size]
+        ]
+    return skeleton or []
+
+
+def encode(skeleton_tokens, html):
+    """ Returns the slot values turning `skeleton_tokens` into `html`. """
+    tokens = tokenize(html)
+    matcher = difflib.SequenceMatcher(None, skeleton_tokens, tokens, autojunk=False)
+    return [
+        [i1, i2, ''.join(tokens[j1:j2])]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != 'equal'
+    ]
+
+
+def decode(skeleton_tokens, slot_values):
+    parts = []
+    position = 0
+    for start, end, text in slot_values:
+        parts.extend(skeleton_tokens[position:start])
+        parts.append(text)
+        position = end
+    parts.extend(skeleton_tokens[position:])
+    return ''.join(parts)
+
+
+@lru_cache(maxsize=256)
+def skeleton_tokens(skeleton_id):
+    """ Skeleton versions are immutable, so their tokens are cached for good. """
+    from .models import SlideTemplateSkeleton
+
+    return tuple(SlideTemplateSkeleton.objects.values_list('tokens', flat=True).get(pk=skeleton_id))
+
+
+def latest_skeleton_ids(template_names):
+    """
+    Maps each of `template_names` that has a skeleton to the id of its newest
+    one, in a single query. Versions are only ever added, so the newest is
+    the highest id. Not cached across calls: a new version is created by
+    compress_slides in another process.
+    """
+    from .models import SlideTemplateSkeleton
+
+    rows = (
+        SlideTemplateSkeleton.objects.filter(template_name__in=set(template_names))
+        .order_by().values('template_name').annotate(latest_id=Max('id'))
+    )
+    return {row['template_name']: row['latest_id'] for row in rows}
+
+
+def expand(skeleton_id, slot_values):
+    return decode(skeleton_tokens(skeleton_id), slot_values or [])
+
+
+def pack(skeleton_id, html):
+    """
+    Returns the (content_html, skeleton_id, slot_values) to store for a block
+    against the skeleton `skeleton_id` (the latest of its template, see
+    latest_skeleton_ids). The block stays uncompressed when there is no
+    skeleton or when compression would not make the row smaller.
+    """
+    if skeleton_id is None:
+        return html, None, None
+    slot_values = encode(skeleton_tokens(skeleton_id), html)
+    if sum(len(text) + 12 for _, _, text in slot_values) >= len(html):
+        return html, None, None
+    return '', skeleton_id, slot_values
+
+
+def refresh_skeleton(template_name, sample_size=SKELETON_SAMPLE_SIZE):
+    """
+    Learns the skeleton of `template_name` from its most recent blocks and
+    stores it as a new version if it differs from the latest one.
+    Returns the new SlideTemplateSkeleton, or None if nothing changed.
+    """
+    from .models import SlideBlock, SlideTemplateSkeleton
+
+    blocks = SlideBlock.objects.filter(template_name=template_name).order_by('-id')[:sample_size]
+    tokens = learn_skeleton(block.content_html for block in blocks)
+    if not ''.join(tokens).strip():
+        return None
+
+    latest = SlideTemplateSkeleton.objects.filter(template_name=template_name).order_by('-version').first()
+    if latest is not None and latest.tokens == tokens:
+        return None
+    skeleton = SlideTemplateSkeleton.objects.create(
+        template_name=template_name,
+        version=latest.version + 1 if latest else 1,
+        tokens=tokens,
+    )
+    return skeleton
+
+
+def recompress_blocks(queryset, batch_size=500):
+    """
+    Re-stores every block of `queryset` against the latest skeleton of its
+    template. Returns the stored size of the HTML (in characters) before and after.
+    """
+    from .models import SlideBlock
+
+    def stored_size(block):
+        if block.skeleton_id is None:
+            return len(block.content_html)
+        return sum(len(text) for _, _, text in block.slot_values or [])
+
+    before = after = 0
+    batch = []
+    for block in queryset.order_by('pk').iterator(chunk_size=batch_size):
+        before += stored_size(block)
+        batch.append(block)
+        if len(batch) >= batch_size:
+            SlideBlock.objects.bulk_update(batch, ['content_html'])
+            after += sum(stored_size(b) for b in batch)
+            batch = []
+    if batch:
+        SlideBlock.objects.bulk_update(batch, ['content_html'])
+        after += sum(stored_size(b) for b in batch)
+    return before, after
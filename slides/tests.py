@@ -1,3 +1,179 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .handouts import build_handout_html
+from .live import CLOSE_FORBIDDEN, live_slideshow_application, origin_allowed
+from .models import Slide, SlideBlock, SlideTemplateSkeleton
+from .serializers import SlideshowDetailSerializer
+from .skeletons import skeleton_tokens, tokenize
+
+
+class HandoutImageTests(SimpleTestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base)
+        self.media_root = os.path.join(self.base, 'media')
+        os.makedirs(self.media_root)
+        with open(os.path.join(self.base, 'secret.txt'), 'w') as f:
+            f.write('SECRET')
+        override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_URL='/media/')
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_media_url_outside_media_root_is_not_embedded(self):
+        slideshow = SimpleNamespace(title='Deck')
+        block = SimpleNamespace(template_name='text', content_html='<img src="/media/../secret.txt">')
+        html = build_handout_html(slideshow, [block], 1, False)
+        self.assertIn('src="/media/../secret.txt"', html)
+        self.assertNotIn('data:text/plain', html)
+
+
+class LiveOriginTests(SimpleTestCase):
+
+    @override_settings(ALLOWED_HOSTS=['example.com'], CSRF_TRUSTED_ORIGINS=['https://*.trusted.org'])
+    def test_origin_must_be_allowed(self):
+        self.assertTrue(origin_allowed('https://example.com'))
+        self.assertTrue(origin_allowed('http://example.com:8000'))
+        self.assertTrue(origin_allowed('https://app.trusted.org'))
+        self.assertFalse(origin_allowed('http://app.trusted.org'))
+        self.assertFalse(origin_allowed('https://evil.com'))
+        self.assertFalse(origin_allowed('https://example.com.evil.com'))
+        self.assertFalse(origin_allowed('null'))
+        self.assertFalse(origin_allowed(None))
+
+    @override_settings(ALLOWED_HOSTS=['example.com'], CSRF_TRUSTED_ORIGINS=[])
+    def test_cross_site_handshake_is_refused(self):
+        sent = []
+
+        async def receive():
+            return {'type': 'websocket.connect'}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'websocket', 'path': '/ws/slides/1/live/', 'headers': [(b'origin', b'https://evil.com')]}
+        async_to_sync(live_slideshow_application)(scope, receive, send)
+        self.assertEqual(sent, [{'type': 'websocket.close', 'code': CLOSE_FORBIDDEN}])
+
+
+@override_settings(ALLOWED_HOSTS=['example.com'], CSRF_TRUSTED_ORIGINS=[])
+class LiveLoadTestCommandTests(TransactionTestCase):
+    """ The load test drives the in-process app, so its connections must pass the Origin check. """
+
+    def setUp(self):
+        author = get_user_model().objects.create_user('presenter', password='x')
+        self.slideshow = Slide.objects.create(title='Deck', author=author)
+
+    def test_connections_are_accepted(self):
+        out = io.StringIO()
+        call_command('live_load_test', self.slideshow.pk, viewers=3, moves=2, interval=0.01, stdout=out)
+        self.assertIn('3 viewers, 2 moves: 6 deliveries', out.getvalue())
+
+    def test_foreign_origin_is_refused(self):
+        with self.assertRaisesMessage(CommandError, 'code 4403'):
+            call_command('live_load_test', self.slideshow.pk, viewers=1, moves=1, origin='https://evil.com', stdout=io.StringIO())
+
+
+class SlideshowPaginationTests(TestCase):
+
+    def test_pages_are_stable_when_updated_at_ties(self):
+        ids = {Slide.objects.create(title=f"Deck {i}").id for i in range(7)}
+        Slide.objects.update(updated_at=timezone.now())
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user('viewer', password='x'))
+
+        seen = []
+        url = reverse('slideshow-list') + '?page_size=2'
+        while url:
+            page = client.get(url).json()
+            seen.extend(slide['id'] for slide in page['results'])
+            url = page['next']
+        # Ties are broken by id, newest first.
+        self.assertEqual(seen, sorted(ids, reverse=True))
+
+
+class SkeletonPackingTests(TestCase):
+
+    def test_bulk_writes_look_up_each_template_skeleton_once(self):
+        boilerplate = '<div class="slide"><img src="/static/logo.png" alt="logo"><div class="content">{}</div><div class="line"></div></div>'
+        SlideTemplateSkeleton.objects.create(template_name='title', version=1, tokens=tokenize('<div class="old">{}</div>'))
+        latest = SlideTemplateSkeleton.objects.create(template_name='title', version=2, tokens=tokenize(boilerplate.format('')))
+        slide = Slide.objects.create(title="Deck")
+        blocks = [
+            SlideBlock(slide=slide, order=i, template_name='title' if i % 2 else 'plain', content_html=boilerplate.format(f"Slide {i}"))
+            for i in range(6)
+        ]
+        skeleton_tokens.cache_clear()
+
+        # The latest skeletons, the tokens of the one used, and the insert.
+        with self.assertNumQueries(3):
+            SlideBlock.objects.bulk_create(blocks)
+
+        stored = SlideBlock.objects.filter(slide=slide).order_by('order')
+        self.assertEqual([block.skeleton_id for block in stored], [None, latest.id] * 3)
+        self.assertEqual([block.content_html for block in stored], [boilerplate.format(f"Slide {i}") for i in range(6)])
+
+
+class SyncBlocksTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user('author', password='x'))
+        response = self.client.post(reverse('slideshow-list'), {
+            'title': "Deck",
+            'blocks': [{'order': i, 'template_name': 'text', 'content_html': f"<p>{text}</p>"} for i, text in enumerate("ABCD")],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.slide = Slide.objects.get(pk=response.json()['id'])
+        self.ids = {block.content_html[3:-4]: block.id for block in self.slide.blocks.all()}
+
+    def put_blocks(self, blocks):
+        response = self.client.patch(reverse('slideshow-detail', args=[self.slide.pk]), {'blocks': blocks}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [(block.id, block.order, block.content_html) for block in self.slide.blocks.order_by('order')]
+
+    def test_reorder_insert_and_delete(self):
+        # D and A swap ends, B moves down, X and Y are inserted, C is dropped.
+        blocks = self.put_blocks([
+            {'id': self.ids['D'], 'order': 0, 'template_name': 'text', 'content_html': "<p>D</p>"},
+            {'order': 1, 'template_name': 'text', 'content_html': "<p>X</p>"},
+            {'id': self.ids['B'], 'order': 2, 'template_name': 'text', 'content_html': "<p>B</p>"},
+            {'id': self.ids['A'], 'order': 3, 'template_name': 'text', 'content_html': "<p>A edited</p>"},
+            {'order': 4, 'template_name': 'text', 'content_html': "<p>Y</p>"},
+        ])
+        self.assertEqual([(order, html) for _, order, html in blocks], [
+            (0, "<p>D</p>"), (1, "<p>X</p>"), (2, "<p>B</p>"), (3, "<p>A edited</p>"), (4, "<p>Y</p>"),
+        ])
+        self.assertEqual([blocks[0][0], blocks[2][0], blocks[3][0]], [self.ids['D'], self.ids['B'], self.ids['A']])
+        self.assertFalse({blocks[1][0], blocks[4][0]} & set(self.ids.values()))
+        self.assertFalse(SlideBlock.objects.filter(id=self.ids['C']).exists())
+
+    def test_blocks_without_ids_are_matched_by_position(self):
+        blocks = self.put_blocks([
+            {'order': 1, 'template_name': 'text', 'content_html': "<p>B2</p>"},
+            {'order': 0, 'template_name': 'text', 'content_html': "<p>A</p>"},
+        ])
+        self.assertEqual(blocks, [(self.ids['A'], 0, "<p>A</p>"), (self.ids['B'], 1, "<p>B2</p>")])
+
+    def test_unchanged_blocks_are_not_written(self):
+        blocks = [
+            {'id': block_id, 'order': i, 'template_name': 'text', 'content_html': f"<p>{text}</p>"}
+            for i, (text, block_id) in enumerate(sorted(self.ids.items()))
+        ]
+        serializer = SlideshowDetailSerializer(self.slide, data={'blocks': blocks}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        # The slideshow row and a read of its blocks, inside a savepoint.
+        with self.assertNumQueries(4):
+            serializer.save()
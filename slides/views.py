@@ -1,6 +1,9 @@
 # slides/views.py
 
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse
 from django.shortcuts import render, get_object_or_404
+from django.utils.text import slugify
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.urls import reverse
 from django.middleware.csrf import get_token
@@ -8,13 +11,22 @@ from django.templatetags.static import static
 from django.contrib.auth.models import User
 
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.filters import SearchFilter
+from rest_framework.pagination import CursorPagination
 
 # Imports corrigés
-from .models import Slide
-from .serializers import SlideshowListSerializer, SlideshowDetailSerializer
+from .models import Slide, SlideTemplateSkeleton
+from .export import export_cache_key, get_offline_export
+from .handouts import HANDOUT_LAYOUTS, get_handout
+from .live import can_present, live_path
+from .search import search_slides
+from .serializers import SlideshowListSerializer, SlideshowDetailSerializer, CompactSlideBlockSerializer
 from core.models import get_initial_data_for_filters
+from core.pdf import PdfUnavailable
+from core.revisions import record_revision
+from core.thumbnails import schedule_thumbnail
+from core.views_api import RevisionHistoryMixin
 
 @login_required
 @user_passes_test(lambda u: u.is_staff, login_url='/')
@@ -67,18 +79,53 @@ def slide_browser_view(request):
 def slideshow_player_view(request, pk):
     """ 
     Displays a single slideshow directly for viewing.
+    Only the title is rendered here: the player script loads the slide
+    outline and then fetches slide bodies in windows around the current one.
     """
     slideshow = get_object_or_404(Slide, pk=pk)
-    return render(request, 'slides/slideshow_player.html', {'slideshow': slideshow})
+    player_config = {
+        'outline_url': reverse('slideshow-outline', args=[slideshow.pk]),
+        'window_url': reverse('slideshow-slide-window', args=[slideshow.pk]),
+        # Presenter sync over WebSocket (served by central/asgi.py).
+        'live_url': live_path(slideshow.pk),
+        'can_present': can_present(request.user, slideshow),
+    }
+    export_url = reverse('slideshow-export', args=[slideshow.pk])
+    context = {
+        'slideshow': slideshow,
+        'player_config': player_config,
+        'export_url': export_url,
+        'handout_url': reverse('slideshow-handout', args=[slideshow.pk]),
+        'handout_layouts': list(HANDOUT_LAYOUTS),
+    }
+    return render(request, 'slides/slideshow_player.html', context)
+
+
+# Number of slides loaded on each side of the current one by the player API.
+PLAYER_WINDOW_RADIUS = 2
+PLAYER_MAX_WINDOW_RADIUS = 10
+
+
+class SlideshowCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the indexed (updated_at, id) pair: every page costs
+    the same, however deep the client has scrolled. The id breaks ties between
+    slideshows saved in the same instant, so no page skips or repeats one.
+    """
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-updated_at', '-id')
 
 
-class SlideshowViewSet(viewsets.ModelViewSet):
+class SlideshowViewSet(RevisionHistoryMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows slideshows to be viewed or edited.
+    The list is cursor-paginated and accepts a `search` parameter that is
+    answered from the title search index.
     """
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [SearchFilter]
-    search_fields = ['title']
+    pagination_class = SlideshowCursorPagination
     serializer_class = SlideshowDetailSerializer
 
     def get_serializer_class(self):
@@ -87,7 +134,10 @@ class SlideshowViewSet(viewsets.ModelViewSet):
         return SlideshowDetailSerializer
 
     def get_queryset(self):
-        queryset = Slide.objects.all().order_by('-updated_at')
+        queryset = Slide.objects.all().order_by('-updated_at', '-id')
+        if self.action == 'list':
+            # The list serializer reads author and subject names.
+            queryset = queryset.select_related('author', 'subject')
         
         curriculum_id = self.request.query_params.get('curriculum')
         language_id = self.request.query_params.get('language')
@@ -105,14 +155,22 @@ class SlideshowViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(topic_id=topic_id)
         if status:
             queryset = queryset.filter(status=status)
+
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = search_slides(queryset, search)
             
         return queryset
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        slideshow = serializer.save(author=self.request.user)
+        record_revision(slideshow, author=self.request.user)
+        schedule_thumbnail(slideshow)
     
     def perform_update(self, serializer):
-        serializer.save()
+        slideshow = serializer.save()
+        record_revision(slideshow, author=self.request.user)
+        schedule_thumbnail(slideshow)
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -133,21 +191,125 @@ class SlideshowViewSet(viewsets.ModelViewSet):
 
         detailed_serializer = SlideshowDetailSerializer(instance)
         return Response(detailed_serializer.data)
-    
-    @login_required
-    def slideshow_player_view(request, pk):
-        """ 
-        Affiche un seul diaporama dans une interface de type "player".
-        Passe les données du diaporama au template, y compris une version JSON
-        des blocs pour la logique JavaScript.
+
+    # --- Player API: outline up front, slide bodies in windows ---
+
+    def _window_radius(self, request):
+        try:
+            radius = int(request.query_params.get('radius', PLAYER_WINDOW_RADIUS))
+        except ValueError:
+            radius = PLAYER_WINDOW_RADIUS
+        return max(0, min(radius, PLAYER_MAX_WINDOW_RADIUS))
+
+    def _slide_window(self, slideshow, position, radius, slide_count):
         """
-        slideshow = get_object_or_404(Slide.objects.prefetch_related('blocks'), pk=pk)
-        
-        # Sérialiser les données pour les passer facilement au JavaScript
-        slideshow_data_for_js = SlideshowDetailSerializer(slideshow).data
-        
-        context = {
-            'slideshow': slideshow, # Pour afficher le titre, etc.
-            'slideshow_data_for_js': slideshow_data_for_js # Pour l'interactivité du player
+        Returns the bodies of the slides at positions [position - radius,
+        position + radius], plus the URLs of the neighbouring windows so the
+        client can prefetch them while the current slide is displayed.
+        """
+        start = max(0, position - radius)
+        end = min(slide_count - 1, position + radius)
+        blocks = slideshow.blocks.order_by('order')[start:end + 1] if end >= start else []
+
+        window_url = reverse('slideshow-slide-window', args=[slideshow.pk])
+        prefetch = []
+        if end < slide_count - 1:
+            prefetch.append(f"{window_url}?position={end + 1 + radius}&radius={radius}")
+        if start > 0:
+            prefetch.append(f"{window_url}?position={max(0, start - 1 - radius)}&radius={radius}")
+
+        return {
+            'start': start,
+            'end': end,
+            'slides': CompactSlideBlockSerializer(blocks, many=True).data,
+            'prefetch': prefetch,
         }
-        return render(request, 'slides/slideshow_player.html', context)
\ No newline at end of file
+
+    @action(detail=True, methods=['get'])
+    def outline(self, request, pk=None):
+        """
+        Metadata for every slide (id, order, template), the template
+        skeletons the slide bodies are expressed against, and the bodies of
+        the first window, so the player can show slide one immediately.
+        """
+        slideshow = self.get_object()
+        slides = list(slideshow.blocks.order_by('order').values('id', 'order', 'template_name'))
+        skeletons = SlideTemplateSkeleton.objects.filter(blocks__slide=slideshow).distinct()
+        radius = self._window_radius(request)
+        window = self._slide_window(slideshow, 0, radius, len(slides))
+        data = {
+            'id': slideshow.id,
+            'title': slideshow.title,
+            'updated_at': slideshow.updated_at,
+            'slide_count': len(slides),
+            'slides': slides,
+            'skeletons': {skeleton.pk: skeleton.tokens for skeleton in skeletons},
+            'window': window,
+        }
+        return Response(data, headers=self._prefetch_headers(window))
+
+    @action(detail=True, methods=['get'], url_path='slides', url_name='slide-window')
+    def slide_window(self, request, pk=None):
+        """ Slide bodies around `?position=` (0-based), `?radius=` on each side. """
+        slideshow = self.get_object()
+        try:
+            position = max(0, int(request.query_params.get('position', 0)))
+        except ValueError:
+            return Response({"detail": "position must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        slide_count = slideshow.blocks.count()
+        window = self._slide_window(slideshow, position, self._window_radius(request), slide_count)
+        return Response(window, headers=self._prefetch_headers(window))
+
+    def _prefetch_headers(self, window):
+        if not window['prefetch']:
+            return None
+        return {'Link': ', '.join(f'<{url}>; rel=prefetch' for url in window['prefetch'])}
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """
+        Downloads the slideshow as a single self-contained HTML file that can
+        be presented without any network access.
+        """
+        slideshow = self.get_object()
+        etag = f'"{export_cache_key(slideshow)}"'
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+
+        response = HttpResponse(get_offline_export(slideshow), content_type='text/html; charset=utf-8')
+        filename = slugify(slideshow.title) or f"slideshow-{slideshow.pk}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}.html"'
+        response['ETag'] = etag
+        return response
+
+    @action(detail=True, methods=['get'])
+    def handout(self, request, pk=None):
+        """
+        Downloads a printable PDF handout: `?per_page=` 1, 2, 4 or 6 slides per
+        A4 page, and `?notes=1` to add ruled lines for notes.
+        """
+        slideshow = self.get_object()
+        try:
+            per_page = int(request.query_params.get('per_page', 2))
+        except ValueError:
+            per_page = None
+        if per_page not in HANDOUT_LAYOUTS:
+            choices = ', '.join(str(n) for n in HANDOUT_LAYOUTS)
+            return Response({"detail": f"per_page must be one of {choices}."}, status=status.HTTP_400_BAD_REQUEST)
+        notes = request.query_params.get('notes', '').lower() in ('1', 'true', 'yes')
+
+        try:
+            name, content_hash = get_handout(slideshow, per_page, notes)
+        except PdfUnavailable as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        etag = f'"{content_hash}"'
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        filename = slugify(slideshow.title) or f"slideshow-{slideshow.pk}"
+        response = FileResponse(
+            default_storage.open(name, 'rb'), as_attachment=True,
+            filename=f"{filename}-handout-{per_page}up.pdf", content_type='application/pdf',
+        )
+        response['ETag'] = etag
+        return response
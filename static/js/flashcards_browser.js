@@ -12,6 +12,8 @@ document.addEventListener('DOMContentLoaded', function() {
     const topicSelect = document.getElementById('topic-select');
     const listContainer = document.getElementById('flashcard-list-container');
     const loadingSpinner = document.getElementById('loading-spinner');
+    const loadMoreContainer = document.getElementById('load-more-container');
+    const loadMoreBtn = document.getElementById('load-more-btn');
     
     // REMOVED: skillSelect variable is gone.
 
@@ -19,6 +21,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const confirmDeleteBtn = document.getElementById('confirm-delete-btn');
     let itemToDeleteId = null;
     let debounceTimeout;
+    let nextPageUrl = null;
 
     // --- 2. Filter & Display Logic ---
     function populateFilters() {
@@ -62,6 +65,69 @@ document.addEventListener('DOMContentLoaded', function() {
         topicSelect.value = previousValue;
     }
 
+    // --- Offline decks ---
+    // Once a subject is chosen, its whole deck is kept in localStorage and
+    // only the changes since the cached bundle are downloaded. Topic changes
+    // are then filtered locally, and the deck stays usable offline.
+    const DECK_CACHE_PREFIX = 'flashcard-deck:';
+
+    function readCachedDeck(key) {
+        try {
+            return JSON.parse(localStorage.getItem(DECK_CACHE_PREFIX + key));
+        } catch (error) {
+            return null;
+        }
+    }
+
+    function writeCachedDeck(key, deck) {
+        try {
+            localStorage.setItem(DECK_CACHE_PREFIX + key, JSON.stringify(deck));
+        } catch (error) {
+            console.warn('Could not cache the deck locally:', error);
+        }
+    }
+
+    function toCards(fields, rows) {
+        return rows.map(row => Object.fromEntries(fields.map((field, index) => [field, row[index]])));
+    }
+
+    async function loadDeck(deckParams) {
+        const key = deckParams.toString();
+        const cached = readCachedDeck(key);
+        try {
+            if (cached) {
+                const response = await fetch(`${apiUrls.delta}?${key}&since=${cached.hash}`);
+                if (response.ok) {
+                    const delta = await response.json();
+                    const removed = new Set(delta.removed);
+                    const cards = new Map(cached.cards.filter(card => !removed.has(card.id)).map(card => [card.id, card]));
+                    toCards(delta.fields, delta.changed).forEach(card => cards.set(card.id, card));
+                    const deck = { hash: delta.hash, cards: Array.from(cards.values()).sort((a, b) => a.id - b.id) };
+                    if (delta.hash !== cached.hash) writeCachedDeck(key, deck);
+                    return deck;
+                }
+                // 410: the server no longer knows our bundle, download it again.
+            }
+            const response = await fetch(`${apiUrls.bundle}?${key}`);
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const bundle = await response.json();
+            const deck = { hash: bundle.hash, cards: toCards(bundle.fields, bundle.cards) };
+            writeCachedDeck(key, deck);
+            return deck;
+        } catch (error) {
+            if (cached) {
+                console.warn('Offline, showing the cached deck:', error);
+                return cached;
+            }
+            throw error;
+        }
+    }
+
+    function subjectName(subjectId) {
+        const subject = initialData.subjects.find(s => s.id === subjectId);
+        return subject ? subject.name : null;
+    }
+
     async function fetchAndDisplayFlashcards() {
         loadingSpinner.style.display = 'block';
         console.log("Fetching flashcards with current filters...");
@@ -76,15 +142,51 @@ document.addEventListener('DOMContentLoaded', function() {
         
         const filteredParams = new URLSearchParams(Array.from(params.entries()).filter(([key, value]) => value));
         
+        nextPageUrl = null;
         try {
-            const response = await fetch(`${apiUrls.flashcards}?${filteredParams.toString()}`);
-            const data = await response.json();
-            renderFlashcardList(data);
+            if (subjectSelect.value) {
+                const deckParams = new URLSearchParams(filteredParams);
+                deckParams.delete('topic');
+                const deck = await loadDeck(deckParams);
+                const topicId = topicSelect.value ? Number(topicSelect.value) : null;
+                renderFlashcardList(deck.cards
+                    .filter(card => topicId === null || card.topic === topicId)
+                    .sort((a, b) => b.updated_at.localeCompare(a.updated_at))
+                    .map(card => ({ ...card, subject_name: subjectName(card.subject), author_name: card.author })));
+                return;
+            }
+            await fetchFlashcardPage(`${apiUrls.flashcards}?${filteredParams.toString()}`, false);
         } catch (error) {
             console.error('Error fetching flashcards:', error);
             listContainer.innerHTML = '<p class="text-danger p-3">Failed to load flashcards.</p>';
         } finally {
             loadingSpinner.style.display = 'none';
+            loadMoreContainer.style.display = nextPageUrl ? 'block' : 'none';
+        }
+    }
+
+    // The list endpoint is cursor-paginated: each page carries the URL of the next one.
+    async function fetchFlashcardPage(url, append) {
+        const response = await fetch(url);
+        if (!response.ok) throw new Error(`Server responded with status ${response.status}`);
+        const data = await response.json();
+        nextPageUrl = data.next;
+        renderFlashcardList(data.results, append);
+    }
+
+    async function loadMoreFlashcards() {
+        if (!nextPageUrl) return;
+        loadingSpinner.style.display = 'block';
+        loadMoreBtn.disabled = true;
+        try {
+            await fetchFlashcardPage(nextPageUrl, true);
+        } catch (error) {
+            console.error('Error fetching flashcards:', error);
+            nextPageUrl = null;
+        } finally {
+            loadingSpinner.style.display = 'none';
+            loadMoreBtn.disabled = false;
+            loadMoreContainer.style.display = nextPageUrl ? 'block' : 'none';
         }
     }
 
@@ -98,9 +200,9 @@ document.addEventListener('DOMContentLoaded', function() {
         return `<span class="badge ${statusInfo.class}">${statusInfo.name}</span>`;
     }
 
-    function renderFlashcardList(flashcards) {
-        listContainer.innerHTML = '';
-        if (flashcards.length === 0) {
+    function renderFlashcardList(flashcards, append = false) {
+        if (!append) listContainer.innerHTML = '';
+        if (flashcards.length === 0 && !append) {
             listContainer.innerHTML = '<p class="text-muted p-3">No flashcards match the current filters.</p>';
             return;
         }
@@ -110,7 +212,7 @@ document.addEventListener('DOMContentLoaded', function() {
             cardElement.className = 'list-group-item list-group-item-action';
             cardElement.dataset.cardId = card.id;
             
-            const questionPreview = `Q: ${card.question_text || 'No question text'}`;
+            const questionPreview = `Q: ${card.question || 'No question text'}`;
             
             let detailsHTML = `<div class="text-muted small mt-1">Subject: ${card.subject_name || 'N/A'}</div>`;
             let adminAndStatusHTML = '';
@@ -171,6 +273,7 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 
     confirmDeleteBtn.addEventListener('click', handleDelete);
+    loadMoreBtn.addEventListener('click', loadMoreFlashcards);
 
     // FIXED: Simplified and corrected event listener logic for filters.
     const filters = [curriculumSelect, languageSelect, subjectSelect, topicSelect];
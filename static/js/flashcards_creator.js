@@ -226,6 +226,41 @@ document.addEventListener('DOMContentLoaded', function() {
     // =========================================================================
     saveFlashcardBtn.addEventListener('click', handleSaveButtonClick);
     metadataBtn.addEventListener('click', () => metadataModal.show());
+
+    // Bulk import: the current metadata applies to rows that do not set their own.
+    const importBtn = document.getElementById('import-btn');
+    const importFileInput = document.getElementById('import-file-input');
+    importBtn.addEventListener('click', () => importFileInput.click());
+    importFileInput.addEventListener('change', async () => {
+        const file = importFileInput.files[0];
+        if (!file) return;
+        const formData = new FormData();
+        formData.append('file', file);
+        ['curriculum', 'language', 'subject', 'topic'].forEach(field => {
+            if (flashcardState[field]) formData.append(field, flashcardState[field]);
+        });
+        importBtn.disabled = true;
+        try {
+            const response = await fetch(API_CONFIG.urls.import, {
+                method: 'POST',
+                headers: { 'X-CSRFToken': API_CONFIG.csrf_token },
+                body: formData,
+            });
+            const result = await response.json();
+            if (!response.ok) throw new Error(result.detail || 'Import failed.');
+            let message = `Imported ${result.created} flashcard(s), skipped ${result.skipped}.`;
+            if (result.unknown_study_skills.length) {
+                message += `\nUnknown study skills ignored: ${result.unknown_study_skills.join(', ')}`;
+            }
+            alert(message);
+        } catch (error) {
+            console.error('Import error:', error);
+            alert(`Error: ${error.message}`);
+        } finally {
+            importBtn.disabled = false;
+            importFileInput.value = '';
+        }
+    });
     saveMetadataBtn.addEventListener('click', updateStateFromMetadataModal);
     confirmStatusAndSaveBtn.addEventListener('click', executeSave);
     
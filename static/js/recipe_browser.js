@@ -132,7 +132,8 @@ document.addEventListener('DOMContentLoaded', function() {
             }
 
             recipeElementWrapper.innerHTML = `
-                <a href="/recipes/${recipe.id}/" class="text-decoration-none text-dark flex-grow-1 me-3">
+                <a href="/recipes/${recipe.id}/" class="text-decoration-none text-dark flex-grow-1 me-3 d-flex align-items-center">
+                    ${recipe.thumbnail_url ? `<img src="${recipe.thumbnail_url}" alt="" class="list-thumbnail me-2" loading="lazy">` : ''}
                     <div>
                         <strong>${recipe.title}</strong>
                         ${detailsHTML}
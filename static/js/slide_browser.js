@@ -9,8 +9,11 @@ document.addEventListener('DOMContentLoaded', function() {
     const curriculumSelect = document.getElementById('curriculum-select');
     const languageSelect = document.getElementById('language-select');
     const subjectSelect = document.getElementById('subject-select');
+    const titleSearchInput = document.getElementById('title-search');
     const listContainer = document.getElementById('slideshow-list-container');
     const loadingSpinnerList = document.getElementById('loading-spinner-list');
+    const loadMoreContainer = document.getElementById('load-more-container');
+    const loadMoreBtn = document.getElementById('load-more-btn');
     
     const playerContainer = document.getElementById('slideshow-player-container');
     const displayArea = document.getElementById('slide-display-area');
@@ -21,6 +24,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const controlsContainer = document.getElementById('slideshow-controls');
     const loadingSpinnerPlayer = document.getElementById('loading-spinner-player');
     const fullscreenBtn = document.getElementById('fullscreen-btn');
+    const offlineExportBtn = document.getElementById('offline-export-btn');
     const fullscreenEnterIcon = document.getElementById('fullscreen-enter-icon');
     const fullscreenExitIcon = document.getElementById('fullscreen-exit-icon');
     
@@ -31,6 +35,12 @@ document.addEventListener('DOMContentLoaded', function() {
     let debounceTimeout;
     let activeSlideshowData = null;
     let currentSlideIndex = 0;
+    // Slide bodies are fetched in windows around the current slide and kept
+    // in a bounded cache, so large decks never sit in memory all at once.
+    const slideCache = new Map();
+    const pendingWindows = new Map();
+    const MAX_CACHED_SLIDES = 15;
+    let nextPageUrl = null;
 
     // --- 2. BROWSER/LIST LOGIC ---
     function populateFilters() {
@@ -61,20 +71,29 @@ document.addEventListener('DOMContentLoaded', function() {
 
 
     async function fetchAndDisplaySlideshows() {
-        loadingSpinnerList.style.display = 'block';
-        const params = new URLSearchParams({ curriculum: curriculumSelect.value, language: languageSelect.value, subject: subjectSelect.value });
+        const params = new URLSearchParams({ curriculum: curriculumSelect.value, language: languageSelect.value, subject: subjectSelect.value, search: titleSearchInput.value.trim() });
         const filteredParams = new URLSearchParams(Array.from(params.entries()).filter(([, value]) => value));
-        
+        await fetchSlideshowPage(`${apiUrls.slideshows}?${filteredParams.toString()}`, false);
+    }
+
+    // The list endpoint is cursor-paginated: each page carries the URL of the next one.
+    async function fetchSlideshowPage(url, append) {
+        loadingSpinnerList.style.display = 'block';
+        loadMoreBtn.disabled = true;
         try {
-            const response = await fetch(`${apiUrls.slideshows}?${filteredParams.toString()}`);
+            const response = await fetch(url);
             if (!response.ok) throw new Error(`Server responded with status ${response.status}`);
             const data = await response.json();
-            renderSlideshowList(data);
+            nextPageUrl = data.next;
+            renderSlideshowList(data.results, append);
         } catch (error) {
             console.error('Error fetching slideshows:', error);
             listContainer.innerHTML = '<p class="text-danger p-3">Failed to load slideshows.</p>';
+            nextPageUrl = null;
         } finally {
             loadingSpinnerList.style.display = 'none';
+            loadMoreBtn.disabled = false;
+            loadMoreContainer.style.display = nextPageUrl ? 'block' : 'none';
         }
     }
 
@@ -88,9 +107,9 @@ document.addEventListener('DOMContentLoaded', function() {
         return `<span class="badge ${statusInfo.class}">${statusInfo.name}</span>`;
     }
 
-    function renderSlideshowList(slideshows) {
-        listContainer.innerHTML = '';
-        if (slideshows.length === 0) {
+    function renderSlideshowList(slideshows, append = false) {
+        if (!append) listContainer.innerHTML = '';
+        if (slideshows.length === 0 && !append) {
             listContainer.innerHTML = '<p class="text-muted p-3">No slideshows match the current filters.</p>';
             return;
         }
@@ -110,7 +129,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 adminActionsHTML = `<div class="admin-actions">${statusBadge}<a href="/slides/create/?id=${slideshow.id}" class="edit-slideshow-btn" title="Edit Slideshow"><i class="bi bi-pencil-fill"></i></a><button class="delete-slideshow-btn" data-slideshow-id="${slideshow.id}" title="Delete Slideshow"><i class="bi bi-trash-fill"></i></button></div>`;
             }
 
-            itemElement.innerHTML = `<div class="d-flex w-100 justify-content-between align-items-center"><div><strong>${slideshow.title}</strong>${detailsHTML}</div>${adminActionsHTML}</div>`;
+            const thumbnailHTML = slideshow.thumbnail_url ? `<img src="${slideshow.thumbnail_url}" alt="" class="list-thumbnail me-2" loading="lazy">` : '';
+            itemElement.innerHTML = `<div class="d-flex w-100 justify-content-between align-items-center"><div class="d-flex align-items-center">${thumbnailHTML}<div><strong>${slideshow.title}</strong>${detailsHTML}</div></div>${adminActionsHTML}</div>`;
             listContainer.appendChild(itemElement);
         });
     }
@@ -121,6 +141,7 @@ document.addEventListener('DOMContentLoaded', function() {
         displayArea.innerHTML = '<div class="d-flex justify-content-center align-items-center h-100"><div class="spinner-border text-light" role="status"></div></div>';
         controlsContainer.style.display = 'none';
         fullscreenBtn.style.display = 'none';
+        offlineExportBtn.style.display = 'none';
         slideshowTitleDisplay.textContent = 'Loading...';
 
         document.querySelectorAll('#slideshow-list-container .list-group-item').forEach(el => {
@@ -128,15 +149,21 @@ document.addEventListener('DOMContentLoaded', function() {
         });
 
         try {
-            const response = await fetch(`${apiUrls.slideshow_detail_base}${slideshowId}/`);
+            // The outline lists every slide but only carries the bodies of the first window.
+            const response = await fetch(`${apiUrls.slideshow_detail_base}${slideshowId}/outline/`);
             if (!response.ok) throw new Error('Failed to load slideshow details.');
             activeSlideshowData = await response.json();
+            slideCache.clear();
+            pendingWindows.clear();
+            cacheWindow(activeSlideshowData.window);
             
             slideshowTitleDisplay.textContent = activeSlideshowData.title;
             currentSlideIndex = 0;
             renderCurrentSlide();
             controlsContainer.style.display = 'flex';
             fullscreenBtn.style.display = 'inline-block';
+            offlineExportBtn.href = `${apiUrls.slideshow_detail_base}${slideshowId}/export/`;
+            offlineExportBtn.style.display = 'inline-block';
         } catch (error) {
             console.error('Error loading slideshow:', error);
             displayArea.innerHTML = `<p class="text-danger p-3">${error.message}</p>`;
@@ -145,9 +172,62 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
-    function renderCurrentSlide() {
-        const slides = activeSlideshowData.blocks || [];
-        if (slides.length === 0) {
+    // Blocks stored against a template skeleton arrive as the skeleton id and
+    // the slot values replacing skeleton tokens [start, end) (see slides/skeletons.py).
+    function slideHtml(slide) {
+        if (!slide.skeleton) return slide.content_html;
+        const tokens = activeSlideshowData.skeletons[slide.skeleton];
+        const parts = [];
+        let position = 0;
+        slide.slot_values.forEach(([start, end, text]) => {
+            parts.push(...tokens.slice(position, start), text);
+            position = end;
+        });
+        parts.push(...tokens.slice(position));
+        return parts.join('');
+    }
+
+    function cacheWindow(windowData) {
+        windowData.slides.forEach((slide, offset) => slideCache.set(windowData.start + offset, slideHtml(slide)));
+        // Prefetch the neighbouring windows suggested by the server.
+        windowData.prefetch.forEach(url => fetchWindow(url).catch(() => {}));
+    }
+
+    function fetchWindow(url) {
+        if (!pendingWindows.has(url)) {
+            const slideshowId = activeSlideshowData.id;
+            const request = fetch(url)
+                .then(response => {
+                    if (!response.ok) throw new Error('Failed to load slides.');
+                    return response.json();
+                })
+                .then(windowData => {
+                    // Ignore windows that arrive after another slideshow was opened.
+                    if (activeSlideshowData && activeSlideshowData.id === slideshowId) {
+                        windowData.slides.forEach((slide, offset) => slideCache.set(windowData.start + offset, slideHtml(slide)));
+                    }
+                })
+                .catch(error => {
+                    pendingWindows.delete(url);
+                    throw error;
+                });
+            pendingWindows.set(url, request);
+        }
+        return pendingWindows.get(url);
+    }
+
+    function evictDistantSlides() {
+        const keepRadius = Math.floor(MAX_CACHED_SLIDES / 2);
+        for (const index of slideCache.keys()) {
+            if (Math.abs(index - currentSlideIndex) > keepRadius) slideCache.delete(index);
+        }
+        // Let evicted windows be fetched again if the user comes back to them.
+        pendingWindows.clear();
+    }
+
+    async function renderCurrentSlide() {
+        const slideCount = activeSlideshowData.slide_count;
+        if (slideCount === 0) {
             displayArea.innerHTML = '<div class="d-flex justify-content-center align-items-center h-100"><p class="text-white">This slideshow has no slides.</p></div>';
             counterEl.textContent = 'Slide 0 / 0';
             prevBtn.disabled = true;
@@ -155,20 +235,40 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
 
-        const currentSlide = slides[currentSlideIndex];
-        displayArea.innerHTML = currentSlide.content_html;
+        const index = currentSlideIndex;
+        counterEl.textContent = `Slide ${index + 1} / ${slideCount}`;
+        prevBtn.disabled = (index === 0);
+        nextBtn.disabled = (index === slideCount - 1);
+
+        if (!slideCache.has(index)) {
+            displayArea.innerHTML = '<div class="d-flex justify-content-center align-items-center h-100"><div class="spinner-border text-light" role="status"></div></div>';
+            try {
+                await fetchWindow(`${apiUrls.slideshow_detail_base}${activeSlideshowData.id}/slides/?position=${index}`);
+            } catch (error) {
+                console.error('Error loading slide:', error);
+                displayArea.innerHTML = `<p class="text-danger p-3">${error.message}</p>`;
+                return;
+            }
+            // The user may have moved on while the window was loading.
+            if (index !== currentSlideIndex) return;
+        }
+
+        displayArea.innerHTML = slideCache.get(index);
 
         if (window.MathJax && window.MathJax.typesetPromise) {
             window.MathJax.typesetPromise([displayArea]);
         }
 
-        counterEl.textContent = `Slide ${currentSlideIndex + 1} / ${slides.length}`;
-        prevBtn.disabled = (currentSlideIndex === 0);
-        nextBtn.disabled = (currentSlideIndex === slides.length - 1);
+        evictDistantSlides();
+        // Warm the cache for the next slides while this one is being read.
+        const ahead = Math.min(index + 2, slideCount - 1);
+        if (!slideCache.has(ahead)) {
+            fetchWindow(`${apiUrls.slideshow_detail_base}${activeSlideshowData.id}/slides/?position=${ahead}`).catch(() => {});
+        }
     }
 
     function goToNextSlide() {
-        if (activeSlideshowData && currentSlideIndex < activeSlideshowData.blocks.length - 1) {
+        if (activeSlideshowData && currentSlideIndex < activeSlideshowData.slide_count - 1) {
             currentSlideIndex++;
             renderCurrentSlide();
         }
@@ -233,6 +333,15 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
+    loadMoreBtn.addEventListener('click', () => {
+        if (nextPageUrl) fetchSlideshowPage(nextPageUrl, true);
+    });
+
+    titleSearchInput.addEventListener('input', () => {
+        clearTimeout(debounceTimeout);
+        debounceTimeout = setTimeout(fetchAndDisplaySlideshows, 300);
+    });
+
     [curriculumSelect, languageSelect, subjectSelect].forEach(selectElement => {
         selectElement.addEventListener('change', (event) => {
             if (['curriculum-select', 'language-select'].includes(event.target.id)) { updateSubjectOptions(); }
@@ -105,6 +105,7 @@ document.addEventListener('DOMContentLoaded', function() {
         blockWrapper.id = internalBlockId;
         blockWrapper.dataset.order = block.order;
         blockWrapper.dataset.template = block.template_name;
+        if (block.id) blockWrapper.dataset.blockId = block.id;
         blockWrapper.innerHTML = `<div class="d-flex justify-content-between align-items-center mb-2"><span class="badge bg-secondary block-number">Slide ${parseInt(block.order, 10) + 1}</span><div class="block-actions"><button class="btn btn-sm btn-outline-secondary move-block-up" title="Move Up"><i class="bi bi-arrow-up"></i></button><button class="btn btn-sm btn-outline-secondary move-block-down" title="Move Down"><i class="bi bi-arrow-down"></i></button><button class="btn btn-sm btn-danger delete-block" title="Delete"><i class="bi bi-trash"></i></button></div></div><div class="editor-preview-container"><div class="editor-column"><textarea id="${editorId}"></textarea></div><div class="preview-column"><div id="${previewId}" class="block-preview"></div></div></div>`;
         blocksContainer.appendChild(blockWrapper);
         document.getElementById(editorId).value = block.content_html;
@@ -164,6 +165,7 @@ document.addEventListener('DOMContentLoaded', function() {
             const editor = editors[el.id]; 
             if (editor) { 
                 newBlocks.push({ 
+                    ...(el.dataset.blockId ? { id: parseInt(el.dataset.blockId, 10) } : {}),
                     order: parseInt(el.dataset.order, 10), 
                     template_name: el.dataset.template, 
                     content_html: editor.getValue() 
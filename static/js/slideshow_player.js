@@ -0,0 +1,290 @@
+// static/js/slideshow_player.js
+document.addEventListener('DOMContentLoaded', function() {
+
+    // --- 1. Get Data and DOM Elements ---
+    const playerConfig = JSON.parse(document.getElementById('player-config-json').textContent);
+
+    const displayArea = document.getElementById('slide-display-area');
+    const prevBtn = document.getElementById('prev-slide-btn');
+    const nextBtn = document.getElementById('next-slide-btn');
+    const counterEl = document.getElementById('slide-counter');
+
+    // Slide bodies are fetched in windows around the current slide and kept
+    // in a bounded cache, so large decks never sit in memory all at once.
+    const MAX_CACHED_SLIDES = 15;
+    const slideCache = new Map();
+    const pendingWindows = new Map();
+    let outline = null;
+    let currentSlideIndex = 0;
+
+    const spinnerHTML = '<div class="d-flex justify-content-center align-items-center h-100"><div class="spinner-border" role="status"></div></div>';
+
+    // --- 2. WINDOWED LOADING ---
+    // Blocks stored against a template skeleton arrive as the skeleton id and
+    // the slot values replacing skeleton tokens [start, end) (see slides/skeletons.py).
+    function slideHtml(slide) {
+        if (!slide.skeleton) return slide.content_html;
+        const tokens = outline.skeletons[slide.skeleton];
+        const parts = [];
+        let position = 0;
+        slide.slot_values.forEach(([start, end, text]) => {
+            parts.push(...tokens.slice(position, start), text);
+            position = end;
+        });
+        parts.push(...tokens.slice(position));
+        return parts.join('');
+    }
+
+    function storeWindow(windowData) {
+        windowData.slides.forEach((slide, offset) => slideCache.set(windowData.start + offset, slideHtml(slide)));
+    }
+
+    function fetchWindow(url) {
+        if (!pendingWindows.has(url)) {
+            const request = fetch(url)
+                .then(response => {
+                    if (!response.ok) throw new Error('Failed to load slides.');
+                    return response.json();
+                })
+                .then(storeWindow)
+                .catch(error => {
+                    pendingWindows.delete(url);
+                    throw error;
+                });
+            pendingWindows.set(url, request);
+        }
+        return pendingWindows.get(url);
+    }
+
+    function windowUrl(position) {
+        return `${playerConfig.window_url}?position=${position}`;
+    }
+
+    function evictDistantSlides() {
+        const keepRadius = Math.floor(MAX_CACHED_SLIDES / 2);
+        for (const index of slideCache.keys()) {
+            if (Math.abs(index - currentSlideIndex) > keepRadius) slideCache.delete(index);
+        }
+        pendingWindows.clear();
+    }
+
+    async function loadOutline() {
+        displayArea.innerHTML = spinnerHTML;
+        try {
+            const response = await fetch(playerConfig.outline_url);
+            if (!response.ok) throw new Error('Failed to load slideshow.');
+            outline = await response.json();
+            storeWindow(outline.window);
+            outline.window.prefetch.forEach(url => fetchWindow(url).catch(() => {}));
+            if (pendingLivePosition !== null) {
+                currentSlideIndex = Math.max(0, Math.min(pendingLivePosition, outline.slide_count - 1));
+                pendingLivePosition = null;
+            }
+            renderCurrentSlide();
+        } catch (error) {
+            console.error('Error loading slideshow:', error);
+            displayArea.innerHTML = `<p class="text-danger p-3">${error.message}</p>`;
+        }
+    }
+
+    // --- 3. PLAYER LOGIC ---
+    async function renderCurrentSlide() {
+        if (outline.slide_count === 0) {
+            displayArea.innerHTML = '<p class="text-muted text-center p-5">This slideshow has no slides.</p>';
+            counterEl.textContent = 'Slide 0 / 0';
+            prevBtn.disabled = true;
+            nextBtn.disabled = true;
+            return;
+        }
+
+        const index = currentSlideIndex;
+        counterEl.textContent = `Slide ${index + 1} / ${outline.slide_count}`;
+        prevBtn.disabled = (index === 0);
+        nextBtn.disabled = (index === outline.slide_count - 1);
+
+        if (!slideCache.has(index)) {
+            displayArea.innerHTML = spinnerHTML;
+            try {
+                await fetchWindow(windowUrl(index));
+            } catch (error) {
+                console.error('Error loading slide:', error);
+                displayArea.innerHTML = `<p class="text-danger p-3">${error.message}</p>`;
+                return;
+            }
+            // The user may have moved on while the window was loading.
+            if (index !== currentSlideIndex) return;
+        }
+
+        displayArea.innerHTML = slideCache.get(index);
+        if (window.MathJax && window.MathJax.typesetPromise) {
+            window.MathJax.typesetPromise([displayArea]);
+        }
+
+        evictDistantSlides();
+        const ahead = Math.min(index + 2, outline.slide_count - 1);
+        if (!slideCache.has(ahead)) {
+            fetchWindow(windowUrl(ahead)).catch(() => {});
+        }
+    }
+
+    function goToNextSlide() {
+        if (outline && currentSlideIndex < outline.slide_count - 1) {
+            currentSlideIndex++;
+            renderCurrentSlide();
+            broadcastPosition();
+        }
+    }
+
+    function goToPrevSlide() {
+        if (outline && currentSlideIndex > 0) {
+            currentSlideIndex--;
+            renderCurrentSlide();
+            broadcastPosition();
+        }
+    }
+
+    function goToSlide(index) {
+        if (!outline) {
+            pendingLivePosition = index;
+            return;
+        }
+        const target = Math.max(0, Math.min(index, outline.slide_count - 1));
+        if (target !== currentSlideIndex) {
+            currentSlideIndex = target;
+            renderCurrentSlide();
+        }
+    }
+
+    // --- 3b. LIVE SYNC (presenter drives, followers jump to the same slide) ---
+    const liveStatusEl = document.getElementById('live-status');
+    const presentLiveBtn = document.getElementById('present-live-btn');
+    const followLiveBtn = document.getElementById('follow-live-btn');
+    const MAX_RECONNECT_DELAY = 10000;
+    let liveMode = null;  // null, 'presenter' or 'viewer'
+    let liveSocket = null;
+    let reconnectDelay = 500;
+    let pendingLivePosition = null;
+
+    function setLiveStatus(text) {
+        liveStatusEl.textContent = text || '';
+        liveStatusEl.style.display = text ? 'inline-block' : 'none';
+        if (presentLiveBtn) presentLiveBtn.classList.toggle('active', liveMode === 'presenter');
+        followLiveBtn.classList.toggle('active', liveMode === 'viewer');
+    }
+
+    function broadcastPosition() {
+        if (liveMode === 'presenter' && liveSocket && liveSocket.readyState === WebSocket.OPEN) {
+            liveSocket.send(JSON.stringify({ type: 'goto', position: currentSlideIndex }));
+        }
+    }
+
+    function connectLive(mode) {
+        const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const query = mode === 'presenter' ? '?role=presenter' : '';
+        const socket = new WebSocket(`${scheme}://${window.location.host}${playerConfig.live_url}${query}`);
+        liveSocket = socket;
+
+        socket.addEventListener('open', () => {
+            reconnectDelay = 500;
+            setLiveStatus(mode === 'presenter' ? 'Live: presenting' : 'Live: following');
+            broadcastPosition();
+        });
+        socket.addEventListener('message', (event) => {
+            const data = JSON.parse(event.data);
+            if (liveMode === 'viewer' && data.type === 'position') goToSlide(data.position);
+        });
+        socket.addEventListener('close', (event) => {
+            if (liveSocket !== socket || liveMode !== mode) return;
+            if (event.code === 4403 || event.code === 4404) {
+                stopLive();
+                setLiveStatus('Live sync unavailable');
+                return;
+            }
+            setLiveStatus('Live: reconnecting…');
+            setTimeout(() => { if (liveMode === mode && liveSocket === socket) connectLive(mode); }, reconnectDelay);
+            reconnectDelay = Math.min(reconnectDelay * 2, MAX_RECONNECT_DELAY);
+        });
+    }
+
+    function stopLive() {
+        liveMode = null;
+        if (liveSocket) {
+            const socket = liveSocket;
+            liveSocket = null;
+            socket.close();
+        }
+        setLiveStatus(null);
+    }
+
+    function toggleLive(mode) {
+        const wasActive = liveMode === mode;
+        stopLive();
+        if (wasActive) return;
+        liveMode = mode;
+        reconnectDelay = 500;
+        connectLive(mode);
+    }
+
+    // --- 4. QUIZ HELPERS ---
+    function handleSubmitQuiz(quizSlide) {
+        quizSlide.classList.add('quiz-submitted');
+        const feedbackEl = quizSlide.querySelector('.feedback');
+        const submitBtn = quizSlide.querySelector('.submit-quiz-btn');
+        const retakeBtn = quizSlide.querySelector('.retake-quiz-btn');
+
+        let score = 0;
+        let totalCorrect = 0;
+        quizSlide.querySelectorAll('.option').forEach(option => {
+            const isCorrect = option.dataset.correct === 'true';
+            const isSelected = option.classList.contains('selected');
+            if (isCorrect) {
+                totalCorrect++;
+                option.classList.add('correct');
+                if (isSelected) score++;
+            } else if (isSelected) {
+                option.classList.add('incorrect');
+                score--;
+            }
+        });
+
+        score = Math.max(0, score);
+        if (feedbackEl) feedbackEl.textContent = `You scored ${score} out of ${totalCorrect}.`;
+        if (submitBtn) submitBtn.style.display = 'none';
+        if (retakeBtn) retakeBtn.style.display = 'inline-block';
+    }
+
+    function handleRetakeQuiz(quizSlide) {
+        quizSlide.classList.remove('quiz-submitted');
+        quizSlide.querySelectorAll('.option').forEach(option => option.classList.remove('selected', 'correct', 'incorrect'));
+        const feedbackEl = quizSlide.querySelector('.feedback');
+        const submitBtn = quizSlide.querySelector('.submit-quiz-btn');
+        const retakeBtn = quizSlide.querySelector('.retake-quiz-btn');
+        if (feedbackEl) feedbackEl.textContent = '';
+        if (submitBtn) submitBtn.style.display = 'inline-block';
+        if (retakeBtn) retakeBtn.style.display = 'none';
+    }
+
+    // --- 5. EVENT LISTENERS ---
+    prevBtn.addEventListener('click', goToPrevSlide);
+    nextBtn.addEventListener('click', goToNextSlide);
+    document.addEventListener('keydown', (event) => {
+        if (event.key === 'ArrowRight') goToNextSlide();
+        else if (event.key === 'ArrowLeft') goToPrevSlide();
+    });
+
+    if (presentLiveBtn) presentLiveBtn.addEventListener('click', () => toggleLive('presenter'));
+    followLiveBtn.addEventListener('click', () => toggleLive('viewer'));
+
+    displayArea.addEventListener('click', function(e) {
+        const quizSlide = e.target.closest('.quiz-slide');
+        if (!quizSlide) return;
+        if (e.target.classList.contains('option') && !quizSlide.classList.contains('quiz-submitted')) {
+            e.target.classList.toggle('selected');
+        }
+        if (e.target.classList.contains('submit-quiz-btn')) handleSubmitQuiz(quizSlide);
+        if (e.target.classList.contains('retake-quiz-btn')) handleRetakeQuiz(quizSlide);
+    });
+
+    // --- 6. INITIALIZATION ---
+    loadOutline();
+});
@@ -12,7 +12,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const apiConfigEl = document.getElementById('api-config-json');
     if (!apiConfigEl) { console.error("CRITICAL: #api-config-json missing."); alert("API Config Error."); return; }
     const API_CONFIG = JSON.parse(apiConfigEl.textContent);
-    const API_URLS = API_CONFIG.urls; // Expects API_URLS.study_plans_base
+    const API_URLS = API_CONFIG.urls; // Expects API_URLS.study_plans_base, study_plan_detail_base and generate_schedule
     const CSRF_TOKEN = API_CONFIG.csrf_token;
     const CURRENT_USER_ID = API_CONFIG.current_user_id ? String(API_CONFIG.current_user_id) : null;
     const IS_STAFF = API_CONFIG.is_staff || false;
@@ -29,12 +29,10 @@ document.addEventListener('DOMContentLoaded', function() {
     const HOURS_IN_DAY = Array.from({ length: 16 }, (_, i) => `${String(i + 7).padStart(2, '0')}:00`); // 7 AM to 10 PM
     const DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'];
     const DEFAULT_SUBJECT_COLORS = ['#3498db', '#e74c3c', '#2ecc71', '#f1c40f', '#9b59b6', '#1abc9c', '#e67e22', '#7f8c8d'];
-    // Define actual vacation periods here if needed for client-side generation logic.
-    // Example: { start: "YYYY-MM-DD", end: "YYYY-MM-DD" } or "YYYY-MM-DD"
-    const SCHOOL_VACATIONS = [ 
-        // Example: "2025-09-11", { start: "2025-10-20", end: "2025-10-24" } 
-    ]; 
-    const PRIORITY_VALUES = { "high": 30, "medium": 20, "low": 10, "none": 0 };
+    // Vacation periods come from the server (VacationPeriod), tagged with their
+    // curriculum name, or null when shared by every curriculum. The generator
+    // uses the same calendar, see schoolVacations().
+    const VACATION_PERIODS = INITIAL_DATA.vacations || [];
 
     // This object holds the entire state for the current study plan.
     let planState = {
@@ -45,9 +43,13 @@ document.addEventListener('DOMContentLoaded', function() {
             subjects: [], // Array of { localId, pk, name, examDate, priority, color, curriculum_name, language_code, level_display }
             availability: {} // { Monday: {"07:00": true, ...}, ... }
         },
-        schedule: []    // Array of { start_time, end_time, subject_name, subject_color, subject_local_id }
+        schedule: []    // Array of { start_time, end_time, subject_name, subject_color, subject_local_id },
+                        // or null when the sessions stay on the server (a saved plan) and are read week by week
     };
 
+    let calendarWeek = getMondayOfWeek(new Date()); // Monday of the week shown by the calendar
+    let calendarWeekSessions = []; // Sessions of that week, as rendered
+    let editedWeeks = {}; // Monday (YYYY-MM-DD) -> sessions of a server-side week edited by hand, not saved yet
     let currentEditingSlot = null; // For the edit slot modal
     let allServerSubjects = []; // Cache of all subjects available for selection, processed from INITIAL_DATA
 
@@ -61,6 +63,9 @@ document.addEventListener('DOMContentLoaded', function() {
     const availabilityGridDiv = document.getElementById('availability-grid');
     const scheduleSectionDiv = document.getElementById('schedule-section');
     const scheduleCalendarContainer = document.getElementById('schedule-calendar-container');
+    const calendarWeekLabel = document.getElementById('calendar-week-label');
+    const prevWeekBtn = document.getElementById('prev-week-btn');
+    const nextWeekBtn = document.getElementById('next-week-btn');
     const actionButtonsContainer = document.getElementById('action-buttons-container');
     
     const viewGenerateScheduleBtn = document.getElementById('view-generate-schedule-btn');
@@ -109,6 +114,8 @@ document.addEventListener('DOMContentLoaded', function() {
             config: { subjects: [], availability: {} },
             schedule: []
         };
+        calendarWeek = getMondayOfWeek(new Date());
+        editedWeeks = {};
         setDefaultWeeklyAvailability(); // Apply default availability
         if (planNameInput) planNameInput.value = planState.name; // Update plan name input
         console.log("Plan state reset for student:", forStudentId, JSON.parse(JSON.stringify(planState)));
@@ -197,46 +204,55 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     /**
-     * Renders the generated schedule calendar based on planState.schedule.
+     * Renders the week `calendarWeek` of the schedule. The sessions of a saved
+     * plan are read from the server one week at a time (see sessionsOfWeek).
      */
-    function renderScheduleCalendar() {
-        console.log("Rendering schedule from planState.schedule:", JSON.parse(JSON.stringify(planState.schedule)));
-        scheduleCalendarContainer.innerHTML = '';
-
-        if (!planState.schedule || planState.schedule.length === 0) {
+    async function renderScheduleCalendar() {
+        if (!planState.id && !(planState.schedule && planState.schedule.length > 0)) {
             scheduleCalendarContainer.innerHTML = "<p class='text-center text-muted p-3'>No schedule generated or loaded. Configure and click 'View / Generate Schedule'.</p>";
             if (scheduleSectionDiv) scheduleSectionDiv.style.display = 'none';
             return;
         }
         if (scheduleSectionDiv) scheduleSectionDiv.style.display = 'block';
 
-        const scheduleByDate = planState.schedule.reduce((acc, slot) => {
+        const week = calendarWeek;
+        const sunday = addDays(week, 6);
+        if (calendarWeekLabel) calendarWeekLabel.textContent = `${isoDate(week)} – ${isoDate(sunday)}`;
+        let sessions;
+        try {
+            sessions = await sessionsOfWeek(week);
+        } catch (error) {
+            console.error("Error loading the week's sessions:", error);
+            scheduleCalendarContainer.innerHTML = "<p class='text-center text-danger p-3'>Error loading the sessions of this week.</p>";
+            return;
+        }
+        if (week !== calendarWeek) return; // Another week was asked for meanwhile
+
+        calendarWeekSessions = sessions;
+        scheduleCalendarContainer.innerHTML = buildCalendarTable(sessions, week, sunday);
+        // Add event listeners to newly rendered cells
+        scheduleCalendarContainer.querySelectorAll('td.scheduled, td.available-empty, td.vacation-available-empty').forEach(cell => {
+            cell.addEventListener('click', handleSlotClickForEdit);
+        });
+    }
+
+    /**
+     * The calendar table of `sessions`, one row per day from firstDateCal to
+     * lastDateCal (UTC midnights).
+     */
+    function buildCalendarTable(sessions, firstDateCal, lastDateCal) {
+        const scheduleByDate = sessions.reduce((acc, slot) => {
             if (!slot || !slot.start_time) { console.warn("Invalid slot in schedule:", slot); return acc; }
             const datePart = slot.start_time.split('T')[0];
             (acc[datePart] = acc[datePart] || []).push(slot);
             return acc;
         }, {});
-        
-        const scheduledDates = Object.keys(scheduleByDate).sort((a, b) => new Date(a) - new Date(b));
-        if (scheduledDates.length === 0) {
-            scheduleCalendarContainer.innerHTML = "<p class='text-center text-muted p-3'>No sessions planned in the loaded schedule.</p>";
-            return;
-        }
+        const vacations = schoolVacations();
 
         let tableHTML = `<table class="table table-sm table-bordered schedule-calendar-table"><thead><tr><th>Date</th>`;
         HOURS_IN_DAY.forEach(hour => tableHTML += `<th>${hour.substring(0,2)}h</th>`);
         tableHTML += '</tr></thead><tbody>';
         
-        // Ensure dates are valid before creating Date objects
-        const validScheduledDates = scheduledDates.filter(dateStr => !isNaN(new Date(dateStr).getTime()));
-        if (validScheduledDates.length === 0) {
-             scheduleCalendarContainer.innerHTML = "<p class='text-center text-danger p-3'>Error processing schedule dates.</p>";
-            return;
-        }
-
-        const firstDateCal = new Date(validScheduledDates[0] + "T00:00:00Z");
-        const lastDateCal = new Date(validScheduledDates[validScheduledDates.length - 1] + "T00:00:00Z");
-        
         let previousDateIterCal = null;
         let currentDateIterCal = new Date(firstDateCal);
         
@@ -244,7 +260,7 @@ document.addEventListener('DOMContentLoaded', function() {
             const dateStr = currentDateIterCal.toISOString().split('T')[0];
             const dayIndex = currentDateIterCal.getUTCDay(); 
             const dayNameDisplay = DAYS_OF_WEEK[dayIndex === 0 ? 6 : dayIndex - 1]; // Monday is 0 in array, 1 in getUTCDay
-            const weekIsEntirelyVacation = isEntireWeekVacation(currentDateIterCal, SCHOOL_VACATIONS);
+            const weekIsEntirelyVacation = isEntireWeekVacation(currentDateIterCal, vacations);
 
             if (previousDateIterCal && dayIndex === 1 && previousDateIterCal.getUTCDay() !== 1) { // Start of a new week (Monday)
                 tableHTML += `<tr class="week-separator"><td colspan="${HOURS_IN_DAY.length + 1}"></td></tr>`;
@@ -255,7 +271,7 @@ document.addEventListener('DOMContentLoaded', function() {
             const daySlots = scheduleByDate[dateStr] || [];
             const dayKeyForAvailability = DAYS_OF_WEEK[dayIndex === 0 ? 6 : dayIndex - 1];
             const currentDayAvailabilityConfig = planState.config.availability[dayKeyForAvailability] || {};
-            const isCurrentDayVacation = isDateInVacationPeriod(currentDateIterCal, SCHOOL_VACATIONS);
+            const isCurrentDayVacation = isDateInVacationPeriod(currentDateIterCal, vacations);
 
             HOURS_IN_DAY.forEach(hour => {
                 const formattedHour = hour;
@@ -289,11 +305,59 @@ document.addEventListener('DOMContentLoaded', function() {
             currentDateIterCal.setUTCDate(currentDateIterCal.getUTCDate() + 1);
         }
         tableHTML += '</tbody></table>';
-        scheduleCalendarContainer.innerHTML = tableHTML;
-        // Add event listeners to newly rendered cells
-        scheduleCalendarContainer.querySelectorAll('td.scheduled, td.available-empty, td.vacation-available-empty').forEach(cell => {
-            cell.addEventListener('click', handleSlotClickForEdit);
+        return tableHTML;
+    }
+
+    function isoDate(dateObj) {
+        return dateObj.toISOString().split('T')[0];
+    }
+
+    function addDays(dateObj, days) {
+        const result = new Date(dateObj);
+        result.setUTCDate(result.getUTCDate() + days);
+        return result;
+    }
+
+    function weekOfSession(session) {
+        return isoDate(getMondayOfWeek(new Date(session.start_time)));
+    }
+
+    /**
+     * The sessions of the week starting on `monday`: from the schedule in
+     * memory after a generation, from the hand edits not saved yet, or else
+     * from StudyPlanViewSet.sessions. That response is marked no-cache with an
+     * ETag, so the browser revalidates a week it already has and gets a 304.
+     */
+    async function sessionsOfWeek(monday) {
+        const key = isoDate(monday);
+        if (planState.schedule) return planState.schedule.filter(s => s.start_time && weekOfSession(s) === key);
+        if (editedWeeks[key]) return editedWeeks[key];
+        const response = await fetch(`${API_URLS.study_plan_detail_base}${planState.id}/sessions/?from=${key}`);
+        if (!response.ok) throw new Error(`${response.status} ${response.statusText}`);
+        return (await response.json()).sessions;
+    }
+
+    /**
+     * The whole schedule: the one in memory, or the saved one (fetched with
+     * ?session_format=runs) with the weeks edited since applied to it.
+     */
+    async function fullSchedule() {
+        if (planState.schedule) return planState.schedule;
+        let sessions = [];
+        if (planState.id) {
+            const response = await fetch(`${API_URLS.study_plan_detail_base}${planState.id}/?session_format=runs`);
+            if (!response.ok) throw new Error(`${response.status} ${response.statusText}`);
+            sessions = planSessions(await response.json());
+        }
+        Object.entries(editedWeeks).forEach(([monday, weekSessions]) => {
+            sessions = sessions.filter(s => weekOfSession(s) !== monday).concat(weekSessions);
         });
+        return sessions;
+    }
+
+    function showWeek(offsetWeeks) {
+        calendarWeek = addDays(calendarWeek, 7 * offsetWeeks);
+        renderScheduleCalendar();
     }
     
     // --- 5. EVENT HANDLERS & STATE UPDATES ---
@@ -362,7 +426,7 @@ document.addEventListener('DOMContentLoaded', function() {
         });
         
         const slotIdentifier = currentEditingSlot.date + 'T' + currentEditingSlot.time;
-        const entry = planState.schedule.find(s => s.start_time && s.start_time.startsWith(slotIdentifier));
+        const entry = calendarWeekSessions.find(s => s.start_time && s.start_time.startsWith(slotIdentifier));
         slotSubjectSelect.value = entry ? String(entry.subject_local_id) : "";
         
         editSlotModal.show();
@@ -374,12 +438,13 @@ document.addEventListener('DOMContentLoaded', function() {
         const { date, time } = currentEditingSlot;
         const slotIdentifier = date + 'T' + time;
         
-        planState.schedule = planState.schedule.filter(s => !(s.start_time && s.start_time.startsWith(slotIdentifier)));
+        // A week of a saved plan is edited as a copy, kept until the plan is saved.
+        let sessions = (planState.schedule || calendarWeekSessions).filter(s => !(s.start_time && s.start_time.startsWith(slotIdentifier)));
         
         if (newSubLocalIdStr) {
             const subjectConfig = planState.config.subjects.find(s => String(s.localId) === newSubLocalIdStr);
             if (subjectConfig) {
-                planState.schedule.push({
+                sessions.push({
                     start_time: `${date}T${time}:00Z`, // Ensure Z for UTC if backend expects it
                     end_time: `${date}T${String(parseInt(time.split(':')[0], 10) + 1).padStart(2, '0')}:00:00Z`,
                     subject_name: subjectConfig.name, 
@@ -388,13 +453,27 @@ document.addEventListener('DOMContentLoaded', function() {
                 });
             }
         }
+        if (planState.schedule) planState.schedule = sessions;
+        else editedWeeks[isoDate(calendarWeek)] = sessions;
         renderScheduleCalendar(); // Re-render to show changes
         editSlotModal.hide();
         currentEditingSlot = null;
     });
     
-    exportScheduleHtmlBtn.addEventListener('click', () => {
-        const tableHTMLToExport = scheduleCalendarContainer.querySelector('table')?.outerHTML || "<p>No schedule to export.</p>";
+    exportScheduleHtmlBtn.addEventListener('click', async () => {
+        // The export covers the whole schedule, not only the week on screen.
+        let sessions;
+        try {
+            sessions = (await fullSchedule()).filter(s => s.start_time);
+        } catch (error) {
+            console.error("Error loading the schedule to export:", error);
+            alert(`Export failed: ${error.message}`);
+            return;
+        }
+        const scheduledDates = sessions.map(s => s.start_time.split('T')[0]).sort();
+        const tableHTMLToExport = scheduledDates.length > 0
+            ? buildCalendarTable(sessions, new Date(scheduledDates[0] + "T00:00:00Z"), new Date(scheduledDates[scheduledDates.length - 1] + "T00:00:00Z"))
+            : "<p>No schedule to export.</p>";
         const exportTitle = planNameInput.value.trim() || `Study Plan`;
         const fullExportHtml = `<!DOCTYPE html><html lang="en"><head><meta charset="UTF-8"><title>${exportTitle}</title>
         <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css" rel="stylesheet">
@@ -417,10 +496,12 @@ document.addEventListener('DOMContentLoaded', function() {
         link.remove();
     });
 
-    // --- 6. CLIENT-SIDE SCHEDULE GENERATION ---
-    // (Keep your existing clientSideGenerateSchedule and related helper functions:
-    // isDateInVacationPeriod, getMondayOfWeek, isEntireWeekVacation.
-    // Ensure they are correctly defined and used.)
+    // --- 6. SCHEDULE GENERATION ---
+    // The vacation helpers below are still used to shade the calendar.
+    function schoolVacations() {
+        const curricula = new Set(planState.config.subjects.filter(s => s.pk).map(s => s.curriculum_name));
+        return VACATION_PERIODS.filter(period => period.curriculum === null || curricula.has(period.curriculum));
+    }
     function isDateInVacationPeriod(dateObj, vacationPeriods) { 
         const dateStr = dateObj.toISOString().split('T')[0];
         for (const period of vacationPeriods) {
@@ -447,8 +528,9 @@ document.addEventListener('DOMContentLoaded', function() {
         return true; 
     }
 
-    function clientSideGenerateSchedule() {
-        console.log("Client-side schedule generation initiated.");
+    // The schedule itself is computed by the server (StudyPlanViewSet.generate),
+    // so every client gets the same plan for the same configuration.
+    async function generateSchedule() {
         showLoading(true);
         if (generationInfoAlert) { generationInfoAlert.className = 'alert d-none'; generationInfoAlert.textContent = ""; }
         
@@ -467,118 +549,73 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
 
-        const totalPriorityValue = subjectsToPlan.reduce((sum, s) => sum + (PRIORITY_VALUES[s.priority] || 0), 0);
-        if (totalPriorityValue === 0 && subjectsToPlan.some(s => s.priority !== "none")) { // Check if any subject has a non-"none" priority
-            alert("The total priority weight is 0, but subjects with priorities are selected. Please assign valid priorities (Low, Medium, or High).");
-            showLoading(false);
-            return;
-        }
-        
-        setTimeout(() => { 
-            planState.schedule = []; 
-            const today = new Date();
-            today.setUTCHours(0, 0, 0, 0);
-            
-            const examDates = subjectsToPlan.map(s => new Date(s.examDate + "T00:00:00Z"));
-            const validExamDates = examDates.filter(d => !isNaN(d.getTime()));
-            if (validExamDates.length === 0 && subjectsToPlan.length > 0) {
-                 alert("No valid exam dates found for subjects with priority. Please check all exam dates.");
-                 showLoading(false);
-                 return;
-            }
-            const lastExamDate = new Date(Math.max(...validExamDates)); 
-            
-            if (isNaN(lastExamDate.getTime())) {
-                alert("Invalid exam date setup. Cannot determine the last exam date.");
-                showLoading(false);
-                return;
-            }
-            lastExamDate.setUTCHours(23, 59, 59, 999);
-
-            let allAvailableSlotsList = [];
-            let tempDateIter = new Date(today);
-            while (tempDateIter <= lastExamDate) {
-                const dayKey = DAYS_OF_WEEK[tempDateIter.getUTCDay() === 0 ? 6 : tempDateIter.getUTCDay() - 1];
-                const isVacation = isDateInVacationPeriod(tempDateIter, SCHOOL_VACATIONS);
-                if (isVacation) {
-                    HOURS_IN_DAY.forEach(hour => {
-                        const hourNum = parseInt(hour.split(':')[0]);
-                        if ((hourNum >= 9 && hourNum < 12) || (hourNum >= 14 && hourNum < 17)) { 
-                            allAvailableSlotsList.push({ date: new Date(tempDateIter), dateString: tempDateIter.toISOString().split('T')[0], time: hour, dayKey: dayKey, isVacationSlot: true });
-                        }
-                    });
-                } else {
-                    if (planState.config.availability[dayKey]) {
-                        HOURS_IN_DAY.forEach(hour => {
-                            if (planState.config.availability[dayKey][hour]) {
-                                allAvailableSlotsList.push({ date: new Date(tempDateIter), dateString: tempDateIter.toISOString().split('T')[0], time: hour, dayKey: dayKey, isVacationSlot: false });
-                            }
-                        });
-                    }
-                }
-                tempDateIter.setUTCDate(tempDateIter.getUTCDate() + 1);
-            }
-
-            if (allAvailableSlotsList.length === 0) {
-                if(generationInfoAlert) {generationInfoAlert.textContent = "No available study slots found based on your configuration and exam dates."; generationInfoAlert.className = 'alert alert-warning d-block';}
-                showLoading(false);
-                return;
-            }
-
-            let subjectWorkData = subjectsToPlan.map(s => ({
-                ...s,
-                targetSlots: Math.max(0, Math.floor(((PRIORITY_VALUES[s.priority] || 0) / (totalPriorityValue || 1)) * allAvailableSlotsList.length)),
-                assignedSlots: 0,
-                consecutiveHours: 0,
-                examDateObj: new Date(s.examDate + "T00:00:00Z")
-            }));
-            
-            for (const slot of allAvailableSlotsList) {
-                let eligibleSubjects = subjectWorkData.filter(s => s.assignedSlots < s.targetSlots && slot.date <= s.examDateObj);
-                if (eligibleSubjects.length === 0) {
-                    subjectWorkData.forEach(s => s.consecutiveHours = 0); 
-                    continue;
-                }
-                
-                eligibleSubjects.sort((a, b) => {
-                    const urgencyA = (a.examDateObj - slot.date) / (1000 * 60 * 60 * 24); 
-                    const urgencyB = (b.examDateObj - slot.date) / (1000 * 60 * 60 * 24);
-                    const remainingRatioA = (a.targetSlots - a.assignedSlots) / (a.targetSlots || 1); 
-                    const remainingRatioB = (b.targetSlots - b.assignedSlots) / (b.targetSlots || 1);
-                    
-                    if (urgencyA < 7 && urgencyB >= 7) return -1; if (urgencyB < 7 && urgencyA >= 7) return 1;
-                    if (urgencyA !== urgencyB) return urgencyA - urgencyB;
-                    if (remainingRatioB !== remainingRatioA) return remainingRatioB - remainingRatioA;
-                    return a.consecutiveHours - b.consecutiveHours;
-                });
-                
-                let chosen = eligibleSubjects.find(sub => sub.consecutiveHours < 2) || eligibleSubjects[0];
-                
-                if (chosen) {
-                    planState.schedule.push({
-                        start_time: `${slot.dateString}T${slot.time}:00Z`,
-                        end_time: `${slot.dateString}T${String(parseInt(slot.time.split(':')[0]) + 1).padStart(2, '0')}:00:00Z`,
-                        subject_name: chosen.name,
-                        subject_color: chosen.color,
-                        subject_local_id: chosen.localId,
-                        isVacationSlot: slot.isVacationSlot
-                    });
-                    chosen.assignedSlots++;
-                    subjectWorkData.forEach(s => s.localId === chosen.localId ? s.consecutiveHours++ : s.consecutiveHours = 0);
+        // A saved plan is regenerated incrementally: the sessions before the
+        // first day affected by the changes are kept as they are.
+        const url = planState.id
+            ? `${API_URLS.study_plan_detail_base}${planState.id}/regenerate/`
+            : API_URLS.generate_schedule;
+        try {
+            const response = await fetch(url, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', 'X-CSRFToken': CSRF_TOKEN },
+                body: JSON.stringify({ config: planState.config })
+            });
+            const data = await response.json();
+            if (!response.ok) throw new Error(data.detail || data.config || response.statusText);
+
+            planState.schedule = data.sessions;
+            editedWeeks = {};
+            // Show the week of the first session planned.
+            const firstSession = planState.schedule.filter(s => s.start_time).map(s => s.start_time).sort()[0];
+            calendarWeek = getMondayOfWeek(firstSession ? new Date(firstSession) : new Date());
+            renderScheduleCalendar();
+            if (generationInfoAlert) {
+                if (planState.schedule.length === 0) {
+                    generationInfoAlert.textContent = "No available study slots found based on your configuration and exam dates.";
+                    generationInfoAlert.className = 'alert alert-warning d-block';
                 } else {
-                    subjectWorkData.forEach(s => s.consecutiveHours = 0);
+                    generationInfoAlert.textContent = `Schedule generated: ${planState.schedule.length} sessions planned.`;
+                    generationInfoAlert.className = 'alert alert-success d-block';
                 }
             }
-            renderScheduleCalendar();
-            if(generationInfoAlert) {generationInfoAlert.textContent = `Schedule generated: ${planState.schedule.length} sessions planned.`; generationInfoAlert.className = 'alert alert-success d-block';}
+        } catch (error) {
+            console.error("Error generating the schedule:", error);
+            alert(`Schedule generation failed: ${error.message}`);
+        } finally {
             showLoading(false);
-        }, 50);
+        }
     }
 
 
     // =========================================================================
     // 7. API COMMUNICATION (Save/Load Plan)
     // =========================================================================
+    // Plans are loaded with ?session_format=none: the calendar reads their
+    // sessions a week at a time (sessionsOfWeek). The whole schedule, needed
+    // to export it or save hand edits, is fetched with ?session_format=runs:
+    // blocks of back-to-back hours of one subject ([first hour since the
+    // epoch, hours, subject index]), expanded here into one-hour sessions.
+    function expandSessionRuns(compact) {
+        const sessions = [];
+        compact.runs.forEach(([firstHour, hours, subjectIndex]) => {
+            const [name, color, localId] = compact.subjects[subjectIndex];
+            for (let hour = firstHour; hour < firstHour + hours; hour++) {
+                sessions.push({
+                    start_time: new Date(hour * 3600000).toISOString().replace('.000Z', 'Z'),
+                    end_time: new Date((hour + 1) * 3600000).toISOString().replace('.000Z', 'Z'),
+                    subject_name: name,
+                    subject_color: color,
+                    subject_local_id: localId
+                });
+            }
+        });
+        return sessions;
+    }
+
+    function planSessions(plan) {
+        return plan.session_runs ? expandSessionRuns(plan.session_runs) : (plan.sessions || []);
+    }
+
     async function loadPlanFromServer(studentIdToLoad) {
         if (!studentIdToLoad) { 
             resetPlanState(""); 
@@ -591,7 +628,7 @@ document.addEventListener('DOMContentLoaded', function() {
         console.log(`Loading plan for student ID: ${studentIdToLoad}`);
         
         try {
-            const response = await fetch(`${API_URLS.study_plans_base}?student_id=${studentIdToLoad}`);
+            const response = await fetch(`${API_URLS.study_plans_base}?student_id=${studentIdToLoad}&session_format=none`);
             
             if (response.status === 404) { 
                 console.log("No plan found on server for student:", studentIdToLoad, ". Initializing new.");
@@ -608,7 +645,9 @@ document.addEventListener('DOMContentLoaded', function() {
                 planState.name = loadedPlan.name || `Plan for ${studentSelector.options[studentSelector.selectedIndex]?.text.split('(')[0].trim() || 'selected student'}`;
                 planState.student = String(loadedPlan.student); 
                 planState.config = loadedPlan.config || { subjects: [], availability: {} };
-                planState.schedule = loadedPlan.sessions || [];
+                planState.schedule = null; // Read week by week from the server
+                editedWeeks = {};
+                calendarWeek = getMondayOfWeek(new Date());
 
                 if (!planState.config.availability || Object.keys(planState.config.availability).length === 0) {
                     setDefaultWeeklyAvailability();
@@ -626,8 +665,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
                 console.log("Plan loaded from server:", JSON.parse(JSON.stringify(planState)));
                 if(generationInfoAlert) {
-                    generationInfoAlert.textContent = planState.schedule.length > 0 ? `Schedule loaded for "${planState.name}".` : `Configuration loaded for "${planState.name}".`;
-                    generationInfoAlert.className = `alert ${planState.schedule.length > 0 ? 'alert-info' : 'alert-secondary'} d-block`;
+                    generationInfoAlert.textContent = `Plan loaded for "${planState.name}".`;
+                    generationInfoAlert.className = 'alert alert-info d-block';
                 }
             }
             localStorage.setItem('lastSelectedPlannerStudent', studentIdToLoad);
@@ -655,19 +694,23 @@ document.addEventListener('DOMContentLoaded', function() {
         const payload = {
             name: planState.name,
             student: planState.student, 
-            config: planState.config, 
-            sessions: planState.schedule 
+            config: planState.config
         };
         
         // Backend's create method handles "get or create/update" logic based on student ID
-        const url = API_URLS.study_plans_base;
+        const url = `${API_URLS.study_plans_base}?session_format=none`;
         const method = 'POST'; // Always POST, backend handles upsert
 
         showLoading(true);
         console.log(`Saving plan to server. Method: ${method}, URL: ${url}`);
-        console.log("Payload:", JSON.parse(JSON.stringify(payload)));
         
         try {
+            // Without "sessions" the server keeps the stored ones: they are only
+            // sent after a generation or hand edits (and the server writes the difference).
+            if (planState.schedule || Object.keys(editedWeeks).length > 0) {
+                payload.sessions = await fullSchedule();
+            }
+            console.log("Payload:", JSON.parse(JSON.stringify(payload)));
             const response = await fetch(url, { 
                 method: method,
                 headers: { 'Content-Type': 'application/json', 'X-CSRFToken': CSRF_TOKEN },
@@ -685,7 +728,8 @@ document.addEventListener('DOMContentLoaded', function() {
             planState.id = savedPlan.id; 
             planState.name = savedPlan.name;
             planState.config = savedPlan.config;
-            planState.schedule = savedPlan.sessions || []; 
+            planState.schedule = null; // Saved: read week by week from the server again
+            editedWeeks = {};
             
             alert(`Plan "${planState.name}" saved successfully!`);
             renderUIFromState(); 
@@ -711,8 +755,10 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 
     if(planNameInput) planNameInput.addEventListener('change', (e) => { planState.name = e.target.value; });
-    if(viewGenerateScheduleBtn) viewGenerateScheduleBtn.addEventListener('click', clientSideGenerateSchedule);
+    if(viewGenerateScheduleBtn) viewGenerateScheduleBtn.addEventListener('click', generateSchedule);
     if(savePlanBtn) savePlanBtn.addEventListener('click', savePlanToServer);
+    if(prevWeekBtn) prevWeekBtn.addEventListener('click', () => showWeek(-1));
+    if(nextWeekBtn) nextWeekBtn.addEventListener('click', () => showWeek(1));
     if(exportScheduleHtmlBtn) exportScheduleHtmlBtn.addEventListener('click', exportScheduleHtmlBtn); // Corrected this line
     
     function populateInitialDropdowns() {